@@ -1,45 +1,180 @@
-from flask import Flask, json, jsonify
+import signal
+import threading
+import time
+
+import click
+from flask import Flask, jsonify, request
 from config import Config
-from .docs import get_apispec, swagger_ui_blueprint
+from .admission import admission_control
+from .cache import task_cache
+from .changes import change_notifier, prune_tombstones
+from .compression import compression
 from .db import db, migrate
-from .docs import SWAGGER_URL
-from dotenv import load_dotenv
-from apispec.exceptions import APISpecError
-
-load_dotenv()
+from .executor import task_executor
+from .json_provider import FastJSONProvider
+from .metrics import request_metrics
+from .pool import pool_metrics
+from .profiling import request_profiler, sign_profile_token
+from .replicas import read_replicas
+from .sharding import task_shards
+from .write_behind import task_write_behind
+from .docs import SWAGGER_URL, export_apispec, get_serialized_spec
+from .docs import swagger_ui_blueprint
 
 
-def create_app():
+def create_app(config=Config):
     """
     Создание экземпляра приложения Flask.
 
+    Args:
+        config: Класс конфигурации приложения.
+
     Returns:
         app: Экземпляр приложения Flask.
     """
     app = Flask(__name__)  # Создание экземпляра приложения Flask
-    app.config.from_object(Config)  # Применение конфигурации к приложению
+    app.config.from_object(config)  # Применение конфигурации к приложению
+    app.json = FastJSONProvider(app)  # Быстрое кодирование JSON (orjson)
 
+    pool_metrics.configure(app)  # Пул соединений с замером ожидания
     db.init_app(app)  # Инициализация базы данных для приложения
+    task_shards.init_app(app)  # Сегменты хранилища задач и генератор id
+    read_replicas.init_app(app)  # Реплики для обработчиков чтения
+    pool_metrics.init_app(app)  # Метрики и прогрев пула соединений
+    request_metrics.init_app(app)  # Метрики запросов и эндпоинт /metrics
+    admission_control.init_app(app)  # Ограничение частоты и числа запросов
+    request_profiler.init_app(app)  # Профилирование выборочных запросов
     migrate.init_app(app, db)  # Инициализация миграций для базы данных
+    task_cache.init_app(app)  # Инициализация кэша чтения задач
+    task_write_behind.init_app(app)  # Отложенная пакетная запись новых задач
+    change_notifier.init_app(app)  # Оповещение длинных опросов ленты изменений
+    task_executor.init_app(app)  # Исполнитель задач (flask run-worker)
+    compression.init_app(app)  # Сжатие ответов gzip/brotli
 
     from . import routes  # Импорт маршрутов приложения
 
     app.register_blueprint(routes.bp)  # Регистрация маршрутов в приложении
-    app.register_blueprint(
-        swagger_ui_blueprint, url_prefix=SWAGGER_URL
-    )  # Регистрация Swagger UI в приложении
+    if app.config["DOCS_ENABLED"]:
+        app.register_blueprint(
+            swagger_ui_blueprint, url_prefix=SWAGGER_URL
+        )  # Регистрация Swagger UI в приложении
+
+        @app.route("/swagger.json")
+        def create_swagger_spec():
+            """
+            Выдача спецификации API в формате JSON.
 
-    @app.route("/swagger.json")
-    def create_swagger_spec():
+            Спецификация собирается один раз и отдается из готового буфера
+            с поддержкой ETag/If-None-Match и сжатия gzip.
+
+            Returns:
+                response: Спецификация API в формате JSON.
+            """
+            spec = get_serialized_spec(app)  # Получение кэшированной спецификации
+            gzipped = "gzip" in request.accept_encodings  # Клиент принимает gzip
+            response = app.response_class(
+                spec.gzipped if gzipped else spec.body, mimetype="application/json"
+            )
+            if gzipped:
+                response.content_encoding = "gzip"
+            response.vary.add("Accept-Encoding")
+            # У сжатого и несжатого представлений должны быть разные ETag
+            response.set_etag(spec.etag + ("-gzip" if gzipped else ""))
+            response.cache_control.no_cache = True  # Повторная проверка по ETag
+            return response.make_conditional(request)  # Ответ 304, если ETag совпал
+
+    @app.cli.command("export-spec")
+    @click.argument("path", default="static/swagger.json")
+    def export_swagger_spec(path):
         """
-        Создание спецификации API в формате JSON.
+        Запись спецификации API в статический файл.
 
-        Returns:
-            str: Спецификация API в формате JSON.
+        Args:
+            path: Путь к файлу спецификации.
+        """
+        size = export_apispec(app, path)  # Сборка и запись спецификации
+        click.echo(f"API spec written to {path} ({size} bytes)")
+
+    @app.cli.command("profile-token")
+    @click.option("--ttl", default=3600, help="Срок действия токена в секундах")
+    def create_profile_token(ttl):
+        """
+        Создание значения заголовка X-Profile-Token для профилирования запроса.
+
+        Args:
+            ttl: Срок действия токена в секундах.
+        """
+        secret = app.config["PROFILING_SECRET"]
+        if not secret:
+            raise click.ClickException("PROFILING_SECRET is not set")
+        click.echo(sign_profile_token(secret, int(time.time()) + ttl))
+
+    @app.cli.command("prune-tombstones")
+    @click.option("--days", type=int, help="Срок хранения записей в днях")
+    def prune_task_tombstones(days):
         """
-        return json.dumps(
-            get_apispec(app).to_dict()
-        )  # Возврат спецификации API в формате JSON
+        Очистка старых записей об удаленных задачах из ленты изменений.
+
+        Args:
+            days: Срок хранения, по умолчанию TASK_TOMBSTONE_RETENTION_DAYS.
+        """
+        if days is None:
+            days = app.config["TASK_TOMBSTONE_RETENTION_DAYS"]
+        count = prune_tombstones(days)  # Удаление записей старше срока
+        click.echo(f"Deleted {count} tombstones older than {days} days")
+
+    @app.cli.command("init-shards")
+    def init_task_shards():
+        """
+        Создание таблиц в сегментах хранилища задач (TASK_SHARD_URLS).
+        """
+        if not task_shards.enabled:
+            raise click.ClickException("TASK_SHARD_URLS is not set")
+        count = task_shards.create_schema()
+        click.echo(f"Schema created in {count} shards")
+
+    @app.cli.command("run-worker")
+    @click.option(
+        "--pool", type=click.Choice(["thread", "process"]), help="Тип пула исполнителей"
+    )
+    @click.option("--concurrency", type=int, help="Количество исполнителей в пуле")
+    @click.option("--metrics-port", type=int, help="Порт для выдачи /metrics")
+    @click.option("--burst", is_flag=True, help="Завершиться, когда задачи кончатся")
+    def run_worker(pool, concurrency, metrics_port, burst):
+        """
+        Запуск исполнителя задач до сигнала SIGINT или SIGTERM.
+
+        Args:
+            pool: Тип пула, по умолчанию TASK_EXECUTOR_POOL.
+            concurrency: Размер пула, по умолчанию TASK_EXECUTOR_CONCURRENCY.
+            metrics_port: Порт HTTP-сервера с метриками исполнителя.
+            burst: Выполнить готовые задачи и завершиться.
+        """
+        if task_cache.is_process_local():
+            # Исполнитель изменяет задачи в отдельном процессе: кэш в памяти
+            # веб-процессов не узнает об этих изменениях
+            raise click.ClickException(
+                "run-worker requires TASK_CACHE_BACKEND=shared with an external "
+                "TASK_CACHE_CLIENT or TASK_CACHE_BACKEND=none"
+            )
+        if pool:
+            task_executor.pool_kind = pool
+        if concurrency:
+            task_executor.concurrency = concurrency
+        if metrics_port:
+            from werkzeug.serving import make_server
+
+            # Метрики исполнителя доступны только в его процессе
+            server = make_server("0.0.0.0", metrics_port, app, threaded=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: task_executor.stop())
+        click.echo(
+            f"Worker started: {task_executor.concurrency} "
+            f"{task_executor.pool_kind} executors"
+        )
+        task_executor.run(burst=burst)
+        click.echo(f"Worker stopped: {task_executor.stats()}")
 
     @app.errorhandler(Exception)
     def handle_exception(e):
@@ -52,6 +187,8 @@ def create_app():
         Returns:
             response: Ответ с информацией об ошибке.
         """
+        from apispec.exceptions import APISpecError  # Импорт только при ошибке
+
         if isinstance(e, APISpecError):  # Если возникло исключение APISpecError
             return (
                 jsonify({"error": str(e)}),
@@ -63,4 +200,7 @@ def create_app():
                 500,
             )  # Возврат сообщения об ошибке сервера, код ошибки 500
 
+    if app.config["DOCS_ENABLED"] and app.config["API_SPEC_PRELOAD"]:
+        get_serialized_spec(app)  # Сборка спецификации при старте приложения
+
     return app  # Возврат экземпляра приложения Flask
@@ -0,0 +1,283 @@
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, jsonify, request
+from sqlalchemy.pool import QueuePool
+from werkzeug.utils import import_string
+
+from .db import db
+
+
+def refill(tokens, updated_at, now, rate, burst):
+    # Количество токенов в корзине к моменту now
+    return min(burst, tokens + (now - updated_at) * rate)
+
+
+class RateLimitBackend:
+    # Интерфейс хранилища корзин токенов клиентов
+
+    def consume(self, key, cost, rate, burst):
+        """
+        Списание токенов из корзины клиента.
+
+        Корзина вмещает burst токенов и пополняется со скоростью rate токенов
+        в секунду; новая корзина полна.
+
+        Args:
+            key: Ключ клиента.
+            cost: Количество списываемых токенов.
+            rate: Скорость пополнения в токенах в секунду.
+            burst: Емкость корзины.
+
+        Returns:
+            tuple: Признак успешного списания и время в секундах, через которое
+                в корзине будет достаточно токенов (0, если списание успешно).
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        """
+        Получение счетчиков хранилища.
+
+        Returns:
+            dict: Количество корзин и вытеснений.
+        """
+        raise NotImplementedError
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    # Корзины в памяти процесса; корзины давно не обращавшихся клиентов
+    # вытесняются (вытесненная корзина считается полной)
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize  # Максимальное количество корзин
+        self._buckets = OrderedDict()  # Токены и время последнего обновления
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def consume(self, key, cost, rate, burst):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = refill(tokens, updated_at, now, rate, burst)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        return allowed, 0 if allowed else (cost - tokens) / rate
+
+    def stats(self):
+        with self._lock:
+            return {"buckets": len(self._buckets), "evictions": self.evictions}
+
+
+class SharedRateLimitBackend(RateLimitBackend):
+    # Корзины во внешнем хранилище, общем для всех процессов приложения.
+    # Клиент должен предоставлять методы get(key) и set(key, value, ex=ttl)
+    # со строковыми значениями, как у клиентов Redis. Чтение и запись корзины
+    # не атомарны, поэтому одновременные запросы одного клиента из разных
+    # процессов могут ненамного превысить лимит; для строгого лимита consume
+    # нужно выполнять в хранилище атомарно (например, скриптом Lua в Redis)
+
+    def __init__(self, client, prefix="rate-limit:"):
+        self.client = client  # Клиент внешнего хранилища
+        self.prefix = prefix  # Префикс ключей в общем хранилище
+
+    def consume(self, key, cost, rate, burst):
+        now = time.time()  # Время, общее для процессов на разных машинах
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            tokens, updated_at = burst, now
+        else:
+            tokens, updated_at = (float(value) for value in raw.split(":"))
+        tokens = refill(tokens, updated_at, now, rate, burst)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        # Запись хранится, пока корзина не наполнится снова
+        ttl = max(math.ceil((burst - tokens) / rate), 1)
+        self.client.set(self.prefix + key, f"{tokens}:{now}", ex=ttl)
+        return allowed, 0 if allowed else (cost - tokens) / rate
+
+    def stats(self):
+        # Корзинами управляет внешнее хранилище, поэтому счетчики не ведутся
+        return {"buckets": 0, "evictions": 0}
+
+
+class AdmissionControl:
+    # Допуск запросов к обработке: ограничение частоты запросов клиента
+    # (корзина токенов) и числа одновременно обрабатываемых запросов процесса
+
+    def __init__(self, app=None):
+        self.rate_limit = False
+        self.backend = None  # Хранилище корзин токенов
+        self.slots = None  # Семафор мест обработки или None без ограничения
+        self.max_concurrency = 0
+        self._lock = threading.Lock()
+        self.in_flight = 0  # Обрабатываемые запросы
+        self.limited = 0  # Отказы 429 по частоте запросов
+        self.shed = 0  # Отказы 503 из-за нехватки мест обработки
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Настройка допуска запросов по конфигурации приложения.
+
+        Args:
+            app: Экземпляр приложения Flask.
+        """
+        app.extensions["admission_control"] = self
+        self.backend = None
+        self.slots = None
+        self.rate_limit = app.config["RATE_LIMIT_ENABLED"]
+        self.rate = app.config["RATE_LIMIT_RATE"]
+        self.burst = app.config["RATE_LIMIT_BURST"]
+        self.costs = app.config["RATE_LIMIT_COSTS"]
+        self.key_header = app.config["RATE_LIMIT_KEY_HEADER"]
+        self.trusted_proxies = [
+            ipaddress.ip_network(proxy, strict=False)
+            for proxy in app.config["RATE_LIMIT_TRUSTED_PROXIES"]
+        ]
+        if self.key_header and not self.trusted_proxies:
+            # Клиент может подставить в заголовок любой ключ и обойти лимит
+            raise ValueError(
+                "RATE_LIMIT_KEY_HEADER requires RATE_LIMIT_TRUSTED_PROXIES"
+            )
+        if self.rate_limit:
+            too_expensive = [
+                endpoint for endpoint, cost in self.costs.items() if cost > self.burst
+            ]
+            if too_expensive:
+                raise ValueError(
+                    "RATE_LIMIT_COSTS exceed RATE_LIMIT_BURST for: "
+                    + ", ".join(too_expensive)
+                )
+            backend = app.config["RATE_LIMIT_BACKEND"]
+            if backend == "memory":
+                self.backend = MemoryRateLimitBackend(
+                    app.config["RATE_LIMIT_MAX_CLIENTS"]
+                )
+            elif backend == "shared":
+                # Фабрика клиента задается строкой импорта, например "redis:Redis"
+                client_factory = import_string(app.config["RATE_LIMIT_CLIENT"])
+                self.backend = SharedRateLimitBackend(client_factory())
+            else:
+                raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
+
+        self.max_concurrency = app.config["ADMISSION_MAX_CONCURRENCY"]
+        if self.max_concurrency == 0:
+            self.max_concurrency = self._pool_capacity(app)
+        if self.max_concurrency > 0:
+            self.slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.exempt = set(app.config["ADMISSION_EXEMPT_ENDPOINTS"])
+        self.queue_timeout = app.config["ADMISSION_QUEUE_TIMEOUT"]
+        self.retry_after = app.config["ADMISSION_RETRY_AFTER"]
+        if self.rate_limit or self.slots is not None:
+            app.before_request(self._before_request)
+            app.teardown_request(self._teardown_request)
+
+    @staticmethod
+    def _pool_capacity(app):
+        # Наибольшее число соединений пула основной базы (pool_size +
+        # max_overflow); -1, если пул не ограничивает число соединений
+        if not app.config.get("SQLALCHEMY_DATABASE_URI"):
+            return -1
+        with app.app_context():
+            pool = db.engine.pool
+        options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+        max_overflow = options.get("max_overflow", 10)
+        if not isinstance(pool, QueuePool) or max_overflow < 0:
+            return -1
+        return pool.size() + max_overflow
+
+    def _from_trusted_proxy(self):
+        # Запрос получен от доверенного прокси (RATE_LIMIT_TRUSTED_PROXIES)
+        try:
+            address = ipaddress.ip_address(request.remote_addr)
+        except ValueError:  # Адрес не задан или это не IP (Unix-сокет)
+            return False
+        return any(address in network for network in self.trusted_proxies)
+
+    def client_key(self):
+        """
+        Ключ клиента для ограничения частоты запросов.
+
+        Returns:
+            str: Значение заголовка RATE_LIMIT_KEY_HEADER, если он задан и
+                передан доверенным прокси, иначе IP-адрес клиента.
+        """
+        key = request.headers.get(self.key_header) if self.key_header else None
+        if key and self._from_trusted_proxy():
+            return "key:" + key
+        return f"ip:{request.remote_addr}"
+
+    def _before_request(self):
+        cost = self.costs.get(request.endpoint, 1)
+        if cost == 0:  # Эндпоинт без ограничений (например, /metrics)
+            return None
+        if self.rate_limit:
+            allowed, wait = self.backend.consume(
+                self.client_key(), cost, self.rate, self.burst
+            )
+            if not allowed:
+                with self._lock:
+                    self.limited += 1
+                return (
+                    jsonify({"error": "Too many requests"}),
+                    429,
+                    {"Retry-After": str(max(math.ceil(wait), 1))},
+                )
+        if self.slots is not None and request.endpoint not in self.exempt:
+            # Отказ вместо ожидания соединения пула: запрос не занимает
+            # поток обработки дольше ADMISSION_QUEUE_TIMEOUT
+            if not self.slots.acquire(timeout=self.queue_timeout):
+                with self._lock:
+                    self.shed += 1
+                return (
+                    jsonify({"error": "Server is overloaded"}),
+                    503,
+                    {"Retry-After": str(self.retry_after)},
+                )
+            g.admission_slot = True
+            with self._lock:
+                self.in_flight += 1
+        return None
+
+    def _teardown_request(self, exc):
+        # Место освобождается после отправки ответа, в том числе потокового
+        if g.pop("admission_slot", False):
+            with self._lock:
+                self.in_flight -= 1
+            self.slots.release()
+
+    def stats(self):
+        """
+        Счетчики допуска запросов.
+
+        Returns:
+            dict: Отказы по частоте запросов и из-за перегрузки, число
+                обрабатываемых запросов и предел одновременной обработки.
+        """
+        with self._lock:
+            stats = {
+                "rate_limited_total": self.limited,
+                "shed_total": self.shed,
+                "in_flight": self.in_flight,
+                "max_concurrency": self.max_concurrency,
+            }
+        if self.backend is not None:
+            stats.update(
+                {f"rate_limit_{k}": v for k, v in self.backend.stats().items()}
+            )
+        return stats
+
+
+admission_control = AdmissionControl()
@@ -0,0 +1,264 @@
+"""
+ASGI-режим приложения на Quart с асинхронным движком SQLAlchemy.
+
+Используются те же конфигурация, модель Task, схемы и сериализаторы, что и в
+WSGI-приложении из create_app, но обращения к базе данных не блокируют поток:
+пока один запрос ждет ответа базы, воркер обслуживает другие.
+
+Требует дополнительных пакетов: quart, uvicorn и асинхронного драйвера
+(aiosqlite для SQLite, aiomysql для MySQL).
+"""
+
+from marshmallow import ValidationError
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.engine import make_url
+
+from config import Config
+
+from .cache import task_cache
+from .conditional import if_match_condition, task_validators
+from .models import Task, TaskTombstone
+from .pagination import QueryParamError, TaskListQuery, get_limit
+from .schemas import task_create_schema, task_update_schema
+from .serializers import dump_task
+
+try:
+    from quart import Blueprint, Quart, current_app, jsonify, request
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+except ImportError as e:
+    raise ImportError(
+        "ASGI mode requires optional packages: "
+        "pip install quart uvicorn aiosqlite 'sqlalchemy[asyncio]'"
+    ) from e
+
+# Асинхронные драйверы для синхронных схем подключения из DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql+mysqlconnector": "mysql+aiomysql",
+}
+
+# Создание Blueprint для асинхронного управления задачами
+bp = Blueprint("tasks", __name__, url_prefix="/tasks")
+
+
+def make_async_url(uri):
+    """
+    Преобразование строки подключения к асинхронному драйверу.
+
+    Args:
+        uri: Строка подключения SQLAlchemy.
+
+    Returns:
+        URL: Строка подключения с асинхронным драйвером.
+    """
+    url = make_url(uri)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+
+def get_session():
+    # Создание асинхронной сессии базы данных для текущего запроса
+    return current_app.extensions["async_session"]()
+
+
+def task_response(payload):
+    # Ответ с данными задачи и ее валидаторами, как в WSGI-приложении
+    response = jsonify(payload)
+    etag, last_modified = task_validators(payload)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    return response
+
+
+@bp.route("", methods=["POST"])
+async def create_task():
+    """
+    Асинхронное создание новой задачи.
+
+    Returns:
+        response: Данные созданной задачи.
+    """
+    try:
+        task_data = task_create_schema.load(await request.get_json())
+    except ValidationError as e:
+        return jsonify({"error": e.messages}), 400  # Ошибка валидации данных
+    async with get_session() as session:
+        task = Task(**task_data)  # Создание новой задачи
+        session.add(task)
+        await session.commit()  # Фиксация изменений в базе данных
+        await session.refresh(task)  # Чтение значений в том виде, как они сохранены
+        return dump_task(task), 201  # Возврат данных о созданной задаче
+
+
+@bp.route("", methods=["GET"])
+async def get_tasks():
+    """
+    Асинхронное получение страницы задач с фильтрами, сортировкой и курсором.
+
+    Returns:
+        response: Страница задач и курсор следующей страницы.
+    """
+    try:
+        list_query = TaskListQuery.from_args(request.args)
+        limit = get_limit(request.args, current_app.config)
+    except QueryParamError as e:
+        return jsonify({"error": str(e)}), 400  # Ошибка в параметрах выдачи
+    query = list_query.statement().limit(limit + 1)
+    async with get_session() as session:
+        result = await session.execute(query)
+        items = result.all() if list_query.fields else result.scalars().all()
+    items, next_cursor = list_query.split_page(items, limit)
+    return {"items": items, "limit": limit, "next_cursor": next_cursor}
+
+
+@bp.route("/<int:id>", methods=["GET"])
+async def get_task(id):
+    """
+    Асинхронное получение задачи по ID.
+
+    Args:
+        id: ID задачи.
+
+    Returns:
+        response: Данные задачи или ошибка 404.
+    """
+    payload = task_cache.get(id)  # Попытка получить данные задачи из кэша
+    if payload is None:
+        async with get_session() as session:
+            task = await session.get(Task, id)
+        if task is None:
+            return jsonify({"error": "Task not found"}), 404
+        payload = dump_task(task)  # Сериализация задачи
+        task_cache.set(id, payload)  # Сохранение данных задачи в кэше
+    return task_response(payload), 200  # Возврат данных о задаче в формате JSON
+
+
+@bp.route("/<int:id>", methods=["PUT"])
+async def update_task(id):
+    """
+    Асинхронное обновление задачи по ID.
+
+    Args:
+        id: ID задачи.
+
+    Returns:
+        response: Данные обновленной задачи или ошибка.
+    """
+    condition = if_match_condition(id, request.if_match)  # Условие по версии
+    try:
+        updated_data = task_update_schema.load(await request.get_json(), partial=True)
+    except ValidationError as e:
+        return jsonify({"error": e.messages}), 400  # Ошибка валидации данных
+    async with get_session() as session:
+        if condition is None:
+            task = await session.get(Task, id)
+            if task is None:
+                return jsonify({"error": "Task not found"}), 404
+            for key, value in updated_data.items():
+                setattr(task, key, value)  # Обновление атрибутов задачи
+        else:
+            # Условное обновление одним запросом, без предварительного чтения
+            if updated_data:
+                query = update(Task).where(Task.id == id, condition)
+                query = query.values(**updated_data, version=Task.version + 1)
+                matched = (await session.execute(query)).rowcount
+            else:
+                query = select(func.count()).where(Task.id == id, condition)
+                matched = (await session.execute(query)).scalar()
+            if not matched:  # Задача не найдена или ее версия не совпала
+                await session.rollback()
+                if await session.get(Task, id) is None:
+                    return jsonify({"error": "Task not found"}), 404
+                return jsonify({"error": "Precondition failed"}), 412
+        await session.commit()  # Фиксация изменений в базе данных
+        if condition is None:
+            await session.refresh(task)  # Чтение значений в том виде, как сохранены
+        else:
+            task = await session.get(Task, id)  # Чтение обновленной задачи
+        payload = dump_task(task)
+    task_cache.set(id, payload)  # Обновление данных задачи в кэше
+    return task_response(payload), 200  # Возврат данных о задаче в формате JSON
+
+
+@bp.route("/<int:id>", methods=["DELETE"])
+async def delete_task(id):
+    """
+    Асинхронное удаление задачи по ID.
+
+    Args:
+        id: ID задачи.
+
+    Returns:
+        response: Сообщение об успешном удалении или ошибка 404 или 412.
+    """
+    condition = if_match_condition(id, request.if_match)  # Условие по версии
+    async with get_session() as session:
+        if condition is None:
+            task = await session.get(Task, id)
+            if task is None:
+                return jsonify({"error": "Task not found"}), 404
+            await session.delete(task)
+        else:
+            # Условное удаление одним запросом, без предварительного чтения
+            query = delete(Task).where(Task.id == id, condition)
+            if not (await session.execute(query)).rowcount:
+                await session.rollback()
+                if await session.get(Task, id) is None:
+                    return jsonify({"error": "Task not found"}), 404
+                return jsonify({"error": "Precondition failed"}), 412
+        session.add(TaskTombstone(task_id=id))  # Запись удаления в ленту изменений
+        await session.commit()  # Фиксация изменений в базе данных
+    task_cache.delete(id)  # Удаление задачи из кэша
+    return {"message": "Task deleted successfully"}, 200
+
+
+def create_asgi_app(config=Config):
+    """
+    Создание экземпляра ASGI-приложения Quart.
+
+    Args:
+        config: Класс конфигурации, по умолчанию тот же, что и у create_app.
+
+    Returns:
+        app: Экземпляр приложения Quart.
+
+    Raises:
+        RuntimeError: Если настроены сегменты хранилища задач.
+    """
+    app = Quart(__name__)  # Создание экземпляра приложения Quart
+    app.config.from_object(config)  # Применение конфигурации к приложению
+    if app.config["TASK_SHARD_URLS"]:
+        # Маршрутизация по сегментам реализована только для синхронной сессии
+        raise RuntimeError("ASGI mode does not support TASK_SHARD_URLS")
+
+    uri = app.config["ASYNC_DATABASE_URL"] or app.config["SQLALCHEMY_DATABASE_URI"]
+    engine = create_async_engine(
+        make_async_url(uri), **app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    )  # Асинхронный движок с теми же параметрами пула
+    app.extensions["async_session"] = async_sessionmaker(engine, expire_on_commit=False)
+    # Кэш чтения задач; изменения других процессов видны в нем только с
+    # общим хранилищем (TASK_CACHE_BACKEND=shared)
+    task_cache.init_app(app)
+
+    app.register_blueprint(bp)  # Регистрация маршрутов в приложении
+
+    @app.after_serving
+    async def dispose_engine():
+        # Закрытие соединений с базой данных при остановке сервера
+        await engine.dispose()
+
+    @app.errorhandler(Exception)
+    async def handle_exception(e):
+        """
+        Обработчик исключений для обработки ошибок.
+
+        Args:
+            e: Исключение, которое необходимо обработать.
+
+        Returns:
+            response: Ответ с информацией об ошибке.
+        """
+        return jsonify({"error": "Internal server error"}), 500
+
+    return app  # Возврат экземпляра приложения Quart
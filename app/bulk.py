@@ -0,0 +1,252 @@
+from collections import defaultdict
+
+from marshmallow import ValidationError
+
+from .cache import task_cache
+from .changes import record_deletions
+from .db import db
+from .models import Task
+from .schemas import tasks_create_schema, tasks_bulk_update_schema
+from .serializers import dump_task
+from .sharding import task_shards
+
+
+def _load_many(schema, items):
+    """
+    Валидация массива элементов с разбиением ошибок по индексам.
+
+    Args:
+        schema: Схема Marshmallow, созданная с many=True.
+        items: Список элементов из тела запроса.
+
+    Returns:
+        tuple: Список загруженных данных (None для невалидных элементов)
+            и словарь ошибок по индексам элементов.
+    """
+    try:
+        return schema.load(items), {}
+    except ValidationError as e:
+        errors = e.messages  # Ошибки сгруппированы по индексам элементов массива
+        loaded = [
+            None if index in errors else data for index, data in enumerate(e.valid_data)
+        ]
+        return loaded, errors
+
+
+def insert_tasks(rows):
+    """
+    Вставка нескольких задач в рамках текущей транзакции.
+
+    Если драйвер поддерживает RETURNING для executemany, строки вставляются
+    многострочными INSERT; иначе используется пакетная вставка через ORM.
+
+    Args:
+        rows: Список словарей с данными новых задач.
+
+    Returns:
+        list: Созданные задачи в порядке входных данных.
+    """
+    if not rows:
+        return []
+    if db.session.get_bind().dialect.insert_executemany_returning:
+        result = db.session.execute(db.insert(Task).returning(Task), rows)
+        # Автоинкрементные id внутри одной вставки возрастают в порядке VALUES
+        return sorted(result.scalars().all(), key=lambda task: task.id)
+    tasks = [Task(**row) for row in rows]
+    db.session.add_all(tasks)
+    db.session.flush()  # Получение id созданных задач
+    return tasks
+
+
+def create_tasks(items):
+    """
+    Массовое создание задач в одной транзакции.
+
+    Args:
+        items: Список данных новых задач.
+
+    Returns:
+        list: Результаты по каждому элементу в порядке входных данных.
+    """
+    loaded, errors = _load_many(tasks_create_schema, items)
+    valid = [(index, data) for index, data in enumerate(loaded) if data is not None]
+    payloads = save_tasks([data for _, data in valid])
+
+    results = [
+        {"index": index, "status": 400, "errors": errors[index]}
+        for index in sorted(errors)
+    ]
+    results.extend(
+        {"index": index, "status": 201, "task": payload}
+        for (index, _), payload in zip(valid, payloads)
+    )
+    return sorted(results, key=lambda item: item["index"])
+
+
+def _per_shard(items, shard_of, function):
+    # Массовая операция отдельно в каждом сегменте хранилища задач; индексы
+    # результатов пересчитываются в индексы входных данных
+    results = task_shards.map_grouped(items, shard_of, function)
+    for index, result in enumerate(results):
+        result["index"] = index
+    return results
+
+
+def _shard_of_item(item):
+    # Сегмент элемента массового обновления; элементы без корректного id
+    # (ошибка валидации) обрабатываются в первом сегменте
+    id = item.get("id") if isinstance(item, dict) else None
+    if isinstance(id, int) and not isinstance(id, bool):
+        return task_shards.for_id(id)
+    return 0
+
+
+def save_tasks(rows):
+    """
+    Вставка и фиксация пачки проверенных задач.
+
+    При сегментированном хранилище задачам выдаются id, и задачи каждого
+    сегмента фиксируются отдельной транзакцией.
+
+    Args:
+        rows: Список данных новых задач, прошедших валидацию.
+
+    Returns:
+        list: Сериализованные задачи в том виде, как они сохранены, в порядке
+            входных данных.
+    """
+    if not task_shards.enabled:
+        return _save_tasks(rows)
+    for row in rows:
+        row["id"] = task_shards.next_id()
+    return task_shards.map_grouped(
+        rows, lambda row: task_shards.for_id(row["id"]), _save_tasks
+    )
+
+
+def _save_tasks(rows):
+    # Вставка и фиксация пачки задач в одной базе
+    tasks = insert_tasks(rows)
+    ids = [task.id for task in tasks]  # После фиксации атрибуты задач устаревают
+    db.session.commit()  # Одна фиксация для всей пачки
+    if ids:
+        # Перечитывание сохраненных задач одним запросом вместо запроса на задачу
+        db.session.execute(db.select(Task).where(Task.id.in_(ids))).scalars().all()
+    return [dump_task(task) for task in tasks]
+
+
+def update_tasks(items):
+    """
+    Массовое обновление задач в одной транзакции (при сегментированном
+    хранилище - в одной транзакции на сегмент).
+
+    Обновления выполняются пакетным UPDATE по первичному ключу (executemany),
+    по одному на каждый набор обновляемых полей.
+
+    Args:
+        items: Список объектов с id задачи и обновляемыми полями.
+
+    Returns:
+        list: Результаты по каждому элементу в порядке входных данных.
+    """
+    if task_shards.enabled:
+        return _per_shard(items, _shard_of_item, _update_tasks)
+    return _update_tasks(items)
+
+
+def _update_tasks(items):
+    # Массовое обновление задач в одной базе
+    loaded, errors = _load_many(tasks_bulk_update_schema, items)
+    ids = [data["id"] for data in loaded if data is not None]
+    existing = set(
+        db.session.execute(db.select(Task.id).where(Task.id.in_(ids))).scalars()
+    )
+
+    results = {}
+    seen = set()
+    rows = []
+    for index, data in enumerate(loaded):
+        if data is None:
+            results[index] = {"index": index, "status": 400, "errors": errors[index]}
+        elif data["id"] in seen:
+            results[index] = {
+                "index": index,
+                "status": 400,
+                "errors": {"id": ["Duplicate id in request."]},
+            }
+        elif data["id"] not in existing:
+            results[index] = {"index": index, "status": 404, "id": data["id"]}
+        else:
+            seen.add(data["id"])
+            if len(data) > 1:  # Элементы без обновляемых полей не попадают в UPDATE
+                rows.append(data)
+            results[index] = {"index": index, "status": 200, "id": data["id"]}
+
+    # Элементы группируются по набору полей: у пакетного UPDATE одна форма
+    groups = defaultdict(list)
+    for row in rows:
+        names = tuple(sorted(name for name in row if name != "id"))
+        params = {f"new_{name}": row[name] for name in names}
+        groups[names].append({"task_id": row["id"], **params})
+    table = Task.__table__
+    for names, params in groups.items():
+        db.session.execute(
+            table.update()
+            .where(table.c.id == db.bindparam("task_id"))
+            .values(
+                version=table.c.version + 1,  # Новая версия для ETag и If-Match
+                **{name: db.bindparam(f"new_{name}") for name in names},
+            ),
+            params,
+        )
+    db.session.commit()  # Одна фиксация для всей пачки
+
+    # Чтение обновленных задач одним запросом
+    tasks = db.session.execute(db.select(Task).where(Task.id.in_(seen))).scalars()
+    payloads = {task.id: dump_task(task) for task in tasks}
+    for id, payload in payloads.items():
+        task_cache.set(id, payload)  # Обновление данных задач в кэше
+    for result in results.values():
+        if result["status"] == 200:
+            result["task"] = payloads[result.pop("id")]
+    return [results[index] for index in sorted(results)]
+
+
+def delete_tasks(ids):
+    """
+    Массовое удаление задач одним запросом DELETE ... WHERE id IN (при
+    сегментированном хранилище - одним запросом на сегмент).
+
+    Args:
+        ids: Список id удаляемых задач.
+
+    Returns:
+        list: Результаты по каждому id в порядке входных данных.
+    """
+    if task_shards.enabled:
+        return _per_shard(ids, task_shards.for_id, _delete_tasks)
+    return _delete_tasks(ids)
+
+
+def _delete_tasks(ids):
+    # Массовое удаление задач в одной базе
+    existing = set(
+        db.session.execute(db.select(Task.id).where(Task.id.in_(ids))).scalars()
+    )
+    if existing:
+        db.session.execute(
+            db.delete(Task)
+            .where(Task.id.in_(existing))
+            .execution_options(synchronize_session=False)
+        )
+        record_deletions(sorted(existing))  # Запись удалений в ленту изменений
+    db.session.commit()  # Одна фиксация для всей пачки
+    for id in existing:
+        task_cache.delete(id)  # Удаление задач из кэша
+
+    results = []
+    for index, id in enumerate(ids):
+        status = 200 if id in existing else 404
+        existing.discard(id)  # Повторный id в запросе считается уже удаленным
+        results.append({"index": index, "id": id, "status": status})
+    return results
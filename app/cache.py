@@ -0,0 +1,240 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import json
+from werkzeug.utils import import_string
+
+
+class CacheBackend:
+    # Интерфейс хранилища кэша сериализованных данных задач
+
+    def get(self, key):
+        """
+        Получение значения из кэша.
+
+        Args:
+            key: Ключ записи.
+
+        Returns:
+            Значение или None, если записи нет или ее срок жизни истек.
+        """
+        raise NotImplementedError
+
+    def set(self, key, value):
+        """
+        Сохранение значения в кэше.
+
+        Args:
+            key: Ключ записи.
+            value: Сохраняемое значение.
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        """
+        Удаление записи из кэша.
+
+        Args:
+            key: Ключ записи.
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        """
+        Получение счетчиков работы кэша.
+
+        Returns:
+            dict: Счетчики попаданий, промахов и вытеснений.
+        """
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    # Пустой кэш, используемый при отключенном кэшировании
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def stats(self):
+        return {"hits": 0, "misses": 0, "evictions": 0, "size": 0}
+
+
+class LRUCache(CacheBackend):
+    # Кэш в памяти процесса с вытеснением давно неиспользуемых записей и TTL
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize  # Максимальное количество записей
+        self.ttl = ttl  # Время жизни записи в секундах
+        self._data = OrderedDict()  # Записи в порядке последнего использования
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():  # Срок жизни записи истек
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)  # Отметка о недавнем использовании
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)  # Вытеснение самой старой записи
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+            }
+
+
+class SharedCache(CacheBackend):
+    # Кэш во внешнем хранилище, общем для всех процессов приложения.
+    # Клиент должен предоставлять методы get(key), set(key, value, ex=ttl)
+    # и delete(key) со строковыми значениями, как у клиентов Redis.
+
+    def __init__(self, client, ttl=60, prefix="task-cache:"):
+        self.client = client  # Клиент внешнего хранилища
+        self.ttl = ttl  # Время жизни записи в секундах
+        self.prefix = prefix  # Префикс ключей в общем хранилище
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def stats(self):
+        # Вытеснением управляет внешнее хранилище, поэтому счетчик не ведется
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": 0}
+
+
+class LocalSharedClient:
+    # Локальная замена клиента внешнего хранилища для тестов и разработки
+
+    def __init__(self):
+        self._data = {}  # Значения и время истечения срока жизни
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            expires_at = time.monotonic() + ex if ex else None
+            self._data[key] = (value, expires_at)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class TaskCache:
+    # Кэш сериализованных данных задач для чтения по id
+
+    def __init__(self, app=None):
+        self.backend = NullCache()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Создание хранилища кэша по конфигурации приложения.
+
+        Args:
+            app: Экземпляр приложения Flask.
+        """
+        backend = app.config["TASK_CACHE_BACKEND"]
+        ttl = app.config["TASK_CACHE_TTL"]
+        if backend == "lru":
+            self.backend = LRUCache(app.config["TASK_CACHE_MAXSIZE"], ttl)
+        elif backend == "shared":
+            # Фабрика клиента задается строкой импорта, например "redis:Redis"
+            client_factory = import_string(app.config["TASK_CACHE_CLIENT"])
+            self.backend = SharedCache(client_factory(), ttl)
+        elif backend == "none":
+            self.backend = NullCache()
+        else:
+            raise ValueError(f"Unknown TASK_CACHE_BACKEND: {backend}")
+        app.extensions["task_cache"] = self
+
+    def get(self, id):
+        return self.backend.get(f"task:{id}")
+
+    def set(self, id, payload):
+        self.backend.set(f"task:{id}", payload)
+
+    def delete(self, id):
+        self.backend.delete(f"task:{id}")
+
+    def is_process_local(self):
+        """
+        Проверка, что записи кэша видны только текущему процессу.
+
+        Инвалидация в таком кэше не доходит до других процессов, поэтому
+        изменения задач, сделанные исполнителем, в них не видны до истечения
+        TASK_CACHE_TTL.
+
+        Returns:
+            bool: True для кэша в памяти процесса и для внешнего хранилища с
+                локальным клиентом LocalSharedClient.
+        """
+        if isinstance(self.backend, LRUCache):
+            return True
+        return isinstance(self.backend, SharedCache) and isinstance(
+            self.backend.client, LocalSharedClient
+        )
+
+    def stats(self):
+        return self.backend.stats()
+
+
+task_cache = TaskCache()
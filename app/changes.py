@@ -0,0 +1,332 @@
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app, json
+from sqlalchemy import event
+
+from .db import db
+from .models import Task, TaskTombstone
+from .pagination import QueryParamError, decode_cursor, encode_cursor, parse_datetime
+from .serializers import dump_task
+
+# Время последнего изменения задачи; обслуживается индексом ix_task_changed_at
+changed_at = db.func.coalesce(Task.updated_at, Task.created_at)
+
+
+class ChangeToken:
+    # Позиция в ленте изменений: последнее выданное изменение задачи и удаление
+
+    def __init__(self, changed=None, task_id=0, tombstone_id=0):
+        self.changed = changed  # Время последнего выданного изменения задачи
+        self.task_id = task_id  # id задачи последнего выданного изменения
+        self.tombstone_id = tombstone_id  # id последней выданной записи удаления
+
+    @classmethod
+    def decode(cls, token):
+        """
+        Разбор токена, полученного от клиента.
+
+        Args:
+            token: Строка токена из параметра since или заголовка Last-Event-ID.
+
+        Returns:
+            ChangeToken: Позиция в ленте изменений.
+
+        Raises:
+            QueryParamError: Если токен поврежден.
+        """
+        values = decode_cursor(token)
+        tombstone_id = values.get("d", 0)
+        if not isinstance(tombstone_id, int):
+            raise QueryParamError("Invalid token")
+        changed = values.get("t")
+        if changed is not None:
+            changed = parse_datetime(changed, "since")
+        return cls(changed, values["id"], tombstone_id)
+
+    def encode(self):
+        # Непрозрачный токен для продолжения ленты
+        values = {"id": self.task_id, "d": self.tombstone_id}
+        if self.changed is not None:
+            values["t"] = self.changed.isoformat()
+        return encode_cursor(values)
+
+
+def settled_before():
+    """
+    Граница времени, до которой изменения считаются зафиксированными.
+
+    Время изменения присваивается до фиксации транзакции, поэтому изменения
+    моложе TASK_CHANGES_SETTLE_SECONDS не выдаются: иначе транзакция,
+    зафиксированная позже с более ранним временем, была бы пропущена.
+
+    Returns:
+        datetime: Время в UTC без часового пояса, как оно хранится в базе.
+    """
+    settle = current_app.config["TASK_CHANGES_SETTLE_SECONDS"]
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now - timedelta(seconds=settle)
+
+
+def head_token():
+    """
+    Токен текущего конца ленты, чтобы получать только новые изменения.
+
+    Returns:
+        ChangeToken: Позиция после последнего зафиксированного изменения.
+    """
+    cutoff = settled_before()
+    last = db.session.execute(
+        db.select(changed_at.label("changed_at"), Task.id)
+        .where(changed_at <= cutoff)
+        .order_by(changed_at.desc(), Task.id.desc())
+        .limit(1)
+    ).first()
+    tombstone_id = db.session.execute(
+        db.select(db.func.max(TaskTombstone.id)).where(
+            TaskTombstone.deleted_at <= cutoff
+        )
+    ).scalar()
+    token = ChangeToken(tombstone_id=tombstone_id or 0)
+    if last is not None:
+        token.changed, token.task_id = last.changed_at, last.id
+    return token
+
+
+def check_token(token):
+    """
+    Проверка, что удаления после токена еще не очищены из ленты.
+
+    Raises:
+        QueryParamError: Если записи удалений, которые клиент не получил,
+            уже удалены командой prune-tombstones.
+    """
+    if token.changed is None and not token.tombstone_id:
+        return  # Полная синхронизация с начала ленты
+    first = db.session.execute(db.select(db.func.min(TaskTombstone.id))).scalar()
+    if first is not None and first > token.tombstone_id + 1:
+        raise QueryParamError("Token expired, full resync required")
+
+
+def fetch_changes(token, limit):
+    """
+    Получение страницы изменений после токена.
+
+    Изменения задач (создание и обновление) и удаления объединяются в порядке
+    времени изменения. Для задачи, измененной несколько раз, выдается только
+    ее текущее состояние.
+
+    Args:
+        token: Позиция в ленте изменений.
+        limit: Максимальное количество изменений.
+
+    Returns:
+        tuple: Список изменений, токен следующей страницы и признак наличия
+            следующих изменений.
+    """
+    cutoff = settled_before()
+    query = db.select(Task, changed_at.label("changed_at")).where(changed_at <= cutoff)
+    if token.changed is not None:
+        query = query.where(
+            db.or_(
+                changed_at > token.changed,
+                db.and_(changed_at == token.changed, Task.id > token.task_id),
+            )
+        )
+    tasks = db.session.execute(
+        query.order_by(changed_at, Task.id).limit(limit + 1)
+    ).all()
+    tombstones = (
+        db.session.execute(
+            db.select(TaskTombstone)
+            .where(
+                TaskTombstone.id > token.tombstone_id,
+                TaskTombstone.deleted_at <= cutoff,
+            )
+            .order_by(TaskTombstone.id)
+            .limit(limit + 1)
+        )
+        .scalars()
+        .all()
+    )
+
+    # Объединение двух упорядоченных последовательностей; страница содержит
+    # начало каждой из них, поэтому токен продолжает обе
+    merged = heapq.merge(
+        ((row.changed_at, "upsert", row) for row in tasks),
+        ((row.deleted_at, "delete", row) for row in tombstones),
+        key=lambda item: item[0],
+    )
+    next_token = ChangeToken(token.changed, token.task_id, token.tombstone_id)
+    changes = []
+    for changed, op, row in merged:
+        if len(changes) == limit:
+            break
+        if op == "upsert":
+            task = row.Task
+            changes.append(
+                {
+                    "op": op,
+                    "id": task.id,
+                    "changed_at": changed.isoformat(),
+                    "task": dump_task(task),
+                }
+            )
+            next_token.changed, next_token.task_id = changed, task.id
+        else:
+            changes.append(
+                {"op": op, "id": row.task_id, "changed_at": changed.isoformat()}
+            )
+            next_token.tombstone_id = row.id
+    has_more = len(tasks) + len(tombstones) > len(changes)
+    return changes, next_token, has_more
+
+
+def record_deletions(ids):
+    """
+    Запись удалений задач в ленту изменений в текущей транзакции.
+
+    Args:
+        ids: id удаленных задач.
+    """
+    if ids:
+        db.session.execute(db.insert(TaskTombstone), [{"task_id": id} for id in ids])
+
+
+def prune_tombstones(days):
+    """
+    Удаление записей об удалениях старше заданного срока.
+
+    Клиенты с токеном старше удаленных записей получат ошибку и должны
+    выполнить полную синхронизацию.
+
+    Args:
+        days: Срок хранения записей в днях.
+
+    Returns:
+        int: Количество удаленных записей.
+    """
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+    result = db.session.execute(
+        db.delete(TaskTombstone).where(TaskTombstone.deleted_at < cutoff)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+class ChangeNotifier:
+    # Оповещение ожидающих запросов ленты о фиксации транзакций в процессе
+
+    def __init__(self, app=None):
+        self._condition = threading.Condition()
+        self._version = 0  # Номер последней зафиксированной транзакции
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Подписка на фиксацию транзакций сессии базы данных.
+
+        Args:
+            app: Экземпляр приложения Flask.
+        """
+        app.extensions["change_notifier"] = self
+        if not self._listening:
+            event.listen(db.session, "after_commit", self._after_commit)
+            self._listening = True
+
+    @property
+    def version(self):
+        return self._version
+
+    def _after_commit(self, session):
+        with self._condition:
+            self._version += 1
+            self._condition.notify_all()
+
+    def wait(self, version, timeout):
+        """
+        Ожидание фиксации транзакции после заданной версии.
+
+        Другие процессы приложения не оповещают этот процесс, поэтому
+        ожидание ограничивается TASK_CHANGES_POLL_INTERVAL и вызывающий код
+        повторяет запрос к базе данных.
+
+        Args:
+            version: Версия, полученная до последнего запроса к базе данных.
+            timeout: Максимальное время ожидания в секундах.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._version != version, timeout)
+
+
+change_notifier = ChangeNotifier()
+
+
+def wait_for_changes(token, limit, wait):
+    """
+    Длинный опрос: ожидание изменений после токена не дольше wait секунд.
+
+    Args:
+        token: Позиция в ленте изменений.
+        limit: Максимальное количество изменений.
+        wait: Максимальное время ожидания в секундах.
+
+    Returns:
+        tuple: Результат fetch_changes (список изменений может быть пустым).
+    """
+    poll_interval = current_app.config["TASK_CHANGES_POLL_INTERVAL"]
+    deadline = time.monotonic() + wait
+    while True:
+        version = change_notifier.version
+        result = fetch_changes(token, limit)
+        db.session.rollback()  # Завершение транзакции, чтобы видеть новые данные
+        remaining = deadline - time.monotonic()
+        if result[0] or remaining <= 0:
+            return result
+        change_notifier.wait(version, min(remaining, poll_interval))
+
+
+def stream_changes(token, limit):
+    """
+    Выдача изменений в формате Server-Sent Events по мере их фиксации.
+
+    Поле id последнего события пачки содержит токен продолжения, поэтому
+    браузер при переподключении передает его в заголовке Last-Event-ID.
+    Доставка - не менее одного раза: после обрыва часть пачки может
+    повториться.
+
+    Args:
+        token: Позиция в ленте изменений.
+        limit: Максимальный размер пачки изменений.
+
+    Yields:
+        str: События SSE.
+    """
+    config = current_app.config
+    poll_interval = config["TASK_CHANGES_POLL_INTERVAL"]
+    keepalive = config["TASK_CHANGES_KEEPALIVE"]
+    yield f"retry: {int(poll_interval * 1000)}\n\n"
+    last_sent = time.monotonic()
+    while True:
+        version = change_notifier.version
+        changes, token, has_more = fetch_changes(token, limit)
+        db.session.rollback()  # Завершение транзакции, чтобы видеть новые данные
+        if changes:
+            events = [
+                f"event: {change['op']}\ndata: {json.dumps(change)}\n\n"
+                for change in changes
+            ]
+            # id только у последнего события: он действует и для предыдущих
+            events[-1] = f"id: {token.encode()}\n" + events[-1]
+            yield "".join(events)
+            last_sent = time.monotonic()
+            if has_more:
+                continue
+        elif time.monotonic() - last_sent >= keepalive:
+            yield ": keepalive\n\n"  # Комментарий SSE для поддержания соединения
+            last_sent = time.monotonic()
+        change_notifier.wait(version, poll_interval)
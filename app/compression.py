@@ -0,0 +1,109 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Сжатие brotli не обязательно
+    brotli = None
+
+# Поддерживаемые кодировки сжатия
+ENCODINGS = ("br", "gzip")
+
+
+def compress_gzip(data, level):
+    # mtime=0 делает результат воспроизводимым для одинаковых данных
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_brotli(data, level):
+    return brotli.compress(data, quality=level)
+
+
+def strip_encoding(etag):
+    """
+    Удаление суффикса кодировки из сильного ETag сжатого ответа.
+
+    Args:
+        etag: Значение ETag без кавычек.
+
+    Returns:
+        str: ETag несжатого представления.
+    """
+    for encoding in ENCODINGS:
+        if etag.endswith(f"-{encoding}"):
+            return etag[: -len(encoding) - 1]
+    return etag
+
+
+class Compression:
+    # Сжатие ответов gzip или brotli по заголовку Accept-Encoding
+
+    def __init__(self, app=None):
+        self.encoders = {}  # Кодировки в порядке предпочтения сервера
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Подключение сжатия ответов к приложению.
+
+        Args:
+            app: Экземпляр приложения Flask.
+        """
+        app.extensions["compression"] = self
+        if not app.config["COMPRESSION_ENABLED"]:
+            return
+        encoders = {}
+        if brotli is not None:
+            encoders["br"] = (compress_brotli, app.config["COMPRESSION_BROTLI_LEVEL"])
+        encoders["gzip"] = (compress_gzip, app.config["COMPRESSION_GZIP_LEVEL"])
+        self.encoders = encoders
+        self.min_size = app.config["COMPRESSION_MIN_SIZE"]
+        self.mimetypes = set(app.config["COMPRESSION_MIMETYPES"])
+        app.after_request(self.compress)
+
+    def compress(self, response):
+        """
+        Сжатие тела ответа выбранной клиентом кодировкой.
+
+        Не сжимаются потоковые ответы, ответы с уже заданной кодировкой,
+        ответы без тела и ответы меньше COMPRESSION_MIN_SIZE байт.
+
+        Args:
+            response: Ответ приложения.
+
+        Returns:
+            response: Сжатый или исходный ответ.
+        """
+        if (
+            response.mimetype not in self.mimetypes
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+        ):
+            return response
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        # Ответ зависит от Accept-Encoding, даже если клиент не принял сжатие
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(list(self.encoders))
+        if encoding is None:
+            return response
+        compress, level = self.encoders[encoding]
+        response.set_data(compress(data, level))
+        response.content_encoding = encoding
+        # Сильный ETag относится к байтам несжатого ответа, поэтому сжатое
+        # представление получает свой ETag с суффиксом кодировки (как и
+        # /swagger.json); If-None-Match проверяется заново для нового ETag
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f"{etag}-{encoding}")
+            return response.make_conditional(request)
+        return response
+
+
+compression = Compression()
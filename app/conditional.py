@@ -0,0 +1,112 @@
+import hashlib
+from datetime import datetime, timezone
+
+from flask import request
+
+from .compression import strip_encoding
+from .db import db
+from .models import Task
+
+
+def _to_utc(value):
+    """
+    Приведение времени к UTC с учетом того, что в базе оно хранится без зоны.
+
+    Args:
+        value: Объект datetime или строка в формате ISO 8601.
+
+    Returns:
+        datetime: Время в UTC или None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def task_validators(payload):
+    """
+    Вычисление валидаторов для сериализованной задачи.
+
+    ETag составляется из id и номера версии задачи (version), который
+    увеличивается при каждом изменении, поэтому две записи в пределах
+    точности поля времени получают разные ETag.
+
+    Args:
+        payload: Сериализованные данные задачи.
+
+    Returns:
+        tuple: Значение ETag и время последнего изменения.
+    """
+    modified = payload.get("updated_at") or payload.get("created_at")
+    return f"{payload['id']}-{payload['version']}", _to_utc(modified)
+
+
+def body_etag(response):
+    """
+    Вычисление ETag по содержимому ответа.
+
+    Используется для страниц списка задач: ETag меняется вместе с любой
+    задачей страницы и не требует запросов к остальной таблице. Last-Modified
+    для страниц не выдается, так как удаление задачи со страницы не
+    увеличивает время последнего изменения оставшихся задач.
+
+    Args:
+        response: Ответ Flask с готовым телом.
+
+    Returns:
+        str: Значение ETag без кавычек.
+    """
+    return hashlib.sha1(response.get_data()).hexdigest()[:20]
+
+
+def make_conditional(response, etag, last_modified, weak=False):
+    """
+    Установка ETag и Last-Modified и обработка условного GET.
+
+    Args:
+        response: Ответ Flask.
+        etag: Значение ETag без кавычек.
+        last_modified: Время последнего изменения или None.
+        weak: Выдать слабый ETag.
+
+    Returns:
+        response: Исходный ответ или ответ 304 Not Modified.
+    """
+    response.set_etag(etag, weak=weak)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response.make_conditional(request)
+
+
+def if_match_condition(id, if_match=None):
+    """
+    Построение условия оптимистичной блокировки по заголовку If-Match.
+
+    Версия задачи извлекается из ETag, поэтому проверка выполняется в том же
+    запросе UPDATE/DELETE, без предварительного чтения задачи. Как требует
+    RFC 9110, учитываются только сильные ETag.
+
+    Args:
+        id: ID изменяемой задачи.
+        if_match: Разобранный заголовок If-Match (ETags); по умолчанию
+            берется из текущего запроса Flask.
+
+    Returns:
+        Условие SQLAlchemy, None при отсутствии заголовка или false(),
+        если ни один ETag не относится к задаче.
+    """
+    if if_match is None:
+        if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    versions = []
+    for tag in if_match.as_set():
+        # ETag сжатого ответа содержит суффикс кодировки
+        task_id, _, version = strip_encoding(tag).partition("-")
+        if task_id == str(id) and version.isdigit():
+            versions.append(int(version))
+    return Task.version.in_(versions) if versions else db.false()
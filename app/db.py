@@ -1,5 +1,36 @@
+from contextvars import ContextVar
+
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_migrate import Migrate
+from sqlalchemy.sql.dml import UpdateBase
+
+# Движок сегмента хранилища задач, в который направляются запросы сессии
+# (устанавливается через task_shards.use)
+current_shard_engine = ContextVar("current_shard_engine", default=None)
+
+# Движок реплики, в который направляются запросы чтения сессии
+# (устанавливается через read_replicas.use)
+current_read_engine = ContextVar("current_read_engine", default=None)
+
+
+class RoutingSession(Session):
+    # Сессия, направляющая запросы в выбранный сегмент хранилища задач, а
+    # запросы чтения - в выбранную реплику
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            engine = current_shard_engine.get()
+            if engine is not None:
+                return engine
+            engine = current_read_engine.get()
+            # INSERT, UPDATE, DELETE и запись изменений сессии идут в основную базу
+            if engine is not None and not (
+                self._flushing or isinstance(clause, UpdateBase)
+            ):
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
@@ -1,27 +1,44 @@
-from apispec import APISpec
-from apispec.ext.marshmallow import MarshmallowPlugin
-from apispec_webframeworks.flask import FlaskPlugin
+import gzip
+import hashlib
+import os
+import threading
+
 from flask_swagger_ui import get_swaggerui_blueprint
 
-from app.schemas import TaskSchema, TaskCreateSchema, TaskUpdateSchema
+from app.schemas import (
+    TaskSchema,
+    TaskCreateSchema,
+    TaskUpdateSchema,
+    TaskBulkUpdateSchema,
+)
 
 # Определение URL для Swagger UI
 SWAGGER_URL = "/docs"
 API_URL = "/swagger.json"
 
+# Блокировка для защиты от параллельной сборки спецификации
+_spec_lock = threading.Lock()
+
 # Создание blueprint для Swagger UI
 swagger_ui_blueprint = get_swaggerui_blueprint(
     SWAGGER_URL, API_URL, config={"app_name": "Task API"}
 )
 
+
 # Функция для создания тегов в спецификации Swagger
 def create_tags(spec):
     tags = [{"name": "Task manager", "description": "Управление задачами"}]
     for tag in tags:
         spec.tag(tag)
 
-# Функция для получения экземпляра APISpec
+
+# Функция для получения экземпляра APISpec. Модули apispec импортируются при
+# первой сборке спецификации, а не при старте приложения
 def get_apispec(app):
+    from apispec import APISpec
+    from apispec.ext.marshmallow import MarshmallowPlugin
+    from apispec_webframeworks.flask import FlaskPlugin
+
     spec = APISpec(
         title="Task manager API",
         version="1.0.0",
@@ -33,6 +50,7 @@ def get_apispec(app):
     spec.components.schema("TaskSchema", schema=TaskSchema)
     spec.components.schema("TaskCreateSchema", schema=TaskCreateSchema)
     spec.components.schema("TaskUpdateSchema", schema=TaskUpdateSchema)
+    spec.components.schema("TaskBulkUpdateSchema", schema=TaskBulkUpdateSchema)
 
     # Создание тегов
     create_tags(spec)
@@ -42,6 +60,7 @@ def get_apispec(app):
 
     return spec
 
+
 # Функция для загрузки документации из docstrings
 def load_docstrings(spec, app):
     for fn_name in app.view_functions:
@@ -49,3 +68,46 @@ def load_docstrings(spec, app):
             continue
         view_fn = app.view_functions[fn_name]
         spec.path(view=view_fn)
+
+
+# Сериализованная спецификация API, готовая к отдаче клиенту
+class SerializedSpec:
+    def __init__(self, body):
+        self.body = body  # Спецификация в формате JSON (bytes)
+        self.gzipped = gzip.compress(body, mtime=0)  # Сжатая копия для gzip
+        self.etag = hashlib.sha256(body).hexdigest()[:32]  # ETag по содержимому
+
+
+# Функция для сериализации спецификации API в JSON
+def dump_apispec(app):
+    return app.json.dumps(get_apispec(app).to_dict()).encode()
+
+
+# Функция для получения кэшированной спецификации API. Спецификация строится
+# один раз на приложение: при старте (API_SPEC_PRELOAD), из заранее
+# сгенерированного файла (API_SPEC_FILE) или при первом запросе
+def get_serialized_spec(app):
+    spec = app.extensions.get("apispec")
+    if spec is None:
+        with _spec_lock:
+            spec = app.extensions.get("apispec")
+            if spec is None:
+                spec_file = app.config.get("API_SPEC_FILE")
+                if spec_file and os.path.exists(spec_file):
+                    with open(spec_file, "rb") as f:
+                        body = f.read()
+                else:
+                    body = dump_apispec(app)
+                spec = app.extensions["apispec"] = SerializedSpec(body)
+    return spec
+
+
+# Функция для записи спецификации API в статический файл
+def export_apispec(app, path):
+    body = dump_apispec(app)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(body)
+    return len(body)
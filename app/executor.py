@@ -0,0 +1,609 @@
+import copy
+import logging
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.exc import OperationalError
+from werkzeug.utils import import_string
+
+from .cache import task_cache
+from .db import db
+from .metrics import Histogram
+from .models import MAX_PRIORITY, Task
+from .serializers import dump_task
+from .sharding import task_shards
+
+# Пулы исполнителей: потоки (задачи с вводом-выводом) или процессы (задачи,
+# нагружающие процессор)
+POOL_KINDS = ("thread", "process")
+
+# Границы корзин гистограммы задержки запуска задач в секундах
+LAG_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+logger = logging.getLogger(__name__)
+
+
+def utcnow():
+    # Текущее время в UTC без часового пояса, как оно хранится в базе
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def log_task(payload):
+    """
+    Обработчик задач по умолчанию: запись задачи в журнал.
+
+    Args:
+        payload: Сериализованная задача.
+    """
+    logger.info("Executing task %s: %s", payload["id"], payload["title"])
+
+
+def run_handler(handler, payload):
+    """
+    Выполнение обработчика задачи в потоке или дочернем процессе пула.
+
+    Args:
+        handler: Путь импорта обработчика в формате module:function.
+        payload: Сериализованная задача.
+
+    Returns:
+        float: Время выполнения в секундах.
+    """
+    started = time.perf_counter()
+    import_string(handler)(payload)
+    return time.perf_counter() - started
+
+
+def retry_delay(attempts, base, maximum):
+    """
+    Задержка перед повторной попыткой: экспоненциальный рост со случайным
+    разбросом, чтобы одновременно упавшие задачи не повторялись разом.
+
+    Args:
+        attempts: Количество выполненных попыток.
+        base: Задержка после первой попытки в секундах.
+        maximum: Наибольшая задержка в секундах.
+
+    Returns:
+        float: Задержка в секундах.
+    """
+    delay = min(maximum, base * 2 ** (attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def claim_tasks(limit, lease, owner):
+    """
+    Захват готовых к запуску задач в порядке приоритета и времени запуска.
+
+    Для каждого уровня приоритета выполняется выборка по индексу
+    ix_task_claim (status, priority, scheduled_at) с ограничением LIMIT,
+    поэтому стоимость захвата зависит от размера пачки и числа уровней
+    приоритета, а не от размера таблицы. В MySQL и PostgreSQL строки
+    блокируются через FOR UPDATE SKIP LOCKED, и исполнители не ждут друг
+    друга. SQLite не поддерживает блокировку строк: захват выполняется
+    условным UPDATE ... RETURNING, и задача достается только одному
+    исполнителю.
+
+    Args:
+        limit: Максимальное количество задач.
+        lease: Срок аренды задачи исполнителем в секундах.
+        owner: Идентификатор исполнителя, арендующего задачи.
+
+    Returns:
+        list: Пары (сериализованная задача, задержка запуска в секундах).
+    """
+    now = utcnow()
+    skip_locked = db.session.get_bind().dialect.name != "sqlite"
+    tasks = []
+    for priority in range(MAX_PRIORITY, -1, -1):
+        if len(tasks) == limit:
+            break
+        query = (
+            db.select(Task)
+            .where(
+                Task.status == "pending",
+                Task.priority == priority,
+                Task.scheduled_at <= now,
+            )
+            .order_by(Task.scheduled_at, Task.id)
+            .limit(limit - len(tasks))
+        )
+        if skip_locked:
+            query = query.with_for_update(skip_locked=True)
+        tasks += db.session.execute(query).scalars().all()
+    if not tasks:
+        db.session.rollback()
+        return []
+
+    claimed = [
+        (dump_task(task), (now - task.scheduled_at).total_seconds()) for task in tasks
+    ]
+    ids = [task.id for task in tasks]
+    update = (
+        db.update(Task)
+        .where(Task.id.in_(ids), Task.status == "pending")
+        .values(
+            status="running",
+            scheduled_at=now + timedelta(seconds=lease),
+            attempts=Task.attempts + 1,
+            lease_owner=owner,
+            version=Task.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if skip_locked:
+        db.session.execute(update)  # Строки уже заблокированы этой транзакцией
+    else:
+        won = set(db.session.execute(update.returning(Task.id)).scalars())
+        claimed = [item for item in claimed if item[0]["id"] in won]
+    db.session.commit()
+    for payload, _ in claimed:
+        payload["status"] = "running"
+        payload["attempts"] += 1
+        payload["version"] += 1
+        task_cache.delete(payload["id"])  # Состояние задачи в кэше устарело
+    return claimed
+
+
+def extend_leases(ids, lease, owner):
+    """
+    Продление аренды выполняющихся задач, чтобы их не захватил другой
+    исполнитель.
+
+    Продление не считается изменением задачи: время обновления и версия
+    задачи не меняются.
+
+    Args:
+        ids: id задач, выполняющихся в этом процессе.
+        lease: Срок аренды в секундах.
+        owner: Идентификатор исполнителя, арендовавшего задачи.
+    """
+    if ids:
+        db.session.execute(
+            db.update(Task)
+            .where(
+                Task.id.in_(ids), Task.status == "running", Task.lease_owner == owner
+            )
+            .values(
+                scheduled_at=utcnow() + timedelta(seconds=lease),
+                updated_at=Task.updated_at,  # Без onupdate
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+
+def reclaim_expired(max_attempts):
+    """
+    Возврат в очередь задач, аренда которых истекла (исполнитель остановлен
+    аварийно). Задачи, исчерпавшие попытки, помечаются как failed.
+
+    Args:
+        max_attempts: Максимальное количество попыток выполнения.
+
+    Returns:
+        int: Количество возвращенных задач.
+    """
+    expired = (Task.status == "running", Task.scheduled_at <= utcnow())
+    ids = db.session.execute(db.select(Task.id).where(*expired)).scalars().all()
+    if not ids:
+        db.session.rollback()
+        return 0
+    result = db.session.execute(
+        db.update(Task)
+        .where(Task.id.in_(ids), *expired)
+        .values(
+            status=db.case((Task.attempts >= max_attempts, "failed"), else_="pending"),
+            last_error="Lease expired",
+            lease_owner=None,
+            version=Task.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    for id in ids:
+        task_cache.delete(id)  # Состояние задачи в кэше устарело
+    return result.rowcount
+
+
+class TaskExecutor:
+    # Исполнитель задач: захват готовых задач и выполнение в пуле
+
+    def __init__(self, app=None):
+        self.app = None
+        self.owner = None  # Идентификатор исполнителя в аренде задач
+        self.running = False  # Исполнитель запущен в этом процессе
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self.active = 0  # Захваченные и еще не завершенные задачи
+        self.claimed = 0  # Захваченные задачи
+        self.succeeded = 0  # Успешно выполненные задачи
+        self.retried = 0  # Неудачные попытки с последующим повтором
+        self.failed = 0  # Задачи, исчерпавшие попытки
+        self.reclaimed = 0  # Задачи, возвращенные после истечения аренды
+        self.requeued = 0  # Задачи сломанного пула, возвращенные без попытки
+        # id задач, которые были в пуле вместе с задачей, завершившей дочерний
+        # процесс; они выполняются каждая в отдельном процессе
+        self._suspects = set()
+        self._isolated = set()  # Future задач, выполняемых в отдельном процессе
+        self.lag = Histogram(LAG_BUCKETS)  # Задержка запуска после scheduled_at
+        self.duration = Histogram()  # Время выполнения задачи
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Настройка исполнителя по конфигурации приложения.
+
+        Args:
+            app: Экземпляр приложения Flask.
+        """
+        app.extensions["task_executor"] = self
+        self.app = app
+        self.pool_kind = app.config["TASK_EXECUTOR_POOL"]
+        if self.pool_kind not in POOL_KINDS:
+            raise ValueError(f"Unknown TASK_EXECUTOR_POOL: {self.pool_kind}")
+        self.handler = app.config["TASK_EXECUTOR_HANDLER"]
+        self.concurrency = app.config["TASK_EXECUTOR_CONCURRENCY"]
+        self.batch_size = app.config["TASK_EXECUTOR_BATCH_SIZE"]
+        self.poll_interval = app.config["TASK_EXECUTOR_POLL_INTERVAL"]
+        self.lease = app.config["TASK_EXECUTOR_LEASE_SECONDS"]
+        self.max_attempts = app.config["TASK_EXECUTOR_MAX_ATTEMPTS"]
+        self.retry_base = app.config["TASK_EXECUTOR_RETRY_BASE"]
+        self.retry_max = app.config["TASK_EXECUTOR_RETRY_MAX"]
+        self.stats_interval = app.config["TASK_EXECUTOR_STATS_INTERVAL"]
+
+    def _make_pool(self):
+        if self.pool_kind == "process":
+            return ProcessPoolExecutor(self.concurrency)
+        return ThreadPoolExecutor(self.concurrency, thread_name_prefix="task")
+
+    def stop(self):
+        # Остановка после завершения выполняющихся задач
+        self._stopping.set()
+
+    def run(self, burst=False):
+        """
+        Цикл исполнителя: захват задач, выполнение и запись результатов.
+
+        При остановке новые задачи не захватываются, выполняющиеся задачи
+        завершаются и их результаты записываются.
+
+        Args:
+            burst: Завершить работу, когда не останется готовых задач.
+        """
+        pool = self._make_pool()
+        futures = {}  # Захваченные и еще не завершенные задачи по их Future
+        # Задачи захватываются с запасом в размер пула, чтобы исполнители не
+        # простаивали между запросами к базе
+        capacity = self.concurrency * 2
+        next_renewal = 0.0  # Время следующего продления аренды и возврата задач
+        next_report = time.monotonic() + self.stats_interval
+        reported = (0, 0, 0.0)  # Счетчики на момент последнего отчета
+        shards = task_shards.shards()  # Сегменты опрашиваются по очереди
+        # Новый идентификатор при каждом запуске: результаты задач, аренду
+        # которых исполнитель потерял, не записываются
+        self.owner = uuid.uuid4().hex
+        self.running = True
+        self._stopping.clear()
+        try:
+            while not self._stopping.is_set():
+                now = time.monotonic()
+                claimed = []
+                with self.app.app_context():
+                    try:
+                        if now >= next_renewal:
+                            # Продление с запасом: трижды за срок аренды
+                            self._renew(futures)
+                            next_renewal = now + self.lease / 3
+                        if len(futures) <= self.concurrency:
+                            limit = min(capacity - len(futures), self.batch_size)
+                            for shard in shards:
+                                if len(claimed) == limit:
+                                    break
+                                with task_shards.use(shard):
+                                    claimed += claim_tasks(
+                                        limit - len(claimed), self.lease, self.owner
+                                    )
+                            # Следующий захват начинается со следующего сегмента
+                            shards = shards[1:] + shards[:1]
+                    except OperationalError:
+                        # Блокировка базы (SQLite) или потеря соединения:
+                        # повтор на следующей итерации
+                        db.session.rollback()
+                        logger.exception("Failed to claim tasks")
+                    finally:
+                        db.session.remove()
+                for payload, _ in claimed:
+                    pool = self._submit(pool, futures, payload)
+                with self._lock:
+                    self.claimed += len(claimed)
+                    self.active = len(futures)
+                    for _, lag in claimed:
+                        self.lag.observe(lag)
+                if not futures:
+                    if burst:
+                        break
+                    self._stopping.wait(self.poll_interval)
+                    continue
+                # Пачка заполнена и есть свободные места - захват без ожидания
+                more = len(claimed) == self.batch_size and len(futures) <= (
+                    self.concurrency
+                )
+                done, _ = wait(
+                    futures,
+                    timeout=0 if more else self.poll_interval,
+                    return_when=FIRST_COMPLETED,
+                )
+                if done:
+                    pool = self._complete(pool, futures, done)
+                if time.monotonic() >= next_report:
+                    reported = self._report(reported)
+                    next_report = time.monotonic() + self.stats_interval
+            if futures:
+                done, _ = wait(futures)
+                pool = self._complete(pool, futures, done)
+        finally:
+            pool.shutdown(wait=True)
+            self.running = False
+            self.active = 0
+
+    def _renew(self, futures):
+        # Продление аренды своих задач и возврат задач с истекшей арендой
+        groups = task_shards.group(payload["id"] for payload in futures.values())
+        for shard in task_shards.shards():
+            with task_shards.use(shard):
+                extend_leases(groups.get(shard, []), self.lease, self.owner)
+                reclaimed = reclaim_expired(self.max_attempts)
+            with self._lock:
+                self.reclaimed += reclaimed
+
+    def _submit(self, pool, futures, payload):
+        # Передача задачи в пул; возвращает рабочий пул
+        if payload["id"] in self._suspects:
+            # Отдельный процесс показывает, завершает ли его сама задача;
+            # пул закрывается после выполнения единственной задачи
+            isolated = ProcessPoolExecutor(1)
+            future = isolated.submit(run_handler, self.handler, payload)
+            isolated.shutdown(wait=False)
+            self._isolated.add(future)
+            futures[future] = payload
+            return pool
+        try:
+            futures[pool.submit(run_handler, self.handler, payload)] = payload
+        except BrokenProcessPool:
+            # Пул сломался после записи последних результатов: задачи старого
+            # пула завершаются ошибкой, задача передается в новый пул
+            done, _ = wait(futures)
+            pool = self._complete(pool, futures, done, broken=True)
+            futures[pool.submit(run_handler, self.handler, payload)] = payload
+        return pool
+
+    def _complete(self, pool, futures, done, broken=False):
+        # Запись результатов завершенных задач; возвращает рабочий пул.
+        # broken - пул уже не принимает задачи и должен быть пересоздан
+        succeeded = []
+        retries = []
+        failures = []
+        crashed = []  # Задачи, выполнявшиеся в пуле при его поломке
+        done = list(done)
+        while done:
+            future = done.pop()
+            payload = futures.pop(future)
+            isolated = future in self._isolated
+            self._isolated.discard(future)
+            try:
+                elapsed = future.result()
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool) and not isolated:
+                    if not broken:
+                        # Дочерний процесс пула завершился аварийно: остальные
+                        # задачи пула завершатся той же ошибкой. Их результаты
+                        # записываются сейчас, чтобы ошибки старого пула не
+                        # привели к пересозданию нового
+                        broken = True
+                        done = list(wait(futures)[0])
+                    crashed.append((payload, e))
+                    continue
+                if not isolated or not isinstance(e, BrokenProcessPool):
+                    self._suspects.discard(payload["id"])
+                self._add_failure(payload, e, retries, failures)
+                continue
+            self._suspects.discard(payload["id"])
+            succeeded.append(payload["id"])
+            with self._lock:
+                self.duration.observe(elapsed)
+
+        requeued = []
+        if len(crashed) == 1:
+            # В пуле выполнялась одна задача - она и завершила процесс
+            self._add_failure(*crashed[0], retries, failures)
+        else:
+            # Задачу, завершившую процесс, определить нельзя: попытка не
+            # засчитывается, и каждая задача повторяется в отдельном процессе
+            for payload, e in crashed:
+                self._suspects.add(payload["id"])
+                requeued.append(
+                    {"task_id": payload["id"], "last_error": f"{type(e).__name__}: {e}"}
+                )
+        # Задачи, исчерпавшие попытки, больше не запускаются
+        self._suspects.difference_update(row["task_id"] for row in failures)
+
+        with self.app.app_context():
+            try:
+                # Результаты записываются отдельной транзакцией в каждом сегменте
+                for shard, ids in task_shards.group(
+                    succeeded
+                    + [row["task_id"] for row in retries + failures + requeued]
+                ).items():
+                    ids = set(ids)
+                    with task_shards.use(shard):
+                        self._save_results(
+                            [id for id in succeeded if id in ids],
+                            [row for row in retries if row["task_id"] in ids],
+                            [row for row in failures if row["task_id"] in ids],
+                            [row for row in requeued if row["task_id"] in ids],
+                        )
+            except Exception:
+                # Задачи останутся в состоянии running и вернутся в очередь
+                # после истечения аренды
+                db.session.rollback()
+                logger.exception(
+                    "Failed to save results of %d tasks",
+                    len(succeeded) + len(retries) + len(failures) + len(requeued),
+                )
+            finally:
+                db.session.remove()
+        with self._lock:
+            self.succeeded += len(succeeded)
+            self.retried += len(retries)
+            self.failed += len(failures)
+            self.requeued += len(requeued)
+            self.active = len(futures)
+        if broken:
+            logger.error("Task pool is broken, restarting")
+            pool.shutdown(wait=False)
+            return self._make_pool()
+        return pool
+
+    def _add_failure(self, payload, e, retries, failures):
+        # Учет неудачной попытки: повтор с задержкой или ошибка, если попытки
+        # исчерпаны
+        error = f"{type(e).__name__}: {e}"
+        logger.warning("Task %s failed: %s", payload["id"], error)
+        row = {"task_id": payload["id"], "last_error": error}
+        if payload["attempts"] >= self.max_attempts:
+            failures.append(row)
+        else:
+            delay = retry_delay(payload["attempts"], self.retry_base, self.retry_max)
+            row["scheduled_at"] = utcnow() + timedelta(seconds=delay)
+            retries.append(row)
+
+    def _save_results(self, succeeded, retries, failures, requeued):
+        # Результаты записываются только для задач, которые все еще
+        # выполняются этим исполнителем (аренда не истекла и задачу не
+        # захватил другой исполнитель)
+        table = Task.__table__
+        running = db.and_(
+            table.c.status == "running", table.c.lease_owner == self.owner
+        )
+        if succeeded:
+            db.session.execute(
+                db.update(Task)
+                .where(Task.id.in_(succeeded), running)
+                .values(
+                    status="succeeded",
+                    last_error=None,
+                    lease_owner=None,
+                    version=Task.version + 1,
+                )
+                .execution_options(synchronize_session=False)
+            )
+        if retries:
+            db.session.execute(
+                table.update()
+                .where(table.c.id == db.bindparam("task_id"), running)
+                .values(
+                    status="pending",
+                    scheduled_at=db.bindparam("scheduled_at"),
+                    last_error=db.bindparam("last_error"),
+                    lease_owner=None,
+                    version=table.c.version + 1,
+                ),
+                retries,
+            )
+        if failures:
+            db.session.execute(
+                table.update()
+                .where(table.c.id == db.bindparam("task_id"), running)
+                .values(
+                    status="failed",
+                    last_error=db.bindparam("last_error"),
+                    lease_owner=None,
+                    version=table.c.version + 1,
+                ),
+                failures,
+            )
+        if requeued:
+            # Возврат в очередь без учета попытки, засчитанной при захвате
+            db.session.execute(
+                table.update()
+                .where(table.c.id == db.bindparam("task_id"), running)
+                .values(
+                    status="pending",
+                    scheduled_at=utcnow(),
+                    attempts=table.c.attempts - 1,
+                    last_error=db.bindparam("last_error"),
+                    lease_owner=None,
+                    version=table.c.version + 1,
+                ),
+                requeued,
+            )
+        db.session.commit()
+        for id in succeeded + [row["task_id"] for row in retries + failures + requeued]:
+            task_cache.delete(id)  # Состояние задачи в кэше устарело
+
+    def _report(self, reported):
+        # Запись в журнал пропускной способности и задержки запуска за период
+        with self._lock:
+            current = (
+                self.succeeded + self.failed + self.retried,
+                self.lag.count,
+                self.lag.sum,
+            )
+            active = self.active
+        finished, started, lag = (a - b for a, b in zip(current, reported))
+        logger.info(
+            "Executed %d tasks (%.1f/s), mean queue lag %.2f s, %d running",
+            finished,
+            finished / self.stats_interval,
+            lag / started if started else 0.0,
+            active,
+        )
+        return current
+
+    def histograms(self):
+        """
+        Получение копий гистограмм исполнителя.
+
+        Returns:
+            dict: Задержка запуска задач после scheduled_at и время выполнения.
+        """
+        with self._lock:
+            return {
+                "queue_lag_seconds": copy.deepcopy(self.lag),
+                "duration_seconds": copy.deepcopy(self.duration),
+            }
+
+    def stats(self):
+        """
+        Получение счетчиков исполнителя.
+
+        Returns:
+            dict: Количество выполняющихся, захваченных, выполненных,
+                повторенных, завершившихся ошибкой, возвращенных после
+                истечения аренды и возвращенных без попытки задач.
+        """
+        with self._lock:
+            return {
+                "active": self.active,
+                "claimed": self.claimed,
+                "succeeded": self.succeeded,
+                "retried": self.retried,
+                "failed": self.failed,
+                "reclaimed": self.reclaimed,
+                "requeued": self.requeued,
+            }
+
+
+task_executor = TaskExecutor()
@@ -0,0 +1,92 @@
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime, time
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Быстрый кодировщик не обязателен
+    orjson = None
+
+
+def default(value):
+    """
+    Преобразование типов, которые не поддерживает кодировщик JSON.
+
+    В отличие от провайдера Flask по умолчанию (формат HTTP-даты), время
+    выдается в ISO 8601, так же как поля created_at и updated_at в TaskSchema.
+
+    Args:
+        value: Значение для сериализации.
+
+    Returns:
+        Значение, которое может быть закодировано в JSON.
+
+    Raises:
+        TypeError: Если тип значения не поддерживается.
+    """
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, "__html__"):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    # Провайдер JSON с кодированием через orjson, если он установлен
+
+    default = staticmethod(default)
+    ensure_ascii = False  # UTF-8 без экранирования, как в выводе orjson
+    sort_keys = True
+
+    def __init__(self, app):
+        super().__init__(app)
+        # Кодировщик выбирается по конфигурации и наличию пакета orjson
+        self.fast = orjson is not None and app.config["JSON_FAST_ENCODER"]
+        self.options = 0
+        if self.fast:
+            self.options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+
+    def dumps_bytes(self, obj, indent=False):
+        """
+        Кодирование значения в JSON (UTF-8).
+
+        Args:
+            obj: Значение для сериализации.
+            indent: Форматирование с отступами.
+
+        Returns:
+            bytes: Закодированный JSON.
+        """
+        if not self.fast:
+            if indent:
+                return self.dumps(obj, indent=2).encode()
+            return self.dumps(obj, separators=(",", ":")).encode()
+        options = self.options | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=self.default, option=options)
+
+    def dumps(self, obj, **kwargs):
+        # orjson поддерживает только компактный вывод и отступ в 2 пробела
+        if self.fast and kwargs in ({}, {"separators": (",", ":")}, {"indent": 2}):
+            return self.dumps_bytes(obj, indent="indent" in kwargs).decode()
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.fast and not kwargs:
+            return orjson.loads(s)  # Ошибка разбора - подкласс json.JSONDecodeError
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        # Ответ формируется из байтов без промежуточной строки
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self.dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype
+        )
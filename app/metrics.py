@@ -0,0 +1,291 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from .admission import admission_control
+from .cache import task_cache
+from .db import db
+from .pool import pool_metrics
+from .replicas import read_replicas
+from .write_behind import task_write_behind
+
+# Границы корзин гистограммы времени ответа в секундах
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Окончания имен монотонно растущих счетчиков кэша и пула соединений
+COUNTER_SUFFIXES = {
+    "hits",
+    "misses",
+    "evictions",
+    "connects",
+    "invalidations",
+    "checkouts",
+    "total",
+    "timeouts",
+    "enqueued",
+    "rejected",
+    "written",
+    "batches",
+    "failed",
+    "claimed",
+    "succeeded",
+    "retried",
+    "reclaimed",
+    "requeued",
+}
+
+# Описания гистограмм исполнителя задач
+EXECUTOR_HISTOGRAMS = {
+    "queue_lag_seconds": "Delay between scheduled_at and task start.",
+    "duration_seconds": "Task handler execution time.",
+}
+
+
+class Histogram:
+    # Гистограмма с накопительными корзинами, как в формате Prometheus
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets  # Верхние границы корзин
+        self.counts = [0] * (len(buckets) + 1)  # Последняя корзина - +Inf
+        self.sum = 0.0  # Сумма наблюдений
+        self.count = 0  # Количество наблюдений
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        # Пары (граница, количество наблюдений не больше границы)
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+
+def format_labels(labels):
+    # Формирование набора меток в формате {name="value",...}
+    items = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        items.append(f'{name}="{value}"')
+    return "{" + ",".join(items) + "}" if items else ""
+
+
+def format_bound(value):
+    # Граница корзины в формате Prometheus
+    return "+Inf" if value == float("inf") else repr(value)
+
+
+def histogram_lines(name, histogram, labels=None):
+    # Строки корзин, суммы и количества наблюдений гистограммы
+    labels = labels or {}
+    lines = []
+    for bound, total in histogram.cumulative():
+        bucket = format_labels(dict(labels, le=format_bound(bound)))
+        lines.append(f"{name}_bucket{bucket} {total}")
+    lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+    lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+    return lines
+
+
+class RequestMetrics:
+    # Замер времени обработки запросов и запросов к базе данных по эндпоинтам
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.latency = defaultdict(Histogram)  # Время ответа по эндпоинтам
+        self.responses = Counter()  # Количество ответов по эндпоинту и коду
+        self.queries = Counter()  # Количество SQL-запросов по эндпоинтам
+        self.query_seconds = Counter()  # Время SQL-запросов по эндпоинтам
+        self.slow_queries = Counter()  # Медленные SQL-запросы по эндпоинтам
+        self.n_plus_one = Counter()  # Запросы с признаками N+1 по эндпоинтам
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Подключение обработчиков запроса, событий движка и эндпоинта /metrics.
+
+        Args:
+            app: Экземпляр приложения Flask.
+        """
+        app.extensions["request_metrics"] = self
+        if not app.config["METRICS_ENABLED"]:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule("/metrics", "metrics", self.metrics_view)
+        if not app.config.get("SQLALCHEMY_DATABASE_URI"):
+            return
+        with app.app_context():
+            # Основная база и сегменты хранилища задач (SQLALCHEMY_BINDS)
+            for engine in db.engines.values():
+                event.listen(
+                    engine, "before_cursor_execute", self._before_cursor_execute
+                )
+                event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = 0  # Количество SQL-запросов в текущем запросе
+        g.metrics_query_seconds = 0.0  # Время SQL-запросов в текущем запросе
+        g.metrics_statements = Counter()  # Повторы одинаковых SQL-запросов
+
+    def _before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+        # Запросы вне обработки HTTP-запроса (CLI, прогрев пула) не учитываются
+        if not has_request_context() or "metrics_started" not in g:
+            return
+        g.metrics_queries += 1
+        g.metrics_query_seconds += elapsed
+        g.metrics_statements[statement] += 1
+        if elapsed * 1000 >= current_app.config["METRICS_SLOW_QUERY_MS"]:
+            with self._lock:
+                self.slow_queries[request.endpoint] += 1
+            current_app.logger.warning(
+                "Slow query in %s (%.1f ms): %s",
+                request.endpoint,
+                elapsed * 1000,
+                statement,
+            )
+
+    def _after_request(self, response):
+        if "metrics_started" not in g:
+            return response  # before_request не вызывался (ошибка маршрутизации)
+        elapsed = time.perf_counter() - g.metrics_started
+        endpoint = request.endpoint or "unmatched"
+        statement, repeats = next(iter(g.metrics_statements.most_common(1)), (None, 0))
+        # Один и тот же запрос, повторенный много раз за запрос, - признак N+1
+        n_plus_one = repeats >= current_app.config["METRICS_N_PLUS_ONE_THRESHOLD"]
+        with self._lock:
+            self.latency[endpoint].observe(elapsed)
+            self.responses[endpoint, response.status_code] += 1
+            self.queries[endpoint] += g.metrics_queries
+            self.query_seconds[endpoint] += g.metrics_query_seconds
+            if n_plus_one:
+                self.n_plus_one[endpoint] += 1
+        if n_plus_one:
+            current_app.logger.warning(
+                "Possible N+1 in %s: query repeated %d times: %s",
+                endpoint,
+                repeats,
+                statement,
+            )
+        # Время обработки и работы с базой для инструментов разработчика браузера
+        response.headers.add(
+            "Server-Timing",
+            f"app;dur={elapsed * 1000:.2f}, "
+            f"db;dur={g.metrics_query_seconds * 1000:.2f};"
+            f'desc="{g.metrics_queries} queries"',
+        )
+        return response
+
+    def render(self):
+        """
+        Формирование метрик в текстовом формате Prometheus.
+
+        Returns:
+            str: Метрики запросов, SQL, кэша задач и пула соединений.
+        """
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by endpoint.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            for endpoint, histogram in sorted(self.latency.items()):
+                lines += histogram_lines(
+                    "http_request_duration_seconds", histogram, {"endpoint": endpoint}
+                )
+            lines += [
+                "# HELP http_responses_total Responses by endpoint and status code.",
+                "# TYPE http_responses_total counter",
+            ]
+            for (endpoint, status), count in sorted(self.responses.items()):
+                labels = format_labels({"endpoint": endpoint, "status": status})
+                lines.append(f"http_responses_total{labels} {count}")
+            for name, kind, description, values in (
+                ("db_queries_total", "counter", "SQL statements", self.queries),
+                (
+                    "db_query_duration_seconds_total",
+                    "counter",
+                    "Time spent in SQL statements",
+                    self.query_seconds,
+                ),
+                (
+                    "db_slow_queries_total",
+                    "counter",
+                    "SQL statements slower than METRICS_SLOW_QUERY_MS",
+                    self.slow_queries,
+                ),
+                (
+                    "db_n_plus_one_requests_total",
+                    "counter",
+                    "Requests repeating one SQL statement too many times",
+                    self.n_plus_one,
+                ),
+            ):
+                lines += [
+                    f"# HELP {name} {description} by endpoint.",
+                    f"# TYPE {name} {kind}",
+                ]
+                for endpoint, value in sorted(values.items()):
+                    labels = format_labels({"endpoint": endpoint})
+                    lines.append(f"{name}{labels} {value}")
+
+        # Счетчики кэша задач и пула соединений собираются их расширениями
+        stats = {f"task_cache_{k}": v for k, v in task_cache.stats().items()}
+        if current_app.config.get("SQLALCHEMY_DATABASE_URI"):
+            stats.update({f"db_pool_{k}": v for k, v in pool_metrics.stats().items()})
+        stats.update(
+            {f"http_admission_{k}": v for k, v in admission_control.stats().items()}
+        )
+        if read_replicas.enabled:
+            stats.update(
+                {f"db_replica_{k}": v for k, v in read_replicas.stats().items()}
+            )
+        if task_write_behind.enabled:
+            stats.update(
+                {
+                    f"task_write_behind_{k}": v
+                    for k, v in task_write_behind.stats().items()
+                }
+            )
+        # Исполнитель задач, запущенный в этом процессе (flask run-worker)
+        executor = current_app.extensions.get("task_executor")
+        if executor is not None and executor.running:
+            stats.update({f"task_executor_{k}": v for k, v in executor.stats().items()})
+        for name, value in stats.items():
+            kind = "counter" if name.rsplit("_", 1)[-1] in COUNTER_SUFFIXES else "gauge"
+            lines += [f"# TYPE {name} {kind}", f"{name} {value}"]
+        if executor is not None and executor.running:
+            for name, histogram in executor.histograms().items():
+                lines += [
+                    f"# HELP task_executor_{name} {EXECUTOR_HISTOGRAMS[name]}",
+                    f"# TYPE task_executor_{name} histogram",
+                ]
+                lines += histogram_lines(f"task_executor_{name}", histogram)
+        return "\n".join(lines) + "\n"
+
+    def metrics_view(self):
+        """
+        Выдача метрик приложения.
+
+        Returns:
+            response: Метрики в текстовом формате Prometheus.
+        """
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+
+request_metrics = RequestMetrics()
@@ -1,20 +1,78 @@
 from .db import db
 from datetime import datetime, timezone
 
+# Состояния выполнения задачи: ожидает запуска, выполняется, выполнена успешно,
+# завершилась ошибкой после всех попыток
+TASK_STATUSES = ("pending", "running", "succeeded", "failed")
+
+# Наибольший приоритет задачи; задачи с большим приоритетом запускаются первыми
+MAX_PRIORITY = 9
+
+# Тип id задачи: 64-битное целое (id сегментированного хранилища занимают
+# 53 бита); в SQLite - INTEGER, чтобы первичный ключ оставался rowid
+TaskId = db.BigInteger().with_variant(db.Integer, "sqlite")
+
 
 class Task(db.Model):
     # Модель для таблицы задач в базе данных
-    id = db.Column(db.Integer, primary_key=True)  # Поле id задачи
+    id = db.Column(TaskId, primary_key=True)  # Поле id задачи
     title = db.Column(
-        db.String(128), nullable=False
-    )  # Поле названия задачи, не может быть пустым
+        db.String(128), nullable=False, index=True
+    )  # Поле названия задачи, не может быть пустым, с индексом для поиска по префиксу
     description = db.Column(db.String(256))  # Поле описания задачи
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = db.Column(
+        db.DateTime, default=lambda: datetime.now(timezone.utc), index=True
+    )
     # Поле времени создания задачи, по умолчанию текущее время в формате UTC
     updated_at = db.Column(
         db.DateTime,
+        index=True,  # Индекс для фильтрации и сортировки по времени обновления
         default=None,  # Поле времени обновления задачи, изначально None
         onupdate=lambda: datetime.now(
             timezone.utc
         ),  # При обновлении устанавливается текущее время в формате UTC
     )
+    status = db.Column(
+        db.String(16), nullable=False, default="pending", server_default="pending"
+    )  # Состояние выполнения задачи (TASK_STATUSES)
+    priority = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )  # Приоритет задачи от 0 до MAX_PRIORITY
+    scheduled_at = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    # Время, не раньше которого задача должна быть запущена; у выполняющейся
+    # задачи - время истечения аренды исполнителем, у завершенной - последней
+    # аренды
+    attempts = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )  # Количество начатых попыток выполнения
+    last_error = db.Column(db.Text)  # Ошибка последней неудачной попытки
+    lease_owner = db.Column(
+        db.String(32)
+    )  # Исполнитель, арендовавший выполняющуюся задачу (TaskExecutor.owner)
+    version = db.Column(
+        db.Integer, nullable=False, server_default="1"
+    )  # Номер версии задачи, увеличивается при каждом изменении (ETag, If-Match)
+
+    __table_args__ = (
+        # Индекс по времени последнего изменения для ленты изменений
+        db.Index("ix_task_changed_at", db.func.coalesce(updated_at, created_at)),
+        # Индекс для выборки готовых к запуску задач: состояние и приоритет -
+        # равенство, время запуска - диапазон и порядок выборки
+        db.Index("ix_task_claim", status, priority, scheduled_at),
+    )
+    # Изменения через ORM увеличивают версию и проверяют, что задача не
+    # изменилась с момента чтения; запросы UPDATE увеличивают ее явно
+    __mapper_args__ = {"version_id_col": version}
+
+
+class TaskTombstone(db.Model):
+    # Модель для таблицы записей об удаленных задачах (лента изменений)
+    __table_args__ = {"sqlite_autoincrement": True}  # id не переиспользуются
+
+    id = db.Column(db.Integer, primary_key=True)  # Порядковый номер удаления
+    task_id = db.Column(TaskId, nullable=False)  # id удаленной задачи
+    deleted_at = db.Column(
+        db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
+    )  # Время удаления задачи в формате UTC
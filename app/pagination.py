@@ -0,0 +1,404 @@
+import base64
+import binascii
+import heapq
+import itertools
+from datetime import datetime, timezone
+from operator import attrgetter
+
+from flask import current_app, json
+
+from .db import db
+from .models import TASK_STATUSES, Task
+from .schemas import TaskSchema
+from .serializers import compile_dumper
+from .sharding import task_shards
+
+# Поля, по которым разрешена сортировка списка задач
+SORT_KEYS = ("id", "title", "created_at", "updated_at")
+
+# Поля, которые можно запросить через параметр fields
+FIELDS = tuple(TaskSchema().dump_fields)
+
+# Фильтры по диапазонам дат: параметр запроса, колонка и оператор сравнения
+DATE_FILTERS = {
+    "created_after": ("created_at", "__ge__"),
+    "created_before": ("created_at", "__lt__"),
+    "updated_after": ("updated_at", "__ge__"),
+    "updated_before": ("updated_at", "__lt__"),
+}
+
+
+class QueryParamError(ValueError):
+    # Исключение для некорректного курсора или параметров выдачи списка
+    pass
+
+
+def encode_cursor(values):
+    """
+    Кодирование позиции в списке задач в непрозрачный курсор.
+
+    Args:
+        values: Словарь со значениями ключа сортировки последней выданной задачи.
+
+    Returns:
+        str: Курсор в формате base64 (URL-safe).
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Декодирование курсора, полученного от клиента.
+
+    Args:
+        cursor: Строка курсора из параметра запроса.
+
+    Returns:
+        dict: Значения ключа сортировки, после которых нужно продолжить выдачу.
+
+    Raises:
+        QueryParamError: Если курсор поврежден или имеет неверный формат.
+    """
+    # Восстановление выравнивания base64, отброшенного при кодировании
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError) as e:
+        raise QueryParamError("Invalid cursor") from e
+    if not isinstance(values, dict) or not isinstance(values.get("id"), int):
+        raise QueryParamError("Invalid cursor")
+    return values
+
+
+def get_limit(args, config):
+    """
+    Получение размера страницы из параметров запроса.
+
+    Args:
+        args: Параметры строки запроса.
+        config: Конфигурация приложения.
+
+    Returns:
+        int: Размер страницы, ограниченный TASKS_MAX_PAGE_SIZE.
+
+    Raises:
+        QueryParamError: Если limit не является положительным целым числом.
+    """
+    limit = args.get("limit", config["TASKS_PAGE_SIZE"])
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError) as e:
+        raise QueryParamError("limit must be an integer") from e
+    if limit < 1:
+        raise QueryParamError("limit must be positive")
+    return min(limit, config["TASKS_MAX_PAGE_SIZE"])
+
+
+def parse_datetime(value, name):
+    """
+    Разбор времени из параметра запроса в формате ISO 8601.
+
+    Args:
+        value: Строка со временем.
+        name: Имя параметра для сообщения об ошибке.
+
+    Returns:
+        datetime: Время в UTC без часового пояса, как оно хранится в базе.
+
+    Raises:
+        QueryParamError: Если строка не является временем в формате ISO 8601.
+    """
+    try:
+        value = datetime.fromisoformat(value)
+    except (TypeError, ValueError) as e:
+        raise QueryParamError(f"{name} must be an ISO 8601 datetime") from e
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def escape_like(value):
+    # Экранирование спецсимволов шаблона LIKE
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class TaskListQuery:
+    # Параметры выдачи списка задач: фильтры, сортировка, набор полей и курсор
+
+    def __init__(self, sort="id", descending=False, fields=None, filters=()):
+        self.sort = sort  # Поле сортировки
+        self.descending = descending  # Сортировка по убыванию
+        self.fields = fields  # Кортеж запрошенных полей или None для всех полей
+        self.filters = list(filters)  # Условия отбора задач
+        self.cursor = None  # Позиция, после которой продолжается выдача
+
+    @classmethod
+    def from_args(cls, args):
+        """
+        Разбор параметров выдачи списка задач из строки запроса.
+
+        Args:
+            args: Параметры строки запроса.
+
+        Returns:
+            TaskListQuery: Параметры выдачи.
+
+        Raises:
+            QueryParamError: Если параметры заданы неверно.
+        """
+        sort = args.get("sort", "id")
+        if sort not in SORT_KEYS:
+            raise QueryParamError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+        order = args.get("order", "asc")
+        if order not in ("asc", "desc"):
+            raise QueryParamError("order must be asc or desc")
+
+        fields = None
+        if args.get("fields"):
+            fields = tuple(name.strip() for name in args["fields"].split(","))
+            unknown = [name for name in fields if name not in FIELDS]
+            if unknown:
+                raise QueryParamError(f"Unknown fields: {', '.join(unknown)}")
+
+        filters = []
+        if args.get("title_prefix"):
+            # Поиск по префиксу обслуживается индексом по title
+            pattern = escape_like(args["title_prefix"]) + "%"
+            filters.append(Task.title.like(pattern, escape="\\"))
+        if args.get("title_contains"):
+            pattern = "%" + escape_like(args["title_contains"]) + "%"
+            filters.append(Task.title.like(pattern, escape="\\"))
+        if args.get("status"):
+            # Отбор по состоянию обслуживается индексом ix_task_claim
+            if args["status"] not in TASK_STATUSES:
+                raise QueryParamError(
+                    f"status must be one of: {', '.join(TASK_STATUSES)}"
+                )
+            filters.append(Task.status == args["status"])
+        for name, (column, operator) in DATE_FILTERS.items():
+            if args.get(name):
+                value = parse_datetime(args[name], name)
+                filters.append(getattr(getattr(Task, column), operator)(value))
+
+        query = cls(sort, order == "desc", fields, filters)
+        if args.get("cursor"):
+            query.set_cursor(decode_cursor(args["cursor"]))
+        return query
+
+    def set_cursor(self, cursor):
+        """
+        Установка позиции продолжения выдачи из декодированного курсора.
+
+        Args:
+            cursor: Декодированный курсор.
+
+        Raises:
+            QueryParamError: Если курсор выдан для другой сортировки или
+                значение поля сортировки в нем имеет неверный тип.
+        """
+        if cursor.get("s", "id") != self.sort or cursor.get("d", False) != (
+            self.descending
+        ):
+            raise QueryParamError("Cursor does not match sort parameters")
+        value = cursor.get("k")
+        if self.sort in ("created_at", "updated_at"):
+            if value is not None:  # Задачи без времени хранят NULL
+                value = parse_datetime(value, "cursor")
+        elif self.sort != "id" and not isinstance(value, str):
+            # Значение попадает в сравнение SQL и должно быть строкой, как title
+            raise QueryParamError("Invalid cursor")
+        self.cursor = (value, cursor["id"])
+
+    def columns(self):
+        """
+        Колонки для выборки: запрошенные поля, id и поле сортировки.
+
+        Returns:
+            list: Колонки модели Task или None, если нужны полные объекты.
+        """
+        if self.fields is None:
+            return None
+        names = dict.fromkeys(("id", self.sort) + self.fields)
+        return [getattr(Task, name) for name in names]
+
+    def after_cursor(self):
+        """
+        Условие keyset-пагинации для продолжения выдачи после курсора.
+
+        NULL считается меньше любого значения, как при сортировке в MySQL и
+        SQLite, поэтому задачи без updated_at идут первыми при сортировке по
+        возрастанию и последними при сортировке по убыванию.
+
+        Returns:
+            Условие SQLAlchemy.
+        """
+        value, last_id = self.cursor
+        id_after = Task.id < last_id if self.descending else Task.id > last_id
+        if self.sort == "id":
+            return id_after
+        column = getattr(Task, self.sort)
+        if value is None:
+            if self.descending:
+                return db.and_(column.is_(None), id_after)
+            return db.or_(db.and_(column.is_(None), id_after), column.is_not(None))
+        beyond = column < value if self.descending else column > value
+        conditions = [beyond, db.and_(column == value, id_after)]
+        if self.descending:
+            conditions.append(column.is_(None))
+        return db.or_(*conditions)
+
+    def statement(self):
+        """
+        Построение запроса списка задач.
+
+        Сортировка по полю и id вместе с условием после курсора обслуживается
+        индексом по полю сортировки (вторичные индексы InnoDB и SQLite
+        содержат первичный ключ), поэтому стоимость страницы не зависит от ее
+        номера.
+
+        Returns:
+            Select: Запрос SQLAlchemy.
+        """
+        columns = self.columns()
+        query = db.select(*columns) if columns else db.select(Task)
+        if self.filters:
+            query = query.where(*self.filters)
+        if self.cursor is not None:
+            query = query.where(self.after_cursor())
+        order = [getattr(Task, self.sort)]
+        if self.sort != "id":
+            order.append(Task.id)
+        if self.descending:
+            order = [column.desc() for column in order]
+        return query.order_by(*order)
+
+    def serializer(self):
+        # Функция сериализации с учетом запрошенного набора полей
+        return compile_dumper(TaskSchema, self.fields)
+
+    def merge(self, sources):
+        """
+        Слияние упорядоченных выборок из нескольких сегментов в общий порядок.
+
+        NULL считается меньше любого значения, как при сортировке в базе.
+        Строки сравниваются по кодам символов, что совпадает с двоичным
+        сравнением SQLite и MySQL (utf8mb4_bin); при других сопоставлениях
+        порядок строк между сегментами может отличаться от порядка в базе.
+
+        Args:
+            sources: Итерируемые наборы задач или строк, каждый упорядочен
+                так же, как statement().
+
+        Returns:
+            iterator: Задачи всех наборов в порядке сортировки.
+        """
+        if self.sort == "id":
+            key = attrgetter("id")
+        else:
+
+            def key(item):
+                value = getattr(item, self.sort)
+                return (value is not None, value, item.id)
+
+        return heapq.merge(*sources, key=key, reverse=self.descending)
+
+    def split_page(self, items, limit):
+        """
+        Отделение лишней записи, запрошенной для проверки наличия следующей
+        страницы, и сериализация страницы.
+
+        Args:
+            items: Список из не более чем limit + 1 задач или строк.
+            limit: Размер страницы.
+
+        Returns:
+            tuple: Сериализованные задачи и курсор следующей страницы или None.
+        """
+        dump = self.serializer()
+        if len(items) <= limit:
+            return [dump(item) for item in items], None
+        items = items[:limit]
+        return [dump(item) for item in items], self.cursor_for(items[-1])
+
+    def cursor_for(self, item):
+        """
+        Создание курсора, указывающего на позицию после задачи.
+
+        Args:
+            item: Последняя выданная задача или строка результата.
+
+        Returns:
+            str: Курсор следующей страницы.
+        """
+        values = {"id": item.id}
+        if self.sort != "id":
+            value = getattr(item, self.sort)
+            values.update(
+                k=value.isoformat() if isinstance(value, datetime) else value,
+                s=self.sort,
+            )
+        if self.descending:
+            values["d"] = True
+        return encode_cursor(values)
+
+
+def paginate_tasks(list_query, limit):
+    """
+    Получение одной страницы задач.
+
+    Args:
+        list_query: Параметры выдачи списка задач.
+        limit: Размер страницы.
+
+    Returns:
+        tuple: Сериализованные задачи и курсор следующей страницы (None, если
+            страниц больше нет).
+    """
+    # Запрашиваем на одну запись больше, чтобы узнать, есть ли следующая страница
+    query = list_query.statement().limit(limit + 1)
+    pages = []
+    for shard in task_shards.shards():  # Запрос страницы в каждом сегменте
+        with task_shards.use(shard):
+            result = db.session.execute(query)
+            pages.append(result.all() if list_query.fields else result.scalars().all())
+    if len(pages) > 1:
+        # Первые limit + 1 задач общего порядка содержатся среди первых
+        # limit + 1 задач каждого сегмента
+        pages = [list(list_query.merge(pages))[: limit + 1]]
+    return list_query.split_page(pages[0], limit)
+
+
+def stream_tasks(list_query):
+    """
+    Потоковая выдача задач в формате NDJSON.
+
+    Строки читаются через серверный курсор порциями по TASKS_STREAM_CHUNK_SIZE,
+    поэтому потребление памяти не зависит от количества задач в таблице.
+
+    Args:
+        list_query: Параметры выдачи списка задач.
+
+    Yields:
+        str: Порция задач, по одному JSON-объекту на строку.
+    """
+    chunk_size = current_app.config["TASKS_STREAM_CHUNK_SIZE"]
+    query = list_query.statement().execution_options(yield_per=chunk_size)
+    dump = list_query.serializer()
+    results = []
+    for shard in task_shards.shards():  # Серверный курсор в каждом сегменте
+        with task_shards.use(shard):
+            result = db.session.execute(query)
+        results.append(result if list_query.fields else result.scalars())
+    try:
+        if len(results) == 1:
+            for chunk in results[0].partitions():
+                yield "".join(json.dumps(dump(item)) + "\n" for item in chunk)
+            return
+        # Слияние потоков сегментов; порции по chunk_size задач
+        merged = iter(list_query.merge(results))
+        while chunk := list(itertools.islice(merged, chunk_size)):
+            yield "".join(json.dumps(dump(item)) + "\n" for item in chunk)
+    finally:
+        for result in results:
+            result.close()  # Освобождение серверных курсоров при обрыве соединения
@@ -0,0 +1,141 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from .db import db
+
+
+class MeteredQueuePool(QueuePool):
+    # Пул соединений, учитывающий время ожидания свободного соединения
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0  # Количество выдач соединений из пула
+        self.wait_seconds_total = 0.0  # Суммарное время ожидания соединения
+        self.wait_seconds_max = 0.0  # Максимальное время ожидания соединения
+        self.timeouts = 0  # Количество отказов по истечении pool_timeout
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._metrics_lock:
+                self.checkouts += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+class PoolMetrics:
+    # Счетчики событий пула соединений основной базы данных
+
+    def __init__(self, app=None):
+        self.connects = 0  # Количество открытых физических соединений
+        self.invalidations = 0  # Количество соединений, признанных негодными
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def configure(self, app):
+        """
+        Подключение пула с замером ожидания до создания движка.
+
+        Должно вызываться до db.init_app, так как движок создается при
+        инициализации расширения.
+
+        Args:
+            app: Экземпляр приложения Flask.
+        """
+        uri = app.config.get("SQLALCHEMY_DATABASE_URI")
+        if not uri:
+            return
+        url = make_url(uri)
+        # Пул заменяется только там, где диалект и так использует QueuePool
+        if url.get_dialect().get_pool_class(url) is QueuePool:
+            app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+                "poolclass": MeteredQueuePool,
+                **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+            }
+
+    def init_app(self, app):
+        """
+        Подписка на события пула и прогрев соединений.
+
+        Args:
+            app: Экземпляр приложения Flask.
+        """
+        app.extensions["pool_metrics"] = self
+        if not app.config.get("SQLALCHEMY_DATABASE_URI"):
+            return
+        with app.app_context():
+            engine = db.engine
+            event.listen(engine, "connect", self._on_connect)
+            event.listen(engine, "invalidate", self._on_invalidate)
+            warmup = app.config["DB_POOL_WARMUP"]
+            if warmup:
+                warm_up(engine, warmup)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self, engine=None):
+        """
+        Получение текущего состояния пула и счетчиков.
+
+        Args:
+            engine: Движок базы данных, по умолчанию db.engine текущего приложения.
+
+        Returns:
+            dict: Размер пула, занятые соединения, переполнение и ожидание.
+        """
+        pool = (engine or db.engine).pool
+        stats = {"connects": self.connects, "invalidations": self.invalidations}
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                overflow=max(pool.overflow(), 0),
+                idle=pool.checkedin(),
+            )
+        if isinstance(pool, MeteredQueuePool):
+            stats.update(
+                checkouts=pool.checkouts,
+                wait_seconds_total=pool.wait_seconds_total,
+                wait_seconds_max=pool.wait_seconds_max,
+                timeouts=pool.timeouts,
+            )
+        return stats
+
+
+def warm_up(engine, count):
+    """
+    Открытие соединений заранее, чтобы первые запросы не ждали подключения.
+
+    Args:
+        engine: Движок базы данных.
+        count: Количество соединений.
+    """
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(engine.connect())
+    finally:
+        for connection in connections:
+            connection.close()  # Соединение возвращается в пул открытым
+
+
+pool_metrics = PoolMetrics()
@@ -0,0 +1,305 @@
+import cProfile
+import hashlib
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import (
+    Blueprint,
+    current_app,
+    g,
+    has_request_context,
+    jsonify,
+    request,
+    send_file,
+)
+from sqlalchemy import event
+
+from .db import db
+
+# Заголовок с подписанным токеном, включающим профилирование запроса
+PROFILE_HEADER = "X-Profile-Token"
+
+# Допустимый формат ID профиля (защита от выхода за пределы каталога)
+PROFILE_ID = re.compile(r"^\d{8}T\d{12}-[0-9a-f]{4}$")
+
+# Эндпоинты администратора профилей не профилируются
+admin_bp = Blueprint("profiles", __name__, url_prefix="/admin/profiles")
+
+
+def sign_profile_token(secret, expires):
+    """
+    Создание подписанного токена профилирования.
+
+    Args:
+        secret: Секрет PROFILING_SECRET.
+        expires: Время окончания действия токена (Unix time).
+
+    Returns:
+        str: Токен вида "<expires>.<подпись HMAC-SHA256>".
+    """
+    signature = hmac.new(secret.encode(), str(expires).encode(), hashlib.sha256)
+    return f"{expires}.{signature.hexdigest()}"
+
+
+def verify_profile_token(secret, token):
+    """
+    Проверка подписи и срока действия токена профилирования.
+
+    Args:
+        secret: Секрет PROFILING_SECRET.
+        token: Значение заголовка X-Profile-Token.
+
+    Returns:
+        bool: True, если токен подписан этим секретом и не истек.
+    """
+    expires, _, _ = token.partition(".")
+    if not secret or not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(token, sign_profile_token(secret, int(expires)))
+
+
+class ProfileStore:
+    # Ограниченный кольцевой буфер профилей в каталоге на диске
+
+    def __init__(self, directory, max_profiles):
+        self.directory = directory  # Каталог для файлов профилей
+        self.max_profiles = max_profiles  # Количество хранимых профилей
+        self._lock = threading.Lock()
+
+    def path(self, profile_id, extension):
+        # Путь к файлу профиля: .json - сводка и SQL, .prof - данные pstats
+        return os.path.join(self.directory, f"{profile_id}.{extension}")
+
+    def save(self, profile_id, summary, profiler):
+        """
+        Запись профиля и удаление самых старых профилей сверх лимита.
+
+        Args:
+            profile_id: ID профиля.
+            summary: Сводка запроса: время, SQL-запросы, отчет pstats.
+            profiler: Остановленный cProfile.Profile.
+        """
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            profiler.dump_stats(self.path(profile_id, "prof"))
+            with open(self.path(profile_id, "json"), "w") as file:
+                json.dump(summary, file, ensure_ascii=False, indent=2)
+            # ID начинаются со времени записи, поэтому сортировка по имени
+            # упорядочивает профили от старых к новым
+            for old_id in self.ids()[: -self.max_profiles]:
+                for extension in ("json", "prof"):
+                    try:
+                        os.remove(self.path(old_id, extension))
+                    except FileNotFoundError:
+                        pass
+
+    def ids(self):
+        # ID сохраненных профилей от старых к новым
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith(".json"))
+
+    def load(self, profile_id):
+        # Сводка профиля или None, если профиль не найден
+        if not PROFILE_ID.match(profile_id):
+            return None
+        try:
+            with open(self.path(profile_id, "json")) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+
+class RequestProfiler:
+    # Профилирование выборочных запросов через cProfile с записью SQL
+
+    def __init__(self, app=None):
+        self.store = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Подключение профилирования к приложению.
+
+        Профилирование включается для доли PROFILING_SAMPLE_RATE запросов при
+        PROFILING_ENABLED или для отдельного запроса с подписанным заголовком
+        X-Profile-Token.
+
+        Args:
+            app: Экземпляр приложения Flask.
+        """
+        directory = app.config["PROFILING_DIR"] or os.path.join(
+            app.instance_path, "profiles"
+        )
+        self.store = ProfileStore(
+            os.path.abspath(directory), app.config["PROFILING_MAX_PROFILES"]
+        )
+        app.extensions["request_profiler"] = self
+        if not app.config["PROFILING_ENABLED"] and not app.config["PROFILING_SECRET"]:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.register_blueprint(admin_bp)
+        if not app.config.get("SQLALCHEMY_DATABASE_URI"):
+            return
+        with app.app_context():
+            # Основная база и сегменты хранилища задач (SQLALCHEMY_BINDS)
+            for engine in db.engines.values():
+                event.listen(
+                    engine, "before_cursor_execute", self._before_cursor_execute
+                )
+                event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def should_profile(self):
+        # Профилирование по подписанному заголовку или по выборке запросов
+        config = current_app.config
+        token = request.headers.get(PROFILE_HEADER)
+        if token and verify_profile_token(config["PROFILING_SECRET"], token):
+            return True
+        return (
+            config["PROFILING_ENABLED"]
+            and random.random() < config["PROFILING_SAMPLE_RATE"]
+        )
+
+    def _before_request(self):
+        if request.blueprint == admin_bp.name or not self.should_profile():
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return  # В потоке уже работает другой профилировщик
+        g.profiler = profiler
+        g.profile_started = time.perf_counter()
+        g.profile_sql = []  # Выполненные SQL-запросы и их время
+
+    def _before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        started = conn.info["profile_started"].pop()
+        if has_request_context() and "profile_sql" in g:
+            g.profile_sql.append(
+                {
+                    "statement": statement,
+                    "parameters": repr(parameters)[:1000],
+                    "duration_ms": (time.perf_counter() - started) * 1000,
+                }
+            )
+
+    def _after_request(self, response):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        duration_ms = (time.perf_counter() - g.profile_started) * 1000
+        # Сохраняются только запросы медленнее порога
+        if duration_ms < current_app.config["PROFILING_MIN_DURATION_MS"]:
+            return response
+
+        report = io.StringIO()
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats("cumulative").print_stats(50)
+        # ID начинается со времени с микросекундами для упорядочивания профилей
+        created = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        profile_id = f"{created}-{uuid.uuid4().hex[:4]}"
+        summary = {
+            "id": profile_id,
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "duration_ms": duration_ms,
+            "sql_duration_ms": sum(item["duration_ms"] for item in g.profile_sql),
+            "sql": g.profile_sql,
+            "report": report.getvalue(),
+        }
+        self.store.save(profile_id, summary, profiler)
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+
+request_profiler = RequestProfiler()
+
+
+@admin_bp.before_request
+def check_admin_token():
+    # Доступ к профилям только с токеном PROFILING_ADMIN_TOKEN
+    token = current_app.config["PROFILING_ADMIN_TOKEN"]
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not token or not hmac.compare_digest(supplied, token):
+        return jsonify({"error": "Forbidden"}), 403
+
+
+@admin_bp.route("", methods=["GET"])
+def list_profiles():
+    """
+    Получение списка сохраненных профилей от новых к старым.
+
+    Returns:
+        response: Краткие сведения о профилях без отчетов и SQL.
+    """
+    store = request_profiler.store
+    profiles = []
+    for profile_id in reversed(store.ids()):
+        summary = store.load(profile_id)
+        if summary is not None:
+            summary.pop("report")
+            summary["sql_count"] = len(summary.pop("sql"))
+            profiles.append(summary)
+    return jsonify({"profiles": profiles}), 200
+
+
+@admin_bp.route("/<profile_id>", methods=["GET"])
+def get_profile(profile_id):
+    """
+    Получение профиля: отчет pstats и выполненные SQL-запросы.
+
+    Args:
+        profile_id: ID профиля.
+
+    Returns:
+        response: Сводка профиля или ошибка 404.
+    """
+    summary = request_profiler.store.load(profile_id)
+    if summary is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return jsonify(summary), 200
+
+
+@admin_bp.route("/<profile_id>/download", methods=["GET"])
+def download_profile(profile_id):
+    """
+    Скачивание данных cProfile для анализа (pstats, snakeviz).
+
+    Args:
+        profile_id: ID профиля.
+
+    Returns:
+        response: Файл .prof или ошибка 404.
+    """
+    store = request_profiler.store
+    if store.load(profile_id) is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(
+        store.path(profile_id, "prof"),
+        mimetype="application/octet-stream",
+        as_attachment=True,
+        download_name=f"{profile_id}.prof",
+    )
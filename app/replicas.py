@@ -0,0 +1,248 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import make_response, request
+from sqlalchemy.exc import OperationalError
+
+from .db import current_read_engine, db
+
+logger = logging.getLogger(__name__)
+
+# Способы выбора реплики: по очереди или с наименьшим числом выполняющихся
+# запросов этого процесса
+REPLICA_STRATEGIES = ("round_robin", "least_loaded")
+
+# Методы запросов, не изменяющих данные
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReadReplicas:
+    # Направление запросов чтения в реплики основной базы данных
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.count = 0  # Количество реплик
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Настройка реплик по конфигурации приложения.
+
+        Реплики подключаются как дополнительные базы Flask-SQLAlchemy
+        (SQLALCHEMY_BINDS с ключами replica_N).
+
+        Args:
+            app: Экземпляр приложения Flask.
+        """
+        app.extensions["read_replicas"] = self
+        urls = app.config["DATABASE_REPLICA_URLS"]
+        self.enabled = bool(urls)
+        if not self.enabled:
+            return
+        if app.config["TASK_SHARD_URLS"]:
+            # Задачи сегментированного хранилища не хранятся в основной базе
+            raise ValueError("DATABASE_REPLICA_URLS cannot be used with task shards")
+        self.count = len(urls)
+        self.keys = [f"replica_{replica}" for replica in range(self.count)]
+        self.strategy = app.config["DATABASE_REPLICA_STRATEGY"]
+        if self.strategy not in REPLICA_STRATEGIES:
+            raise ValueError(f"Unknown DATABASE_REPLICA_STRATEGY: {self.strategy}")
+        self.sticky_seconds = app.config["DATABASE_REPLICA_STICKY_SECONDS"]
+        self.cookie = app.config["DATABASE_REPLICA_STICKY_COOKIE"]
+        self.retry_seconds = app.config["DATABASE_REPLICA_RETRY_SECONDS"]
+        self._lock = threading.Lock()
+        self._next = 0  # Реплика, с которой начинается следующий выбор
+        self.active = [0] * self.count  # Выполняющиеся запросы по репликам
+        self.down_until = [0.0] * self.count  # Время повторной проверки реплики
+        self.reads = 0  # Запросы, выполненные репликами
+        self.primary_reads = 0  # Запросы чтения, направленные в основную базу
+        self.failovers = 0  # Запросы, повторенные в основной базе после ошибки
+        app.after_request(self._stick_after_write)
+
+    def _stick_after_write(self, response):
+        # После успешной записи клиент читает из основной базы, пока изменения
+        # не дойдут до реплик
+        if request.method not in READ_METHODS and response.status_code < 400:
+            until = time.time() + self.sticky_seconds
+            response.set_cookie(
+                self.cookie,
+                f"{until:.3f}",
+                max_age=self.sticky_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def _is_sticky(self):
+        # Клиент недавно записывал данные (см. _stick_after_write)
+        try:
+            return float(request.cookies.get(self.cookie, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def acquire(self):
+        """
+        Выбор реплики для запроса чтения.
+
+        Реплики, недавно завершившие запрос ошибкой соединения, пропускаются
+        до истечения DATABASE_REPLICA_RETRY_SECONDS; после этого первый запрос
+        к реплике служит проверкой ее доступности.
+
+        Returns:
+            int: Номер реплики или None, если клиент недавно записывал данные
+                или доступных реплик нет. Выбранную реплику нужно освободить
+                через release.
+        """
+        sticky = self._is_sticky()
+        now = time.monotonic()
+        with self._lock:
+            healthy = [
+                (self._next + offset) % self.count
+                for offset in range(self.count)
+                if self.down_until[(self._next + offset) % self.count] <= now
+            ]
+            if sticky or not healthy:
+                self.primary_reads += 1
+                return None
+            if self.strategy == "least_loaded":
+                # min возвращает первую из равных, поэтому при одинаковой
+                # нагрузке реплики выбираются по очереди
+                replica = min(healthy, key=self.active.__getitem__)
+            else:
+                replica = healthy[0]
+            self._next = (replica + 1) % self.count
+            self.active[replica] += 1
+            self.reads += 1
+            return replica
+
+    def release(self, replica):
+        # Завершение запроса к реплике
+        with self._lock:
+            self.active[replica] -= 1
+
+    def mark_down(self, replica, error):
+        """
+        Исключение реплики из выбора после ошибки соединения.
+
+        Args:
+            replica: Номер реплики.
+            error: Исключение, с которым завершился запрос.
+        """
+        with self._lock:
+            self.down_until[replica] = time.monotonic() + self.retry_seconds
+            self.failovers += 1
+        logger.warning(
+            "Read replica %d failed, using primary for %g s: %s",
+            replica,
+            self.retry_seconds,
+            error,
+        )
+
+    def in_use(self):
+        # Запросы чтения сессии сейчас направляются в реплику
+        return current_read_engine.get() is not None
+
+    @contextmanager
+    def use(self, replica):
+        """
+        Направление запросов чтения сессии в реплику в пределах блока with.
+
+        Args:
+            replica: Номер реплики.
+        """
+        token = current_read_engine.set(db.engines[self.keys[replica]])
+        try:
+            yield
+        finally:
+            current_read_engine.reset(token)
+
+    def stream(self, replica, iterable):
+        """
+        Выдача потокового ответа с чтением из реплики.
+
+        Тело потокового ответа формируется после выхода из представления,
+        поэтому реплика подключается к сессии на время получения каждого
+        фрагмента.
+
+        Args:
+            replica: Номер реплики.
+            iterable: Итерируемое тело ответа.
+
+        Yields:
+            Фрагменты тела ответа.
+        """
+        iterator = iter(iterable)
+        try:
+            while True:
+                with self.use(replica):
+                    chunk = next(iterator, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+            self.release(replica)
+
+    def stats(self):
+        """
+        Счетчики запросов к репликам.
+
+        Returns:
+            dict: Запросы к репликам и к основной базе, повторы в основной базе
+                после ошибок и количество доступных реплик.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "reads_total": self.reads,
+                "primary_reads_total": self.primary_reads,
+                "failovers_total": self.failovers,
+                "healthy": sum(until <= now for until in self.down_until),
+            }
+
+
+read_replicas = ReadReplicas()
+
+
+def read_only(view):
+    """
+    Декоратор представления, которое только читает данные: запросы
+    представления направляются в реплику.
+
+    Если реплика завершила запрос ошибкой соединения, она исключается из
+    выбора, а представление выполняется повторно с основной базой.
+
+    Args:
+        view: Функция представления.
+
+    Returns:
+        function: Обернутое представление.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        replica = read_replicas.acquire() if read_replicas.enabled else None
+        if replica is None:
+            return view(*args, **kwargs)
+        streamed = False
+        try:
+            with read_replicas.use(replica):
+                response = make_response(view(*args, **kwargs))
+            if response.is_streamed:
+                response.response = read_replicas.stream(replica, response.response)
+                streamed = True
+            return response
+        except OperationalError as e:
+            db.session.rollback()
+            read_replicas.mark_down(replica, e)
+            return view(*args, **kwargs)
+        finally:
+            if not streamed:
+                read_replicas.release(replica)
+
+    return wrapper
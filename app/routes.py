@@ -1,7 +1,42 @@
-from flask import Blueprint, request, jsonify
-from . import db
+import math
+from datetime import datetime, timezone
+
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    request,
+    jsonify,
+    stream_with_context,
+)
+from marshmallow import ValidationError
+
+from . import bulk, changes, db
+from .cache import task_cache
+from .conditional import (
+    body_etag,
+    if_match_condition,
+    make_conditional,
+    task_validators,
+)
 from .models import Task
-from .schemas import TaskSchema, TaskCreateSchema, TaskUpdateSchema
+from .pagination import (
+    QueryParamError,
+    TaskListQuery,
+    get_limit,
+    paginate_tasks,
+    stream_tasks,
+)
+from .search import search_tasks
+from .schemas import task_create_schema, task_update_schema
+from .serializers import dump_task
+from .replicas import read_only, read_replicas
+from .sharding import route_by_id, task_shards
+from .write_behind import QueueFullError, task_write_behind
+
+# Ответ для несуществующей задачи (обработчик исключений приложения
+# превращает исключения, в том числе NotFound, в ответ 500)
+TASK_NOT_FOUND = ({"error": "Task not found"}, 404)
 
 # Создание Blueprint для управления задачами
 bp = Blueprint("tasks", __name__, url_prefix="/tasks")
@@ -24,39 +59,348 @@ def create_task():
           content:
             application/json:
               schema: TaskSchema  # Схема для возвращаемых данных о задаче
+        '202':
+          description: Задача принята в очередь на запись (TASK_WRITE_BEHIND_ACK=enqueue)
         '400':
           description: Ошибка валидации
+        '503':
+          description: Очередь на запись заполнена, повторите запрос позже
     """
-    schema = TaskCreateSchema()  # Создание схемы для валидации данных
-    task_data = schema.load(request.get_json())  # Загрузка данных из запроса
-    task = Task(**task_data)  # Создание новой задачи
-    db.session.add(task)  # Добавление задачи в сессию базы данных
-    db.session.commit()  # Фиксация изменений в базе данных
-    output_schema = TaskSchema()  # Создание схемы для возвращаемых данных
-    return output_schema.dump(task), 201  # Возврат данных о созданной задаче
+    try:
+        task_data = task_create_schema.load(
+            request.get_json(silent=True)
+        )  # Загрузка данных из запроса
+    except ValidationError as e:
+        return jsonify({"error": e.messages}), 400  # Ошибка валидации данных
+    if task_write_behind.enabled:  # Отложенная пакетная запись задач
+        try:
+            pending = task_write_behind.submit(task_data)
+        except QueueFullError as e:
+            return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
+        if task_write_behind.ack == "enqueue":
+            return jsonify({"message": "Task accepted"}), 202
+        payload = pending.wait(task_write_behind.ack_timeout)
+        if payload is None:
+            return jsonify({"error": "Timed out waiting for task to be saved"}), 504
+        return payload, 201
+    if task_shards.enabled:  # id задачи определяет ее сегмент
+        task_data["id"] = task_shards.next_id()
+    with task_shards.use_for(task_data.get("id")):
+        task = Task(**task_data)  # Создание новой задачи
+        db.session.add(task)  # Добавление задачи в сессию базы данных
+        db.session.commit()  # Фиксация изменений в базе данных
+        return dump_task(task), 201  # Возврат данных о созданной задаче
 
 
 @bp.route("", methods=["GET"])
+@read_only  # Чтение из реплики
 def get_tasks():
     """
     ---
     get:
       summary: Получить список задач
+      description: >
+        Постраничная выдача задач с курсором по полю сортировки и id. При
+        stream=true или заголовке Accept application/x-ndjson задачи выдаются
+        потоком NDJSON.
+      parameters:
+        - in: query
+          name: limit
+          schema:
+            type: integer
+            minimum: 1
+        - in: query
+          name: cursor
+          schema:
+            type: string
+        - in: query
+          name: title_prefix
+          description: Начало названия задачи
+          schema:
+            type: string
+        - in: query
+          name: title_contains
+          description: Подстрока названия задачи (без использования индекса)
+          schema:
+            type: string
+        - in: query
+          name: status
+          description: Состояние выполнения задачи
+          schema:
+            type: string
+            enum: [pending, running, succeeded, failed]
+        - in: query
+          name: created_after
+          description: Задачи, созданные не раньше указанного времени
+          schema:
+            type: string
+            format: date-time
+        - in: query
+          name: created_before
+          description: Задачи, созданные раньше указанного времени
+          schema:
+            type: string
+            format: date-time
+        - in: query
+          name: updated_after
+          description: Задачи, обновленные не раньше указанного времени
+          schema:
+            type: string
+            format: date-time
+        - in: query
+          name: updated_before
+          description: Задачи, обновленные раньше указанного времени
+          schema:
+            type: string
+            format: date-time
+        - in: query
+          name: sort
+          schema:
+            type: string
+            enum: [id, title, created_at, updated_at]
+        - in: query
+          name: order
+          schema:
+            type: string
+            enum: [asc, desc]
+        - in: query
+          name: fields
+          description: Список возвращаемых полей через запятую
+          schema:
+            type: string
+            example: id,title
+        - in: query
+          name: stream
+          schema:
+            type: boolean
+      responses:
+        '200':
+          description: Успешный ответ
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  items:
+                    type: array
+                    items: TaskSchema  # Схема для возвращаемого списка задач
+                  limit:
+                    type: integer
+                  next_cursor:
+                    type: string
+                    nullable: true
+            application/x-ndjson:
+              schema:
+                type: string
+        '304':
+          description: Список задач не изменился
+        '400':
+          description: Некорректные параметры выдачи списка
+    """
+    try:
+        # Фильтры, сортировка, набор полей и позиция, с которой продолжить выдачу
+        list_query = TaskListQuery.from_args(request.args)
+        streaming = (
+            request.args.get("stream", "").lower() in ("1", "true")
+            or request.accept_mimetypes.best == "application/x-ndjson"
+        )
+        limit = None if streaming else get_limit(request.args, current_app.config)
+    except QueryParamError as e:
+        return jsonify({"error": str(e)}), 400  # Ошибка в параметрах выдачи
+
+    if streaming:  # Потоковая выдача всех задач начиная с курсора
+        return Response(
+            stream_with_context(stream_tasks(list_query)),
+            mimetype="application/x-ndjson",
+        )
+
+    # Получение одной страницы задач
+    items, next_cursor = paginate_tasks(list_query, limit)
+    response = jsonify({"items": items, "limit": limit, "next_cursor": next_cursor})
+    # ETag вычисляется по выданной странице, а не по всей таблице задач
+    return make_conditional(
+        response, body_etag(response), None, weak=True
+    )  # Возврат страницы задач в формате JSON или 304, если она не изменилась
+
+
+@bp.route("/search", methods=["GET"])
+@read_only
+def search():
+    """
+    ---
+    get:
+      summary: Полнотекстовый поиск задач
+      description: >
+        Поиск по словам в названии и описании задачи с ранжированием по
+        релевантности (FULLTEXT в MySQL, FTS5 в SQLite).
+      parameters:
+        - in: query
+          name: q
+          required: true
+          schema:
+            type: string
+        - in: query
+          name: limit
+          schema:
+            type: integer
+            minimum: 1
+        - in: query
+          name: cursor
+          schema:
+            type: string
       responses:
         '200':
           description: Успешный ответ
           content:
             application/json:
               schema:
-                type: array
-                items: TaskSchema  # Схема для возвращаемого списка задач
+                type: object
+                properties:
+                  items:
+                    type: array
+                    items:
+                      allOf:
+                        - TaskSchema
+                        - type: object
+                          properties:
+                            score:
+                              type: number  # Оценка релевантности
+                  limit:
+                    type: integer
+                  next_cursor:
+                    type: string
+                    nullable: true
+        '400':
+          description: Пустой запрос или некорректные параметры
+        '501':
+          description: Поиск недоступен при сегментированном хранилище задач
+    """
+    if task_shards.enabled:  # Полнотекстовые индексы есть только в основной базе
+        return jsonify({"error": "Search is not available with task shards"}), 501
+    try:
+        limit = get_limit(request.args, current_app.config)
+        items, next_cursor = search_tasks(
+            request.args.get("q"), limit, request.args.get("cursor")
+        )  # Поиск задач по полнотекстовому индексу
+    except QueryParamError as e:
+        return jsonify({"error": str(e)}), 400  # Ошибка в параметрах поиска
+    return {"items": items, "limit": limit, "next_cursor": next_cursor}, 200
+
+
+@bp.route("/changes", methods=["GET"])
+def get_changes():
+    """
+    ---
+    get:
+      summary: Лента изменений задач
+      description: >
+        Изменения (создание, обновление, удаление) после токена since в
+        порядке времени изменения. Без since лента выдается с начала,
+        since=now возвращает токен текущего конца ленты. Параметр wait
+        включает длинный опрос; при stream=true или заголовке Accept
+        text/event-stream изменения выдаются потоком Server-Sent Events.
+      parameters:
+        - in: query
+          name: since
+          schema:
+            type: string
+        - in: query
+          name: limit
+          schema:
+            type: integer
+            minimum: 1
+        - in: query
+          name: wait
+          schema:
+            type: number
+            minimum: 0  # Время ожидания изменений в секундах
+        - in: query
+          name: stream
+          schema:
+            type: boolean
+      responses:
+        '200':
+          description: Страница изменений
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  changes:
+                    type: array
+                    items:
+                      type: object
+                      properties:
+                        op:
+                          type: string
+                          enum: [upsert, delete]
+                        id:
+                          type: integer
+                        changed_at:
+                          type: string
+                          format: date-time
+                        task: TaskSchema  # Только для op=upsert
+                  next_token:
+                    type: string
+                  has_more:
+                    type: boolean
+            text/event-stream:
+              schema:
+                type: string
+        '400':
+          description: Некорректные параметры
+        '410':
+          description: Токен устарел, нужна полная синхронизация
+        '501':
+          description: Лента недоступна при сегментированном хранилище задач
     """
-    tasks = Task.query.all()  # Получение всех задач из базы данных
-    schema = TaskSchema(many=True)  # Создание схемы для сериализации списка задач
-    return schema.dump(tasks), 200  # Возврат списка задач в формате JSON
+    if task_shards.enabled:  # Токен ленты описывает позицию в одной базе
+        return (
+            jsonify({"error": "Change feed is not available with task shards"}),
+            501,
+        )
+    streaming = request.args.get("stream", "").lower() in ("1", "true") or (
+        request.accept_mimetypes.best == "text/event-stream"
+    )
+    since = request.args.get("since") or request.headers.get("Last-Event-ID")
+    try:
+        limit = get_limit(request.args, current_app.config)
+        wait = float(request.args.get("wait", 0))
+        if not math.isfinite(wait):  # nan не ограничивается min/max
+            raise QueryParamError("Invalid wait")
+        if since == "now":
+            token = changes.head_token()
+        elif since:
+            token = changes.ChangeToken.decode(since)
+        else:
+            token = changes.ChangeToken()
+    except ValueError as e:  # QueryParamError и нечисловой wait
+        return jsonify({"error": str(e)}), 400  # Ошибка в параметрах ленты
+    try:
+        changes.check_token(token)
+    except QueryParamError as e:
+        return jsonify({"error": str(e)}), 410  # Удаления после токена очищены
+
+    if streaming:  # Выдача изменений по мере фиксации
+        response = Response(
+            stream_with_context(changes.stream_changes(token, limit)),
+            mimetype="text/event-stream",
+        )
+        response.cache_control.no_cache = True
+        return response
+
+    wait = min(max(wait, 0), current_app.config["TASK_CHANGES_MAX_WAIT"])
+    items, next_token, has_more = changes.wait_for_changes(token, limit, wait)
+    return {
+        "changes": items,
+        "next_token": next_token.encode(),
+        "has_more": has_more,
+    }, 200
 
 
 @bp.route("/<int:id>", methods=["GET"])
+@route_by_id  # Запросы к сегменту задачи
+@read_only
 def get_task(id):
     """
     ---
@@ -74,16 +418,26 @@ def get_task(id):
           content:
             application/json:
               schema: TaskSchema  # Схема для возвращаемых данных о задаче
+        '304':
+          description: Задача не изменилась
         '404':
           description: Задача не найдена
     """
-    # Получение задачи из базы данных или возврат ошибки 404, если задача не найдена
-    task = Task.query.get_or_404(id)
-    schema = TaskSchema()  # Создание схемы для сериализации задачи
-    return schema.dump(task), 200  # Возврат данных о задаче в формате JSON
+    payload = task_cache.get(id)  # Попытка получить данные задачи из кэша
+    if payload is None:
+        task = db.session.get(Task, id)  # Получение задачи из базы данных
+        if task is None:
+            return TASK_NOT_FOUND
+        payload = dump_task(task)  # Сериализация задачи
+        if not read_replicas.in_use():  # Реплика может отставать от основной базы
+            task_cache.set(id, payload)  # Сохранение данных задачи в кэше
+    return make_conditional(
+        jsonify(payload), *task_validators(payload)
+    )  # Возврат данных о задаче в формате JSON или 304, если она не изменилась
 
 
 @bp.route("/<int:id>", methods=["PUT"])  # Роут для обновления задачи по ID
+@route_by_id
 def update_task(id):
     """
     ---
@@ -110,21 +464,51 @@ def update_task(id):
           description: Ошибка валидации  # Описание ошибки при валидации данных
         '404':
           description: Задача не найдена  # Описание ошибки, если задача не найдена
+        '412':
+          description: Задача изменилась после получения ETag из If-Match
     """
-    # Получение задачи из базы данных или возврат ошибки 404, если задача не найдена
-    task = Task.query.get_or_404(id)
-    schema = TaskUpdateSchema()  # Создание схемы для валидации данных
-    updated_data = schema.load(
-        request.get_json(), partial=True
-    )  # Загрузка данных из запроса
-    for key, value in updated_data.items():
-        setattr(task, key, value)  # Обновление атрибутов задачи
+    condition = if_match_condition(id)  # Условие по версии задачи из If-Match
+    if condition is None:
+        task = db.session.get(Task, id)  # Получение задачи из базы данных
+        if task is None:
+            return TASK_NOT_FOUND
+    try:
+        updated_data = task_update_schema.load(
+            request.get_json(silent=True), partial=True
+        )  # Загрузка данных из запроса
+    except ValidationError as e:
+        return jsonify({"error": e.messages}), 400  # Ошибка валидации данных
+    if condition is None:
+        for key, value in updated_data.items():
+            setattr(task, key, value)  # Обновление атрибутов задачи
+    else:
+        # Условное обновление одним запросом, без предварительного чтения задачи
+        if updated_data:
+            query = db.update(Task).where(Task.id == id, condition)
+            query = query.values(**updated_data, version=Task.version + 1)
+            matched = db.session.execute(query).rowcount
+        else:
+            query = db.select(db.func.count()).where(Task.id == id, condition)
+            matched = db.session.execute(query).scalar()
+        if not matched:  # Задача не найдена или ее версия не совпала
+            db.session.rollback()
+            if db.session.get(Task, id) is None:
+                return TASK_NOT_FOUND
+            return jsonify({"error": "Precondition failed"}), 412
     db.session.commit()  # Фиксация изменений в базе данных
-    output_schema = TaskSchema()  # Создание схемы для возвращаемых данных
-    return output_schema.dump(task), 200  # Возврат данных о задаче в формате JSON
+    if condition is not None:
+        task = db.session.get(Task, id)  # Чтение обновленной задачи
+    payload = dump_task(task)  # Сериализация обновленной задачи
+    task_cache.set(id, payload)  # Обновление данных задачи в кэше
+    response = jsonify(payload)
+    etag, last_modified = task_validators(payload)
+    response.set_etag(etag)  # Новая версия задачи для следующих If-Match
+    response.last_modified = last_modified
+    return response, 200  # Возврат данных о задаче в формате JSON
 
 
 @bp.route("/<int:id>", methods=["DELETE"])
+@route_by_id
 def delete_task(id):
     """
     ---
@@ -149,32 +533,228 @@ def delete_task(id):
                     example: "Task deleted successfully"  # Пример сообщения об успешном удалении задачи
         '404':
           description: Задача не найдена  # Описание ошибки, если задача не найдена
+        '412':
+          description: Задача изменилась после получения ETag из If-Match
     """
-    task = Task.query.get_or_404(
-        id
-    )  # Получение задачи из базы данных или возврат ошибки 404, если задача не найдена
-    db.session.delete(task)  # Удаление задачи из сессии базы данных
+    condition = if_match_condition(id)  # Условие по версии задачи из If-Match
+    if condition is None:
+        task = db.session.get(Task, id)  # Получение задачи из базы данных
+        if task is None:
+            return TASK_NOT_FOUND
+        db.session.delete(task)  # Удаление задачи из сессии базы данных
+    else:
+        # Условное удаление одним запросом, без предварительного чтения задачи
+        query = db.delete(Task).where(Task.id == id, condition)
+        if not db.session.execute(query).rowcount:
+            db.session.rollback()
+            if db.session.get(Task, id) is None:
+                return TASK_NOT_FOUND
+            return jsonify({"error": "Precondition failed"}), 412
+    changes.record_deletions([id])  # Запись удаления в ленту изменений
     db.session.commit()  # Фиксация изменений в базе данных
+    task_cache.delete(id)  # Удаление задачи из кэша
     return (
         jsonify({"message": "Task deleted successfully"}),
         200,
     )  # Возврат сообщения об успешном удалении задачи
 
 
-def task_to_dict(task):
+@bp.route("/<int:id>/retry", methods=["POST"])
+@route_by_id
+def retry_task(id):
+    """
+    ---
+    post:
+      summary: Повторно запустить задачу
+      description: >
+        Возврат завершенной задачи в очередь исполнителя с обнулением
+        счетчика попыток. Выполняющуюся задачу повторить нельзя.
+      parameters:
+        - in: path
+          name: id
+          required: true
+          schema:
+            type: integer
+      responses:
+        '200':
+          description: Задача поставлена в очередь
+          content:
+            application/json:
+              schema: TaskSchema
+        '404':
+          description: Задача не найдена
+        '409':
+          description: Задача выполняется
     """
-    Функция для преобразования объекта задачи в словарь.
+    # Условное обновление защищает от гонки с захватом задачи исполнителем
+    matched = db.session.execute(
+        db.update(Task)
+        .where(Task.id == id, Task.status != "running")
+        .values(
+            status="pending",
+            scheduled_at=datetime.now(timezone.utc),
+            attempts=0,
+            last_error=None,
+            version=Task.version + 1,
+        )
+    ).rowcount
+    if not matched:
+        db.session.rollback()
+        if db.session.get(Task, id) is None:
+            return TASK_NOT_FOUND
+        return jsonify({"error": "Task is running"}), 409
+    db.session.commit()
+    task = db.session.get(Task, id)
+    payload = dump_task(task)
+    task_cache.set(id, payload)  # Обновление данных задачи в кэше
+    return payload, 200
+
 
-    Args:
-        task: Объект задачи.
+def get_bulk_items():
+    """
+    Получение массива элементов из тела массового запроса.
 
     Returns:
-        Словарь с данными о задаче.
+        tuple: Список элементов и None либо None и ответ с ошибкой.
     """
-    return {
-        "id": task.id,
-        "title": task.title,
-        "description": task.description,
-        "created_at": task.created_at,
-        "updated_at": task.updated_at,
-    }  # Возврат словаря с данными о задаче
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        return None, (jsonify({"error": "Request body must be a JSON array"}), 400)
+    max_items = current_app.config["TASKS_BULK_MAX_ITEMS"]
+    if len(items) > max_items:
+        return None, (
+            jsonify({"error": f"Too many items, maximum is {max_items}"}),
+            400,
+        )
+    return items, None
+
+
+@bp.route("/bulk", methods=["POST"])
+def create_tasks_bulk():
+    """
+    ---
+    post:
+      summary: Создать несколько задач
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+              type: array
+              items: TaskCreateSchema  # Схема для валидации каждой новой задачи
+      responses:
+        '200':
+          description: Результаты по каждому элементу
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  results:
+                    type: array
+                    items:
+                      type: object
+                      properties:
+                        index:
+                          type: integer
+                        status:
+                          type: integer
+                          example: 201
+                        task: TaskSchema
+                        errors:
+                          type: object
+        '400':
+          description: Тело запроса не является массивом или слишком велико
+    """
+    items, error = get_bulk_items()  # Получение массива задач из запроса
+    if error:
+        return error
+    return {"results": bulk.create_tasks(items)}, 200  # Результаты по элементам
+
+
+@bp.route("/bulk", methods=["PUT"])
+def update_tasks_bulk():
+    """
+    ---
+    put:
+      summary: Обновить несколько задач
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+              type: array
+              items: TaskBulkUpdateSchema  # Схема для валидации каждого обновления
+      responses:
+        '200':
+          description: Результаты по каждому элементу
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  results:
+                    type: array
+                    items:
+                      type: object
+                      properties:
+                        index:
+                          type: integer
+                        status:
+                          type: integer
+                          example: 200
+                        task: TaskSchema
+                        errors:
+                          type: object
+        '400':
+          description: Тело запроса не является массивом или слишком велико
+    """
+    items, error = get_bulk_items()  # Получение массива обновлений из запроса
+    if error:
+        return error
+    return {"results": bulk.update_tasks(items)}, 200  # Результаты по элементам
+
+
+@bp.route("/bulk", methods=["DELETE"])
+def delete_tasks_bulk():
+    """
+    ---
+    delete:
+      summary: Удалить несколько задач по ID
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+              type: array
+              items:
+                type: integer  # ID удаляемых задач
+      responses:
+        '200':
+          description: Результаты по каждому ID
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  results:
+                    type: array
+                    items:
+                      type: object
+                      properties:
+                        index:
+                          type: integer
+                        id:
+                          type: integer
+                        status:
+                          type: integer
+                          example: 200
+        '400':
+          description: Тело запроса не является массивом ID или слишком велико
+    """
+    ids, error = get_bulk_items()  # Получение массива ID из запроса
+    if error:
+        return error
+    if not all(type(id) is int for id in ids):
+        return jsonify({"error": "Request body must be an array of task IDs"}), 400
+    return {"results": bulk.delete_tasks(ids)}, 200  # Результаты по элементам
@@ -1,5 +1,7 @@
-from marshmallow import Schema, fields, post_load
-from .models import Task
+from datetime import timezone
+
+from marshmallow import Schema, fields, post_load, validate
+from .models import MAX_PRIORITY, Task
 
 
 class TaskSchema(Schema):
@@ -13,6 +15,18 @@ class TaskSchema(Schema):
     updated_at = fields.DateTime(
         dump_only=True
     )  # Поле времени обновления, только для чтения
+    status = fields.Str(dump_only=True)  # Поле состояния выполнения, только для чтения
+    priority = fields.Int(dump_only=True)  # Поле приоритета, только для чтения
+    scheduled_at = fields.DateTime(
+        dump_only=True
+    )  # Поле времени запуска, только для чтения
+    attempts = fields.Int(
+        dump_only=True
+    )  # Поле количества попыток выполнения, только для чтения
+    last_error = fields.Str(
+        dump_only=True
+    )  # Поле ошибки последней попытки, только для чтения
+    version = fields.Int(dump_only=True)  # Поле номера версии, только для чтения
 
     @post_load
     def make_task(self, data, **kwargs):
@@ -28,6 +42,24 @@ class TaskCreateSchema(Schema):
     description = fields.Str(
         description="Описание задачи", example="Купить продукты в супермаркете"
     )  # Поле описания задачи с описанием и примером
+    priority = fields.Int(
+        validate=validate.Range(0, MAX_PRIORITY),
+        description="Приоритет выполнения, больший запускается раньше",
+        example=0,
+    )  # Поле приоритета задачи
+    scheduled_at = fields.DateTime(
+        description="Время, не раньше которого задача будет запущена"
+    )  # Поле отложенного запуска задачи
+
+    @post_load
+    def normalize_scheduled_at(self, data, **kwargs):
+        # Время запуска хранится в UTC без часового пояса
+        scheduled_at = data.get("scheduled_at")
+        if scheduled_at is not None and scheduled_at.tzinfo is not None:
+            data["scheduled_at"] = scheduled_at.astimezone(timezone.utc).replace(
+                tzinfo=None
+            )
+        return data
 
 
 class TaskUpdateSchema(Schema):
@@ -38,3 +70,19 @@ class TaskUpdateSchema(Schema):
     description = fields.Str(
         description="Новое описание задачи"
     )  # Поле для нового описания задачи
+
+
+class TaskBulkUpdateSchema(TaskUpdateSchema):
+    # Схема для десериализации элемента массового обновления задач
+    id = fields.Int(
+        required=True, description="ID обновляемой задачи"
+    )  # Обязательное поле id обновляемой задачи
+
+
+# Экземпляры схем, общие для всех запросов
+task_schema = TaskSchema()
+tasks_schema = TaskSchema(many=True)
+task_create_schema = TaskCreateSchema()
+tasks_create_schema = TaskCreateSchema(many=True)
+task_update_schema = TaskUpdateSchema()
+tasks_bulk_update_schema = TaskBulkUpdateSchema(many=True)
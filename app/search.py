@@ -0,0 +1,138 @@
+import re
+
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects import mysql
+
+from .db import db
+from .models import Task
+from .pagination import QueryParamError, decode_cursor, encode_cursor
+from .serializers import dump_task
+
+# Полнотекстовая таблица FTS5 для SQLite, синхронизируемая с task триггерами
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5("
+    "title, description, content='task', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_insert AFTER INSERT ON task BEGIN "
+    "INSERT INTO task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_delete AFTER DELETE ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_update "
+    "AFTER UPDATE OF title, description ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+)
+
+# Создание полнотекстовой таблицы вместе с task при db.create_all() в SQLite
+for statement in SQLITE_FTS_DDL:
+    event.listen(
+        Task.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+event.listen(
+    Task.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS task_fts").execute_if(dialect="sqlite"),
+)
+
+# Таблица FTS5 для построения запросов (не входит в метаданные моделей)
+task_fts = db.table("task_fts", db.column("rowid"))
+
+
+def fts5_query(query):
+    """
+    Преобразование пользовательского запроса в безопасный запрос FTS5.
+
+    Каждое слово берется в кавычки, поэтому операторы FTS5 в тексте запроса
+    не влияют на разбор; слова объединяются через AND.
+
+    Args:
+        query: Текст поискового запроса.
+
+    Returns:
+        str: Запрос FTS5 или пустая строка, если в запросе нет слов.
+    """
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", query))
+
+
+def search_statement(query, dialect):
+    """
+    Построение запроса полнотекстового поиска с оценкой релевантности.
+
+    Args:
+        query: Текст поискового запроса.
+        dialect: Имя диалекта базы данных.
+
+    Returns:
+        Select: Запрос, возвращающий задачу и оценку (больше - релевантнее).
+    """
+    if dialect == "mysql":
+        # Индекс FULLTEXT по (title, description) создается миграцией
+        score = mysql.match(Task.title, Task.description, against=query)
+        score = score.in_natural_language_mode()
+        return (
+            db.select(Task, score.label("score"))
+            .where(score)
+            .order_by(db.desc("score"), Task.id)
+        )
+    if dialect == "sqlite":
+        # bm25 возвращает отрицательные значения: чем меньше, тем релевантнее
+        score = -db.func.bm25(db.literal_column("task_fts"))
+        return (
+            db.select(Task, score.label("score"))
+            .join(task_fts, task_fts.c.rowid == Task.id)
+            .where(db.literal_column("task_fts").op("MATCH")(fts5_query(query)))
+            .order_by(db.desc("score"), Task.id)
+        )
+    # Для остальных баз данных используется поиск подстроки без ранжирования;
+    # символы шаблона LIKE в запросе экранируются
+    pattern = "%{}%".format(re.sub(r"([\\%_])", r"\\\1", query))
+    return (
+        db.select(Task, db.literal(0.0).label("score"))
+        .where(
+            db.or_(
+                Task.title.like(pattern, escape="\\"),
+                Task.description.like(pattern, escape="\\"),
+            )
+        )
+        .order_by(Task.id)
+    )
+
+
+def search_tasks(query, limit, cursor=None):
+    """
+    Полнотекстовый поиск задач по названию и описанию.
+
+    Результаты упорядочены по релевантности, поэтому для продолжения выдачи
+    курсор хранит смещение в отсортированном списке.
+
+    Args:
+        query: Текст поискового запроса.
+        limit: Размер страницы.
+        cursor: Курсор страницы или None для первой страницы.
+
+    Returns:
+        tuple: Найденные задачи с оценкой релевантности и курсор следующей
+            страницы или None.
+
+    Raises:
+        QueryParamError: Если запрос пустой или курсор неверный.
+    """
+    if not re.search(r"\w", query or ""):
+        raise QueryParamError("q must contain at least one word")
+    offset = 0
+    if cursor:
+        offset = decode_cursor(cursor).get("offset")
+        if not isinstance(offset, int) or offset < 0:
+            raise QueryParamError("Invalid cursor")
+
+    statement = search_statement(query, db.engine.dialect.name)
+    rows = db.session.execute(statement.limit(limit + 1).offset(offset)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({"id": rows[-1].Task.id, "offset": offset + limit})
+    items = [dict(dump_task(task), score=float(score)) for task, score in rows]
+    return items, next_cursor
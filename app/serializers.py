@@ -0,0 +1,94 @@
+from functools import lru_cache
+
+from marshmallow import fields, missing
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+
+from .schemas import TaskSchema
+
+
+def _converter(field):
+    """
+    Подбор функции преобразования значения для поля схемы.
+
+    Возвращаются те же функции, которые Marshmallow применяет при сериализации,
+    но без общей обвязки поля (получение значения, хуки, проверки).
+
+    Args:
+        field: Поле схемы Marshmallow.
+
+    Returns:
+        Функция преобразования значения или None, если для поля нужен
+        общий путь сериализации через field.serialize.
+    """
+    if field.dump_default is not missing or type(field).serialize is not (
+        fields.Field.serialize
+    ):
+        return None
+    if type(field) is fields.Integer and not field.as_string:
+        return int
+    if type(field) is fields.String:
+        return str
+    if type(field) is fields.DateTime:
+        data_format = field.format or field.DEFAULT_FORMAT
+        return field.SERIALIZATION_FUNCS.get(data_format)
+    return None
+
+
+@lru_cache(maxsize=None)
+def compile_dumper(schema_class, only=None):
+    """
+    Генерация специализированной функции сериализации для схемы.
+
+    Для каждого поля генерируется прямое чтение атрибута и преобразование
+    значения, поэтому результат совпадает с schema.dump, но без обхода полей
+    на каждый объект. Функции кэшируются по схеме и набору полей.
+
+    Args:
+        schema_class: Класс схемы Marshmallow.
+        only: Кортеж имен полей для частичной сериализации или None.
+
+    Returns:
+        function: Функция, преобразующая объект (или строку результата
+            запроса с теми же атрибутами) в словарь.
+    """
+    schema = schema_class(only=only)
+    if schema._has_processors(PRE_DUMP) or schema._has_processors(POST_DUMP):
+        return schema.dump  # Хуки сериализации поддерживает только сама схема
+    namespace = {}
+    lines = []
+    items = []
+    for index, (name, field) in enumerate(schema.dump_fields.items()):
+        attribute = field.attribute or name
+        key = field.data_key or name
+        convert = _converter(field)
+        # Нестандартные и вложенные поля сериализуются общим путем
+        if convert is None or "." in attribute:
+            namespace[f"field{index}"] = field
+            items.append(f"{key!r}: field{index}.serialize({attribute!r}, obj)")
+            continue
+        namespace[f"convert{index}"] = convert
+        lines.append(f"    value{index} = obj.{attribute}")
+        items.append(
+            f"{key!r}: None if value{index} is None else convert{index}(value{index})"
+        )
+    source = "def dump(obj):\n{}\n    return {{{}}}\n".format(
+        "\n".join(lines) or "    pass", ", ".join(items)
+    )
+    exec(compile(source, f"<dumper {schema_class.__name__}>", "exec"), namespace)
+    return namespace["dump"]
+
+
+dump_task = compile_dumper(TaskSchema)  # Быстрая сериализация одной задачи
+
+
+def dump_tasks(tasks):
+    """
+    Быстрая сериализация списка задач.
+
+    Args:
+        tasks: Итерируемый набор задач.
+
+    Returns:
+        list: Список словарей, совпадающий с TaskSchema(many=True).dump(tasks).
+    """
+    return [dump_task(task) for task in tasks]
@@ -0,0 +1,266 @@
+import hashlib
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from functools import wraps
+
+from .db import current_shard_engine, db
+
+# Способы распределения задач по сегментам: по хэшу id или по диапазонам id
+# (id растут со временем, поэтому диапазон id - это период создания задач)
+SHARD_STRATEGIES = ("hash", "range")
+
+# Формат id: 41 бит - миллисекунды от ID_EPOCH, 7 бит - номер генератора,
+# 5 бит - порядковый номер в пределах миллисекунды. Всего 53 бита, поэтому
+# id точно представимы числами JSON в JavaScript
+ID_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+WORKER_BITS = 7
+SEQUENCE_BITS = 5
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+
+
+def min_id_for(moment):
+    """
+    Наименьший id, который может быть выдан в заданный момент.
+
+    Args:
+        moment: Время; без часового пояса считается временем UTC.
+
+    Returns:
+        int: Нижняя граница id задач, созданных не раньше moment.
+    """
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    ms = int((moment - ID_EPOCH).total_seconds() * 1000)
+    return max(ms, 0) << (WORKER_BITS + SEQUENCE_BITS)
+
+
+class IdGenerator:
+    # Генератор глобально уникальных возрастающих id без обращения к базе
+
+    def __init__(self, worker_id):
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"TASK_ID_WORKER_ID must be in 0..{MAX_WORKER_ID}")
+        self.worker_id = worker_id  # Номер генератора, уникальный для процесса
+        self._epoch_ms = int(ID_EPOCH.timestamp() * 1000)
+        self._last_ms = -1  # Миллисекунда последнего выданного id
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def next_id(self):
+        """
+        Получение следующего id.
+
+        Если часы отстали или порядковые номера текущей миллисекунды
+        исчерпаны, id выдается в счет следующей миллисекунды, поэтому id
+        генератора строго возрастают и выдаются без ожидания.
+
+        Returns:
+            int: Новый id.
+        """
+        with self._lock:
+            now = int(time.time() * 1000) - self._epoch_ms
+            if now > self._last_ms:
+                self._last_ms = now
+                self._sequence = 0
+            else:
+                self._sequence = (self._sequence + 1) & SEQUENCE_MASK
+                if self._sequence == 0:
+                    self._last_ms += 1
+            return (
+                (self._last_ms << (WORKER_BITS + SEQUENCE_BITS))
+                | (self.worker_id << SEQUENCE_BITS)
+                | self._sequence
+            )
+
+
+def parse_boundary(value):
+    # Граница диапазона сегмента: id или дата ISO 8601
+    try:
+        return int(value)
+    except ValueError:
+        return min_id_for(datetime.fromisoformat(value))
+
+
+class TaskShards:
+    # Маршрутизация задач по сегментам хранилища (отдельным базам данных)
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.count = 1  # Количество сегментов
+        self.ids = None  # Генератор id новых задач
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Настройка сегментов по конфигурации приложения.
+
+        Сегменты подключаются как дополнительные базы Flask-SQLAlchemy
+        (SQLALCHEMY_BINDS с ключами task_shard_N).
+
+        Args:
+            app: Экземпляр приложения Flask.
+        """
+        app.extensions["task_shards"] = self
+        urls = app.config["TASK_SHARD_URLS"]
+        self.enabled = bool(urls)
+        if not self.enabled:
+            return
+        self.app = app
+        self.count = len(urls)
+        self.keys = [f"task_shard_{shard}" for shard in range(self.count)]
+        self.strategy = app.config["TASK_SHARD_STRATEGY"]
+        if self.strategy not in SHARD_STRATEGIES:
+            raise ValueError(f"Unknown TASK_SHARD_STRATEGY: {self.strategy}")
+        if self.strategy == "range":
+            self.boundaries = [
+                parse_boundary(value) for value in app.config["TASK_SHARD_RANGES"]
+            ]
+            if len(self.boundaries) != self.count - 1 or (
+                self.boundaries != sorted(self.boundaries)
+            ):
+                raise ValueError(
+                    "TASK_SHARD_RANGES must list increasing lower bounds "
+                    "of shards 1..N-1"
+                )
+        worker_id = app.config["TASK_ID_WORKER_ID"]
+        if worker_id is None:
+            # Процессы с одинаковым номером могут выдать одинаковые id, поэтому
+            # номер задается явно при развертывании, а не выбирается случайно
+            raise ValueError("TASK_ID_WORKER_ID is required with TASK_SHARD_URLS")
+        self.ids = IdGenerator(worker_id)
+
+    def next_id(self):
+        # id новой задачи
+        return self.ids.next_id()
+
+    def for_id(self, id):
+        """
+        Номер сегмента, в котором хранится задача.
+
+        Args:
+            id: id задачи.
+
+        Returns:
+            int: Номер сегмента.
+        """
+        if self.strategy == "range":
+            return bisect_right(self.boundaries, id)
+        # Младшие биты id почти всегда нулевые, поэтому id перемешивается
+        # хэшем, одинаковым во всех процессах
+        value = (id & 0xFFFFFFFFFFFFFFFF).to_bytes(8, "big")
+        digest = hashlib.blake2b(value, digest_size=8)
+        return int.from_bytes(digest.digest(), "big") % self.count
+
+    @contextmanager
+    def use(self, shard):
+        """
+        Направление запросов сессии в сегмент в пределах блока with.
+
+        Изменения нужно фиксировать и сериализовать внутри блока: после
+        выхода из него отложенная загрузка атрибутов пойдет в основную базу.
+
+        Args:
+            shard: Номер сегмента или None для основной базы.
+        """
+        if shard is None:
+            yield
+            return
+        token = current_shard_engine.set(db.engines[self.keys[shard]])
+        try:
+            yield
+        finally:
+            current_shard_engine.reset(token)
+
+    def use_for(self, id):
+        # Направление запросов в сегмент задачи; без сегментов - основная база
+        return self.use(self.for_id(id)) if self.enabled else nullcontext()
+
+    def shards(self):
+        """
+        Номера всех сегментов для запросов ко всем сегментам.
+
+        Returns:
+            list: Номера сегментов или [None] (основная база), если
+                сегментирование отключено.
+        """
+        return list(range(self.count)) if self.enabled else [None]
+
+    def group(self, ids):
+        """
+        Разбиение id задач по сегментам.
+
+        Args:
+            ids: Итерируемый набор id.
+
+        Returns:
+            dict: Списки id по номерам сегментов (None - основная база).
+        """
+        groups = defaultdict(list)
+        for id in ids:
+            groups[self.for_id(id) if self.enabled else None].append(id)
+        return groups
+
+    def map_grouped(self, items, shard_of, function):
+        """
+        Обработка элементов пачками по сегментам.
+
+        Args:
+            items: Список элементов.
+            shard_of: Функция, возвращающая номер сегмента элемента.
+            function: Функция, принимающая список элементов одного сегмента и
+                возвращающая результаты в том же порядке; вызывается внутри
+                use(сегмент).
+
+        Returns:
+            list: Результаты в порядке входных элементов.
+        """
+        groups = defaultdict(list)
+        for index, item in enumerate(items):
+            groups[shard_of(item)].append(index)
+        results = [None] * len(items)
+        for shard, indexes in sorted(groups.items()):
+            with self.use(shard):
+                outputs = function([items[index] for index in indexes])
+            for index, output in zip(indexes, outputs):
+                results[index] = output
+        return results
+
+    def create_schema(self):
+        """
+        Создание таблиц моделей в сегментах, где их еще нет.
+
+        Returns:
+            int: Количество сегментов.
+        """
+        for key in self.keys:
+            db.metadata.create_all(db.engines[key])
+        return self.count
+
+
+task_shards = TaskShards()
+
+
+def route_by_id(view):
+    """
+    Декоратор представления задачи по id: запросы представления
+    направляются в сегмент задачи.
+
+    Args:
+        view: Функция представления с аргументом id.
+
+    Returns:
+        function: Обернутое представление.
+    """
+
+    @wraps(view)
+    def wrapper(id, **kwargs):
+        with task_shards.use_for(id):
+            return view(id, **kwargs)
+
+    return wrapper
@@ -0,0 +1,223 @@
+import atexit
+import queue
+import threading
+import time
+
+from .bulk import save_tasks
+from .db import db
+
+# Режимы подтверждения создания задачи: после фиксации в базе данных или сразу
+# после постановки в очередь (задачи в очереди теряются при аварийном останове)
+ACK_MODES = ("flush", "enqueue")
+
+
+class QueueFullError(Exception):
+    # Исключение при заполненной очереди на запись
+    pass
+
+
+class PendingTask:
+    # Задача, ожидающая записи в базу данных
+
+    def __init__(self, data):
+        self.data = data  # Проверенные данные новой задачи
+        self.payload = None  # Сериализованная задача после записи
+        self.error = None  # Исключение, если запись пачки не удалась
+        self._done = threading.Event()
+
+    def resolve(self, payload=None, error=None):
+        self.payload = payload
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout):
+        """
+        Ожидание записи задачи в базу данных.
+
+        Args:
+            timeout: Максимальное время ожидания в секундах.
+
+        Returns:
+            dict: Сериализованная задача или None, если время ожидания истекло.
+
+        Raises:
+            Exception: Ошибка записи пачки, в которую попала задача.
+        """
+        if not self._done.wait(timeout):
+            return None
+        if self.error is not None:
+            raise self.error
+        return self.payload
+
+
+class TaskWriteBehind:
+    # Отложенная пакетная запись новых задач фоновым потоком
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.app = None
+        self._queue = None
+        self._thread = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.enqueued = 0  # Принятые в очередь задачи
+        self.rejected = 0  # Отклоненные из-за заполненной очереди задачи
+        self.written = 0  # Записанные в базу данных задачи
+        self.batches = 0  # Выполненные пакетные вставки
+        self.failed = 0  # Задачи из пачек, запись которых не удалась
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Настройка очереди записи по конфигурации приложения.
+
+        Args:
+            app: Экземпляр приложения Flask.
+        """
+        app.extensions["task_write_behind"] = self
+        self.enabled = app.config["TASK_WRITE_BEHIND"]
+        if not self.enabled:
+            return
+        self.ack = app.config["TASK_WRITE_BEHIND_ACK"]
+        if self.ack not in ACK_MODES:
+            raise ValueError(f"Unknown TASK_WRITE_BEHIND_ACK: {self.ack}")
+        self.app = app
+        self.batch_size = app.config["TASK_WRITE_BEHIND_BATCH_SIZE"]
+        self.flush_interval = app.config["TASK_WRITE_BEHIND_FLUSH_INTERVAL"]
+        self.enqueue_timeout = app.config["TASK_WRITE_BEHIND_ENQUEUE_TIMEOUT"]
+        self.ack_timeout = app.config["TASK_WRITE_BEHIND_ACK_TIMEOUT"]
+        self._queue = queue.Queue(app.config["TASK_WRITE_BEHIND_QUEUE_SIZE"])
+        # Повторная настройка после drain (новое приложение) снова принимает
+        # задачи и запускает новый поток
+        self._stopping.clear()
+        self._thread = None
+        atexit.register(self.drain)  # Запись оставшихся задач при остановке
+
+    def _ensure_worker(self):
+        # Поток запускается при первой задаче, то есть уже в процессе воркера
+        # (после fork), а не в мастер-процессе сервера
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="task-write-behind", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, data):
+        """
+        Постановка новой задачи в очередь на запись.
+
+        Args:
+            data: Проверенные данные новой задачи.
+
+        Returns:
+            PendingTask: Задача, ожидающая записи.
+
+        Raises:
+            QueueFullError: Если очередь заполнена дольше
+                TASK_WRITE_BEHIND_ENQUEUE_TIMEOUT или идет остановка.
+        """
+        if self._stopping.is_set():
+            raise QueueFullError("Task queue is shutting down")
+        self._ensure_worker()
+        pending = PendingTask(data)
+        try:
+            if self.enqueue_timeout > 0:
+                self._queue.put(pending, timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait(pending)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise QueueFullError("Task queue is full") from None
+        with self._lock:
+            self.enqueued += 1
+        return pending
+
+    def _collect(self, first):
+        # Набор пачки до batch_size задач или до истечения flush_interval
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        # Цикл фонового потока: запись пачек до остановки и опустошения очереди
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.flush(self._collect(first))
+
+    def flush(self, batch):
+        """
+        Запись пачки задач одной многострочной вставкой.
+
+        Args:
+            batch: Список ожидающих записи задач.
+        """
+        with self.app.app_context():
+            try:
+                payloads = save_tasks([pending.data for pending in batch])
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.exception("Failed to write %d tasks", len(batch))
+                with self._lock:
+                    self.failed += len(batch)
+                for pending in batch:
+                    pending.resolve(error=e)
+                return
+            finally:
+                db.session.remove()
+        with self._lock:
+            self.written += len(batch)
+            self.batches += 1
+        for pending, payload in zip(batch, payloads):
+            pending.resolve(payload)
+
+    def drain(self, timeout=30):
+        """
+        Остановка приема задач и запись всех задач из очереди.
+
+        Args:
+            timeout: Максимальное время ожидания записи в секундах.
+        """
+        if not self.enabled or self._stopping.is_set():
+            return
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        """
+        Получение счетчиков очереди записи.
+
+        Returns:
+            dict: Длина очереди и счетчики принятых, отклоненных и записанных
+                задач.
+        """
+        with self._lock:
+            return {
+                "queued": self._queue.qsize() if self._queue else 0,
+                "enqueued": self.enqueued,
+                "rejected": self.rejected,
+                "written": self.written,
+                "batches": self.batches,
+                "failed": self.failed,
+            }
+
+
+task_write_behind = TaskWriteBehind()
@@ -0,0 +1,118 @@
+"""
+Сравнение WSGI-приложения (create_app) и ASGI-приложения (create_asgi_app)
+под одинаковой нагрузкой на общей базе SQLite.
+
+Оба сервера запускаются отдельными процессами: WSGI через многопоточный
+сервер Flask, ASGI через uvicorn.
+
+Запуск: python -m benchmarks.asgi_vs_wsgi --rows 1000 --requests 2000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.load import run_load
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Команды запуска серверов для каждого режима
+SERVERS = {
+    "wsgi": [sys.executable, "-m", "flask", "--app", "run", "run", "--with-threads"],
+    "asgi": [sys.executable, "-m", "uvicorn", "asgi:app", "--log-level", "warning"],
+}
+
+# Маршруты, на которых сравниваются режимы
+ROUTES = {
+    "get_task": "/tasks/1",
+    "get_tasks": "/tasks?limit=50",
+}
+
+
+def seed(database_url, rows):
+    """
+    Создание таблиц и заполнение базы тестовыми задачами.
+
+    Args:
+        database_url: Строка подключения к базе данных.
+        rows: Количество задач.
+    """
+    os.environ["DATABASE_URL"] = database_url
+    from app import create_app
+    from app.bulk import insert_tasks
+    from app.db import db
+
+    with create_app().app_context():
+        db.create_all()
+        insert_tasks([{"title": f"Задача {index}"} for index in range(rows)])
+        db.session.commit()
+
+
+def wait_ready(url, timeout=30):
+    # Ожидание готовности сервера к приему запросов
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def bench_server(mode, port, env, requests, concurrency):
+    """
+    Запуск сервера в заданном режиме и замер всех маршрутов.
+
+    Args:
+        mode: Режим сервера (wsgi или asgi).
+        port: Порт сервера.
+        env: Переменные окружения процесса сервера.
+        requests: Количество запросов на маршрут.
+        concurrency: Количество одновременных запросов.
+
+    Returns:
+        dict: Результаты замера по маршрутам.
+    """
+    command = SERVERS[mode] + ["--port", str(port)]
+    server = subprocess.Popen(command, cwd=ROOT, env=env)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        wait_ready(base_url + ROUTES["get_task"])
+        return {
+            name: run_load(base_url + path, requests, concurrency)
+            for name, path in ROUTES.items()
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=5100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        seed(database_url, args.rows)
+        env = dict(os.environ, DATABASE_URL=database_url, FLASK_ENV="production")
+        results = {
+            mode: bench_server(
+                mode, args.port + index, env, args.requests, args.concurrency
+            )
+            for index, mode in enumerate(SERVERS)
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Отчет о времени импорта модулей при создании приложения.
+
+Запускает отдельный процесс python -X importtime, создающий приложение через
+create_app, и выводит самые медленные модули по суммарному времени импорта
+(с учетом вложенных импортов). С --max-ms завершается с ошибкой, если общее
+время импорта пакета app превышает бюджет, а с --forbid - если при старте
+загружен модуль, который должен импортироваться лениво.
+
+Запуск:
+    python -m benchmarks.importtime --top 20
+    python -m benchmarks.importtime --max-ms 800 --forbid apispec
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Код, выполняемый в отдельном процессе: импорт и создание приложения
+STARTUP_CODE = "from app import create_app; create_app()"
+
+
+def collect(code=STARTUP_CODE):
+    """
+    Запуск кода с -X importtime и разбор отчета интерпретатора.
+
+    Args:
+        code: Код на Python, время импорта которого замеряется.
+
+    Returns:
+        list: Записи (модуль, собственное время, суммарное время, глубина)
+            в порядке завершения импорта; время в миллисекундах.
+    """
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append(
+            (name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth)
+        )
+    return records
+
+
+def report(records, top):
+    """
+    Сводка по замеру времени импорта.
+
+    Args:
+        records: Записи, полученные от collect.
+        top: Количество самых медленных модулей в отчете.
+
+    Returns:
+        dict: Общее время импорта, время пакета app и самые медленные модули.
+    """
+    # Верхний уровень (глубина 0) - модули, импортированные самим кодом
+    total = sum(cumulative for _, _, cumulative, depth in records if depth == 0)
+    app_ms = next((c for name, _, c, d in records if name == "app" and d == 0), 0.0)
+    slowest = sorted(records, key=lambda record: record[2], reverse=True)[:top]
+    return {
+        "total_ms": total,
+        "app_ms": app_ms,
+        "modules": len(records),
+        "slowest": [
+            {"module": name, "self_ms": self_ms, "cumulative_ms": cumulative}
+            for name, self_ms, cumulative, _ in slowest
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--max-ms", type=float, help="Бюджет времени импорта app")
+    parser.add_argument(
+        "--forbid",
+        action="append",
+        default=[],
+        help="Модуль, который не должен загружаться при старте",
+    )
+    parser.add_argument("--json", action="store_true", help="Вывод в формате JSON")
+    args = parser.parse_args()
+
+    records = collect()
+    summary = report(records, args.top)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for item in summary["slowest"]:
+            print(
+                f"{item['cumulative_ms']:14.1f} {item['self_ms']:9.1f}  "
+                f"{item['module']}"
+            )
+        print(f"app: {summary['app_ms']:.1f} ms, total: {summary['total_ms']:.1f} ms")
+
+    failed = False
+    loaded = {name for name, _, _, _ in records}
+    for module in args.forbid:
+        if module in loaded:
+            print(f"Module {module} is imported at startup", file=sys.stderr)
+            failed = True
+    if args.max_ms is not None and summary["app_ms"] > args.max_ms:
+        print(
+            f"Import time of app {summary['app_ms']:.1f} ms exceeds "
+            f"{args.max_ms:.1f} ms",
+            file=sys.stderr,
+        )
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Сравнение кодирования списка задач в JSON и сжатия ответа.
+
+Для каждого размера списка замеряются время кодирования провайдером Flask по
+умолчанию и FastJSONProvider (orjson, если установлен, и стандартная
+библиотека), размер тела и время сжатия gzip/brotli. Перед замером
+проверяется, что все кодировщики дают одинаковые данные.
+
+Запуск: python -m benchmarks.json_encoding --rows 10000,100000
+"""
+
+import argparse
+import json
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.compression import brotli, compress_brotli, compress_gzip
+from app.json_provider import FastJSONProvider, orjson
+from app.serializers import dump_tasks
+
+from .serialization import make_tasks
+
+
+def best_time(function, repeat):
+    # Лучшее время выполнения функции в миллисекундах и ее результат
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def make_encoders():
+    """
+    Создание кодировщиков для сравнения.
+
+    Returns:
+        dict: Имя кодировщика и функция, возвращающая тело ответа (bytes).
+    """
+    app = Flask(__name__)
+    app.config["JSON_FAST_ENCODER"] = False
+    default = DefaultJSONProvider(app)
+    stdlib = FastJSONProvider(app)
+    encoders = {
+        "flask_default": lambda data: default.dumps(
+            data, separators=(",", ":")
+        ).encode(),
+        "stdlib": stdlib.dumps_bytes,
+    }
+    if orjson is not None:
+        app.config["JSON_FAST_ENCODER"] = True
+        encoders["orjson"] = FastJSONProvider(app).dumps_bytes
+    return encoders
+
+
+def run(rows, repeat, gzip_level, brotli_level):
+    """
+    Замер кодирования и сжатия для списка задач заданного размера.
+
+    Args:
+        rows: Количество задач.
+        repeat: Количество повторов, берется лучший результат.
+        gzip_level: Уровень сжатия gzip.
+        brotli_level: Уровень сжатия brotli.
+
+    Returns:
+        dict: Время кодирования и сжатия в миллисекундах и размеры тела.
+    """
+    data = {"items": dump_tasks(make_tasks(rows)), "limit": rows, "next_cursor": None}
+    result = {"rows": rows, "encode_ms": {}, "bytes": {}}
+    body = None
+    for name, encode in make_encoders().items():
+        elapsed, encoded = best_time(lambda: encode(data), repeat)
+        if json.loads(encoded) != data:
+            raise AssertionError(f"{name} output differs from the source data")
+        result["encode_ms"][name] = elapsed
+        result["bytes"][name] = len(encoded)
+        body = encoded  # Сжимается результат самого быстрого доступного кодировщика
+
+    compressors = {"gzip": (compress_gzip, gzip_level)}
+    if brotli is not None:
+        compressors["br"] = (compress_brotli, brotli_level)
+    result["compress_ms"] = {}
+    for name, (compress, level) in compressors.items():
+        elapsed, compressed = best_time(lambda: compress(body, level), repeat)
+        result["compress_ms"][name] = elapsed
+        result["bytes"][name] = len(compressed)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", default="10000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--gzip-level", type=int, default=6)
+    parser.add_argument("--brotli-level", type=int, default=5)
+    args = parser.parse_args()
+    results = [
+        run(int(rows), args.repeat, args.gzip_level, args.brotli_level)
+        for rows in args.rows.split(",")
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Простой генератор HTTP-нагрузки на стандартной библиотеке.
+
+Запуск: python -m benchmarks.load http://127.0.0.1:5000/tasks?limit=50
+"""
+
+import argparse
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values, percent):
+    """
+    Вычисление перцентиля по отсортированному списку значений.
+
+    Args:
+        values: Отсортированный список значений.
+        percent: Перцентиль от 0 до 100.
+
+    Returns:
+        float: Значение перцентиля или 0.0 для пустого списка.
+    """
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def send(url, method="GET", body=None):
+    """
+    Отправка одного запроса с замером времени ответа.
+
+    Args:
+        url: Адрес запроса.
+        method: HTTP-метод.
+        body: Данные для отправки в формате JSON или None.
+
+    Returns:
+        tuple: Время ответа в секундах и признак успешного ответа.
+    """
+    data = None if body is None else json.dumps(body).encode()
+    request = urllib.request.Request(url, data=data, method=method)
+    if data is not None:
+        request.add_header("Content-Type", "application/json")
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+            ok = response.status < 400
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def run_load(url, requests=1000, concurrency=16, method="GET", body=None):
+    """
+    Отправка серии запросов с заданной параллельностью.
+
+    Args:
+        url: Адрес запроса.
+        requests: Общее количество запросов.
+        concurrency: Количество одновременных запросов.
+        method: HTTP-метод.
+        body: Данные для отправки в формате JSON или None.
+
+    Returns:
+        dict: Пропускная способность, задержки p50/p99 в миллисекундах и ошибки.
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda _: send(url, method, body), range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for latency, ok in results if ok)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(1 for _, ok in results if not ok),
+        "rps": len(results) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("url")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    print(json.dumps(run_load(args.url, args.requests, args.concurrency), indent=2))
+
+
+if __name__ == "__main__":
+    main()
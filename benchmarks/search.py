@@ -0,0 +1,115 @@
+"""
+Сравнение полнотекстового поиска (/tasks/search) с поиском подстроки LIKE.
+
+По умолчанию используется SQLite в памяти с таблицей FTS5. DATABASE_URL из
+окружения не используется; для замера на MySQL передайте отдельную базу с уже
+примененными миграциями через --database-url или BENCH_DATABASE_URL.
+
+Запуск: python -m benchmarks.search --rows 100000 --queries 50
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+WORDS = (
+    "купить молоко хлеб отчет встреча позвонить клиент проект релиз сервер "
+    "база данных тест исправить ошибка документация обзор план бюджет счет "
+    "почта договор задача команда спринт дизайн макет ревью деплой миграция"
+).split()
+
+
+def seed(rows):
+    # Заполнение базы задачами со случайными словами в названии и описании
+    from app.bulk import insert_tasks
+    from app.db import db
+
+    random.seed(0)
+    batch = []
+    for index in range(rows):
+        batch.append(
+            {
+                "title": " ".join(random.choices(WORDS, k=3)),
+                # Редкое слово встречается в одной задаче из тысячи
+                "description": " ".join(random.choices(WORDS, k=12))
+                + f" метка{index // 1000}",
+            }
+        )
+        if len(batch) == 1000:
+            insert_tasks(batch)
+            batch = []
+    insert_tasks(batch)
+    db.session.commit()
+
+
+def naive_search(word, limit):
+    # Поиск подстроки без индекса, как без полнотекстового поиска
+    from app.db import db
+    from app.models import Task
+
+    pattern = f"%{word}%"
+    query = (
+        db.select(Task)
+        .where(db.or_(Task.title.like(pattern), Task.description.like(pattern)))
+        .order_by(Task.id)
+        .limit(limit)
+    )
+    return db.session.execute(query).scalars().all()
+
+
+def timed(function, queries):
+    # Среднее время выполнения функции по списку запросов в миллисекундах
+    started = time.perf_counter()
+    for query in queries:
+        function(query)
+    return (time.perf_counter() - started) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("BENCH_DATABASE_URL"),
+        help="Отдельная база для замеров с примененными миграциями",
+    )
+    args = parser.parse_args()
+
+    # Задается до импорта config, поэтому значение из .env не применяется
+    os.environ["DATABASE_URL"] = args.database_url or "sqlite://"
+    from app import create_app
+    from app.db import db
+    from app.search import search_tasks
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            db.create_all()
+            seed(args.rows)
+        common = random.choices(WORDS, k=args.queries)
+        rare = [
+            f"метка{random.randrange(max(args.rows // 1000, 1))}"
+            for _ in range(args.queries)
+        ]
+        result = {
+            "dialect": db.engine.dialect.name,
+            "rows": db.session.execute(
+                db.select(db.func.count()).select_from(db.metadata.tables["task"])
+            ).scalar(),
+        }
+        # Частые слова: LIKE быстро набирает страницу, но не ранжирует выдачу
+        # Редкие слова: LIKE вынужден просмотреть всю таблицу
+        for name, queries in (("common", common), ("rare", rare)):
+            result[name] = {
+                "full_text_ms": timed(lambda q: search_tasks(q, args.limit), queries),
+                "like_scan_ms": timed(lambda q: naive_search(q, args.limit), queries),
+            }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Сравнение сериализации задач через TaskSchema и через быстрый сериализатор.
+
+Перед замером проверяется, что оба пути дают одинаковый JSON (байт в байт).
+
+Запуск: python -m benchmarks.serialization --rows 10000 --repeat 5
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.models import Task
+from app.schemas import TaskSchema
+from app.serializers import dump_tasks
+
+
+def make_tasks(count):
+    """
+    Создание задач в памяти без обращения к базе данных.
+
+    Args:
+        count: Количество задач.
+
+    Returns:
+        list: Список объектов Task.
+    """
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        Task(
+            id=index,
+            title=f"Задача {index}",
+            description=None if index % 3 == 0 else f"Описание задачи {index}",
+            created_at=start + timedelta(seconds=index),
+            updated_at=None if index % 2 else start + timedelta(days=1, seconds=index),
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+def encode(data):
+    # Кодирование так же, как это делает провайдер JSON Flask по умолчанию
+    return json.dumps(data, ensure_ascii=False, sort_keys=True).encode()
+
+
+def measure(dump, tasks, repeat):
+    """
+    Замер скорости сериализации.
+
+    Args:
+        dump: Функция сериализации списка задач.
+        tasks: Список задач.
+        repeat: Количество повторов, берется лучший результат.
+
+    Returns:
+        float: Количество строк в секунду.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        dump(tasks)
+        best = min(best, time.perf_counter() - started)
+    return len(tasks) / best
+
+
+def run(rows, repeat):
+    """
+    Проверка совпадения результатов и замер обоих путей сериализации.
+
+    Args:
+        rows: Количество задач.
+        repeat: Количество повторов замера.
+
+    Returns:
+        dict: Результаты замера в строках в секунду.
+    """
+    tasks = make_tasks(rows)
+    schema = TaskSchema(many=True)
+    if encode(schema.dump(tasks)) != encode(dump_tasks(tasks)):
+        raise AssertionError("Fast serializer output differs from TaskSchema")
+    return {
+        "rows": rows,
+        "schema_rows_per_sec": measure(schema.dump, tasks, repeat),
+        "fast_rows_per_sec": measure(dump_tasks, tasks, repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    result = run(args.rows, args.repeat)
+    print(json.dumps(result, indent=2))
+    speedup = result["fast_rows_per_sec"] / result["schema_rows_per_sec"]
+    print(f"Speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Набор замеров производительности API задач.
+
+Приложение собирается через create_app и обслуживает запросы через тестовый
+клиент Flask (без сетевого сервера), поэтому замеряются маршрутизация,
+валидация, работа с базой и сериализация. Для каждого размера таблицы задачи
+создаются заново, после чего для каждого маршрута из app/routes.py
+измеряются пропускная способность и задержки p50/p99. Отдельно замеряются
+сериализация списка задач и сборка спецификации API.
+
+По умолчанию используется временный файл SQLite. DATABASE_URL из окружения и
+.env не используется никогда; для замера на MySQL передайте отдельную базу
+через --database-url или BENCH_DATABASE_URL (таблица task будет пересоздана).
+
+Запуск:
+    python -m benchmarks.suite --sizes 1000,10000 --output results.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from config import Config
+
+from .load import percentile
+from .serialization import run as run_serialization
+
+# Слова для названий и описаний задач, по которым выполняется поиск
+WORDS = (
+    "отчет встреча клиент проект релиз сервер база тест ошибка документация "
+    "обзор план бюджет договор команда спринт дизайн ревью деплой миграция"
+).split()
+
+
+def make_config(database_url):
+    # Конфигурация приложения для замеров с отдельной базой данных; сегменты
+    # и реплики из окружения отключаются, чтобы не затронуть рабочие базы
+    return type(
+        "BenchmarkConfig",
+        (Config,),
+        {
+            "SQLALCHEMY_DATABASE_URI": database_url,
+            "SQLALCHEMY_BINDS": {},
+            "TASK_SHARD_URLS": [],
+            "DATABASE_REPLICA_URLS": [],
+            "API_SPEC_PRELOAD": False,
+        },
+    )
+
+
+def make_task(index):
+    # Данные задачи для заполнения таблицы и запросов создания
+    return {
+        "title": f"Задача {index} {random.choice(WORDS)}",
+        "description": " ".join(random.choices(WORDS, k=8)),
+    }
+
+
+def seed(size):
+    """
+    Пересоздание таблицы задач и заполнение ее задачами.
+
+    Args:
+        size: Количество задач.
+
+    Returns:
+        list: ID созданных задач.
+    """
+    from app.bulk import insert_tasks
+    from app.db import db
+
+    db.drop_all()
+    db.create_all()
+    ids = []
+    for start in range(0, size, 1000):
+        rows = [make_task(index) for index in range(start, min(start + 1000, size))]
+        ids += [task.id for task in insert_tasks(rows)]
+    db.session.commit()
+    db.session.remove()
+    return ids
+
+
+def measure(client, requests, make_request):
+    """
+    Последовательное выполнение запросов с замером времени ответа.
+
+    Args:
+        client: Тестовый клиент Flask.
+        requests: Количество запросов.
+        make_request: Функция, принимающая номер запроса и возвращающая
+            аргументы client.open.
+
+    Returns:
+        dict: Пропускная способность, задержки p50/p99 в миллисекундах и ошибки.
+    """
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for number in range(requests):
+        kwargs = make_request(number)
+        request_started = time.perf_counter()
+        response = client.open(**kwargs)
+        response.get_data()  # Чтение тела, включая потоковые ответы
+        latencies.append(time.perf_counter() - request_started)
+        if response.status_code >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": requests / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+def scenarios(ids, requests, bulk_size):
+    """
+    Запросы к маршрутам app/routes.py для замера.
+
+    Изменяющие запросы работают с непересекающимися наборами ID, поэтому
+    удаление не мешает чтению и обновлению.
+
+    Args:
+        ids: ID задач в таблице.
+        requests: Количество запросов на маршрут.
+        bulk_size: Количество задач в одном массовом запросе.
+
+    Returns:
+        dict: Имя эндпоинта и функция, строящая аргументы запроса по номеру.
+    """
+    read_ids = ids[: len(ids) // 2]
+    delete_ids = ids[len(ids) // 2 :]
+    bulk_delete_ids = delete_ids[requests:]
+
+    def bulk_ids(number):
+        return bulk_delete_ids[number * bulk_size : (number + 1) * bulk_size]
+
+    return {
+        "tasks.create_task": lambda n: {
+            "path": "/tasks",
+            "method": "POST",
+            "json": make_task(n),
+        },
+        "tasks.get_tasks": lambda n: {"path": "/tasks?limit=100"},
+        "tasks.get_tasks[sort=created_at,desc]": lambda n: {
+            "path": "/tasks?limit=100&sort=created_at&order=desc"
+        },
+        "tasks.get_tasks[stream]": lambda n: {"path": "/tasks?stream=1"},
+        "tasks.search": lambda n: {
+            "path": f"/tasks/search?q={random.choice(WORDS)}&limit=20"
+        },
+        "tasks.get_task": lambda n: {"path": f"/tasks/{random.choice(read_ids)}"},
+        "tasks.update_task": lambda n: {
+            "path": f"/tasks/{random.choice(read_ids)}",
+            "method": "PUT",
+            "json": {"title": f"Обновленная задача {n}"},
+        },
+        "tasks.delete_task": lambda n: {
+            "path": f"/tasks/{delete_ids[n]}",
+            "method": "DELETE",
+        },
+        "tasks.create_tasks_bulk": lambda n: {
+            "path": "/tasks/bulk",
+            "method": "POST",
+            "json": [make_task(index) for index in range(bulk_size)],
+        },
+        "tasks.update_tasks_bulk": lambda n: {
+            "path": "/tasks/bulk",
+            "method": "PUT",
+            "json": [
+                {"id": id, "title": f"Массовое обновление {n}"}
+                for id in random.sample(read_ids, min(bulk_size, len(read_ids)))
+            ],
+        },
+        "tasks.delete_tasks_bulk": lambda n: {
+            "path": "/tasks/bulk",
+            "method": "DELETE",
+            "json": bulk_ids(n),
+        },
+    }
+
+
+def run_routes(app, size, requests, bulk_size):
+    """
+    Замер всех маршрутов на таблице заданного размера.
+
+    Args:
+        app: Экземпляр приложения Flask.
+        size: Количество задач в таблице.
+        requests: Количество запросов на маршрут.
+        bulk_size: Количество задач в одном массовом запросе.
+
+    Returns:
+        dict: Результаты по каждому маршруту.
+    """
+    random.seed(size)
+    with app.app_context():
+        ids = seed(size)
+    client = app.test_client()
+    results = {}
+    for name, make_request in scenarios(ids, requests, bulk_size).items():
+        count = requests
+        if name == "tasks.get_tasks[stream]":
+            count = max(1, requests // 20)  # Каждый запрос выдает всю таблицу
+        elif name == "tasks.delete_tasks_bulk":
+            count = min(requests, (len(ids) // 2 - requests) // bulk_size)
+        if count > 0:
+            results[name] = measure(client, count, make_request)
+    return results
+
+
+def run_spec(app, repeat):
+    """
+    Замер сборки и сериализации спецификации API.
+
+    Args:
+        app: Экземпляр приложения Flask.
+        repeat: Количество повторов, берется лучший результат.
+
+    Returns:
+        dict: Время сборки в миллисекундах и размер спецификации.
+    """
+    from app.docs import dump_apispec
+
+    best = float("inf")
+    with app.app_context():
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = dump_apispec(app)
+            best = min(best, time.perf_counter() - started)
+    return {"build_ms": best * 1000, "bytes": len(body)}
+
+
+def run(sizes, requests, bulk_size, repeat, database_url):
+    """
+    Выполнение всех замеров.
+
+    Args:
+        sizes: Размеры таблицы задач.
+        requests: Количество запросов на маршрут.
+        bulk_size: Количество задач в одном массовом запросе.
+        repeat: Количество повторов замеров сериализации и спецификации.
+        database_url: Строка подключения к базе данных.
+
+    Returns:
+        dict: Результаты замеров.
+    """
+    from app import create_app
+
+    app = create_app(make_config(database_url))
+    return {
+        "python": sys.version.split()[0],
+        "database": database_url.split(":", 1)[0],
+        "routes": {
+            str(size): run_routes(app, size, requests, bulk_size) for size in sizes
+        },
+        "serialization": {str(size): run_serialization(size, repeat) for size in sizes},
+        "spec": run_spec(app, repeat),
+    }
+
+
+def flatten(results, prefix=""):
+    # Преобразование вложенных результатов в пары "путь.к.метрике": значение
+    items = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            items.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, float):
+            items[prefix + key] = value
+    return items
+
+
+def compare(results, baseline, tolerance):
+    """
+    Сравнение результатов с сохраненным базовым замером.
+
+    Для задержек рост означает ухудшение, для пропускной способности -
+    снижение.
+
+    Args:
+        results: Текущие результаты.
+        baseline: Базовые результаты.
+        tolerance: Допустимое относительное ухудшение (0.2 - на 20%).
+
+    Returns:
+        list: Метрики с ухудшением больше допустимого: имя, базовое и
+            текущее значения, относительное изменение.
+    """
+    current = flatten(results)
+    regressions = []
+    for name, before in flatten(baseline).items():
+        after = current.get(name)
+        if after is None or not before:
+            continue
+        change = (after - before) / before
+        higher_is_better = name.endswith(("rps", "per_sec"))
+        worse = -change if higher_is_better else change
+        if worse > tolerance:
+            regressions.append((name, before, after, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--bulk-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Файл для записи результатов в JSON")
+    parser.add_argument("--baseline", help="Файл с базовыми результатами")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("BENCH_DATABASE_URL"),
+        help="Отдельная база для замеров, таблица task будет пересоздана",
+    )
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or "sqlite:///" + os.path.join(
+            directory, "benchmark.db"
+        )
+        results = run(sizes, args.requests, args.bulk_size, args.repeat, database_url)
+
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for name, before, after, change in regressions:
+            print(
+                f"REGRESSION {name}: {before:.3f} -> {after:.3f} ({change:+.0%})",
+                file=sys.stderr,
+            )
+        if regressions:
+            sys.exit(1)  # Ненулевой код завершения для проверки в CI
+
+
+if __name__ == "__main__":
+    main()
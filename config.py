@@ -4,9 +4,279 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def with_driver(uri):
+    # Замена драйвера в строке подключения на DATABASE_DRIVER, если он задан
+    driver = os.getenv("DATABASE_DRIVER")
+    if not uri or not driver:
+        return uri
+    scheme, separator, rest = uri.partition("://")
+    return f"{scheme.split('+')[0]}+{driver}{separator}{rest}"
+
+
+def get_database_uri():
+    """
+    Получение строки подключения с учетом выбранного драйвера MySQL.
+
+    Returns:
+        str: Строка подключения из DATABASE_URL, в которой драйвер заменен
+            на DATABASE_DRIVER (pymysql или mysqlconnector), если он задан.
+    """
+    return with_driver(os.getenv("DATABASE_URL"))
+
+
+def get_engine_options():
+    """
+    Получение параметров движка и пула соединений из переменных окружения.
+
+    Незаданные параметры не передаются, чтобы действовали значения по
+    умолчанию выбранного пула (например, SingletonThreadPool для SQLite
+    в памяти не принимает max_overflow и pool_timeout).
+
+    Returns:
+        dict: Параметры для SQLALCHEMY_ENGINE_OPTIONS.
+    """
+    options = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+    for name, option, cast in (
+        ("DB_POOL_SIZE", "pool_size", int),
+        ("DB_MAX_OVERFLOW", "max_overflow", int),
+        ("DB_POOL_RECYCLE", "pool_recycle", int),
+        ("DB_POOL_TIMEOUT", "pool_timeout", float),
+    ):
+        value = os.getenv(name)
+        if value is not None:
+            options[option] = cast(value)
+    return options
+
+
+def get_database_urls(name):
+    """
+    Получение списка строк подключения из переменной окружения.
+
+    Args:
+        name: Имя переменной со строками подключения через запятую.
+
+    Returns:
+        list: Строки подключения с драйвером DATABASE_DRIVER, если он задан;
+            пустой список, если переменная не задана.
+    """
+    urls = os.getenv(name, "").split(",")
+    return [with_driver(url.strip()) for url in urls if url.strip()]
+
+
+# Стоимость по умолчанию: списки и массовые операции дороже чтения одной
+# задачи, метрики не ограничиваются
+DEFAULT_RATE_LIMIT_COSTS = (
+    "tasks.get_tasks=5,tasks.search=5,tasks.create_tasks_bulk=10,"
+    "tasks.update_tasks_bulk=10,tasks.delete_tasks_bulk=10,metrics=0"
+)
+
+
+def get_rate_limit_costs():
+    """
+    Получение стоимости запросов к эндпоинтам для ограничения частоты.
+
+    Returns:
+        dict: Стоимость в токенах по имени эндпоинта из RATE_LIMIT_COSTS
+            (endpoint=cost через запятую); незаданные эндпоинты стоят 1 токен.
+    """
+    costs = {}
+    for item in os.getenv("RATE_LIMIT_COSTS", DEFAULT_RATE_LIMIT_COSTS).split(","):
+        if item.strip():
+            endpoint, _, cost = item.partition("=")
+            costs[endpoint.strip()] = float(cost)
+    return costs
+
+
 class Config:
     FLASK_APP = os.getenv("FLASK_APP")
     FLASK_ENV = os.getenv("FLASK_ENV")
     DEBUG = FLASK_ENV == "development"
-    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
+    SQLALCHEMY_DATABASE_URI = get_database_uri()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = get_engine_options()
+
+    # Сегменты хранилища задач (отдельные базы данных): без них задачи хранятся
+    # в основной базе. Распределение по хэшу id (hash) или по диапазонам id
+    # (range, TASK_SHARD_RANGES - нижние границы сегментов 1..N-1 в виде id или
+    # даты ISO 8601). TASK_ID_WORKER_ID (0-127) обязателен с сегментами и
+    # должен быть уникален для каждого процесса, создающего задачи
+    TASK_SHARD_URLS = get_database_urls("TASK_SHARD_URLS")
+    TASK_SHARD_STRATEGY = os.getenv("TASK_SHARD_STRATEGY", "hash")
+    TASK_SHARD_RANGES = [
+        value.strip()
+        for value in os.getenv("TASK_SHARD_RANGES", "").split(",")
+        if value.strip()
+    ]
+    TASK_ID_WORKER_ID = (
+        int(os.environ["TASK_ID_WORKER_ID"]) if os.getenv("TASK_ID_WORKER_ID") else None
+    )
+
+    # Реплики основной базы для обработчиков, которые только читают данные:
+    # выбор по очереди (round_robin) или наименее загруженной (least_loaded).
+    # После записи клиент читает из основной базы DATABASE_REPLICA_STICKY_SECONDS
+    # секунд (cookie DATABASE_REPLICA_STICKY_COOKIE); реплика, завершившая
+    # запрос ошибкой соединения, исключается на DATABASE_REPLICA_RETRY_SECONDS
+    DATABASE_REPLICA_URLS = get_database_urls("DATABASE_REPLICA_URLS")
+    DATABASE_REPLICA_STRATEGY = os.getenv("DATABASE_REPLICA_STRATEGY", "round_robin")
+    DATABASE_REPLICA_STICKY_SECONDS = int(
+        os.getenv("DATABASE_REPLICA_STICKY_SECONDS", 5)
+    )
+    DATABASE_REPLICA_STICKY_COOKIE = os.getenv(
+        "DATABASE_REPLICA_STICKY_COOKIE", "read_primary_until"
+    )
+    DATABASE_REPLICA_RETRY_SECONDS = float(
+        os.getenv("DATABASE_REPLICA_RETRY_SECONDS", 30)
+    )
+
+    # Дополнительные базы Flask-SQLAlchemy: сегменты и реплики
+    SQLALCHEMY_BINDS = {
+        **{f"task_shard_{shard}": url for shard, url in enumerate(TASK_SHARD_URLS)},
+        **{
+            f"replica_{replica}": url
+            for replica, url in enumerate(DATABASE_REPLICA_URLS)
+        },
+    }
+
+    # Количество соединений, открываемых при старте приложения
+    DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", 0))
+
+    # Постраничная выдача списка задач
+    TASKS_PAGE_SIZE = int(os.getenv("TASKS_PAGE_SIZE", 100))
+    TASKS_MAX_PAGE_SIZE = int(os.getenv("TASKS_MAX_PAGE_SIZE", 1000))
+    TASKS_STREAM_CHUNK_SIZE = int(os.getenv("TASKS_STREAM_CHUNK_SIZE", 1000))
+
+    # Максимальное количество элементов в одном массовом запросе
+    TASKS_BULK_MAX_ITEMS = int(os.getenv("TASKS_BULK_MAX_ITEMS", 1000))
+
+    # Документация API (/docs, /swagger.json); модули apispec загружаются при
+    # первой сборке спецификации
+    DOCS_ENABLED = os.getenv("DOCS_ENABLED", "true").lower() == "true"
+
+    # Спецификация API: сборка при старте и путь к заранее собранному файлу
+    API_SPEC_PRELOAD = os.getenv("API_SPEC_PRELOAD", "false").lower() == "true"
+    API_SPEC_FILE = os.getenv("API_SPEC_FILE")
+
+    # Кэш чтения задач по id: lru (в памяти процесса), shared (внешнее хранилище)
+    # или none. Исполнитель задач (flask run-worker) работает только с shared
+    # и внешним клиентом или с none: инвалидация lru не доходит до веб-процессов
+    TASK_CACHE_BACKEND = os.getenv("TASK_CACHE_BACKEND", "lru")
+    TASK_CACHE_MAXSIZE = int(os.getenv("TASK_CACHE_MAXSIZE", 10000))
+    TASK_CACHE_TTL = int(os.getenv("TASK_CACHE_TTL", 60))
+    TASK_CACHE_CLIENT = os.getenv("TASK_CACHE_CLIENT", "app.cache:LocalSharedClient")
+
+    # Метрики запросов (/metrics, Server-Timing): порог медленного SQL-запроса
+    # в миллисекундах и число повторов одного запроса, считающееся N+1
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_SLOW_QUERY_MS = float(os.getenv("METRICS_SLOW_QUERY_MS", 100))
+    METRICS_N_PLUS_ONE_THRESHOLD = int(os.getenv("METRICS_N_PLUS_ONE_THRESHOLD", 10))
+
+    # Профилирование выборочных запросов: доля запросов при PROFILING_ENABLED,
+    # секрет для подписи заголовка X-Profile-Token, минимальная длительность
+    # сохраняемого запроса, каталог и размер кольцевого буфера профилей, токен
+    # доступа к /admin/profiles
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 0.01))
+    PROFILING_SECRET = os.getenv("PROFILING_SECRET")
+    PROFILING_MIN_DURATION_MS = float(os.getenv("PROFILING_MIN_DURATION_MS", 0))
+    PROFILING_DIR = os.getenv("PROFILING_DIR")
+    PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", 100))
+    PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN")
+
+    # Лента изменений задач: задержка выдачи незафиксированных изменений,
+    # интервал опроса базы и максимальное время длинного опроса в секундах,
+    # интервал комментариев SSE и срок хранения записей об удалениях в днях
+    TASK_CHANGES_SETTLE_SECONDS = float(os.getenv("TASK_CHANGES_SETTLE_SECONDS", 1))
+    TASK_CHANGES_POLL_INTERVAL = float(os.getenv("TASK_CHANGES_POLL_INTERVAL", 0.5))
+    TASK_CHANGES_MAX_WAIT = float(os.getenv("TASK_CHANGES_MAX_WAIT", 30))
+    TASK_CHANGES_KEEPALIVE = float(os.getenv("TASK_CHANGES_KEEPALIVE", 15))
+    TASK_TOMBSTONE_RETENTION_DAYS = int(os.getenv("TASK_TOMBSTONE_RETENTION_DAYS", 30))
+
+    # Отложенная пакетная запись новых задач: подтверждение после записи (flush)
+    # или после постановки в очередь (enqueue), размер очереди и пачки, интервал
+    # записи и время ожидания места в очереди и записи в секундах
+    TASK_WRITE_BEHIND = os.getenv("TASK_WRITE_BEHIND", "false").lower() == "true"
+    TASK_WRITE_BEHIND_ACK = os.getenv("TASK_WRITE_BEHIND_ACK", "flush")
+    TASK_WRITE_BEHIND_QUEUE_SIZE = int(os.getenv("TASK_WRITE_BEHIND_QUEUE_SIZE", 10000))
+    TASK_WRITE_BEHIND_BATCH_SIZE = int(os.getenv("TASK_WRITE_BEHIND_BATCH_SIZE", 500))
+    TASK_WRITE_BEHIND_FLUSH_INTERVAL = float(
+        os.getenv("TASK_WRITE_BEHIND_FLUSH_INTERVAL", 0.05)
+    )
+    TASK_WRITE_BEHIND_ENQUEUE_TIMEOUT = float(
+        os.getenv("TASK_WRITE_BEHIND_ENQUEUE_TIMEOUT", 0)
+    )
+    TASK_WRITE_BEHIND_ACK_TIMEOUT = float(os.getenv("TASK_WRITE_BEHIND_ACK_TIMEOUT", 5))
+
+    # Исполнитель задач (flask run-worker): обработчик в формате module:function,
+    # пул потоков или процессов и его размер, размер пачки захвата, интервал
+    # опроса и срок аренды задачи в секундах, количество попыток, задержка
+    # первого повтора и наибольшая задержка в секундах, интервал записи
+    # статистики в журнал
+    TASK_EXECUTOR_HANDLER = os.getenv("TASK_EXECUTOR_HANDLER", "app.executor:log_task")
+    TASK_EXECUTOR_POOL = os.getenv("TASK_EXECUTOR_POOL", "thread")
+    TASK_EXECUTOR_CONCURRENCY = int(os.getenv("TASK_EXECUTOR_CONCURRENCY", 4))
+    TASK_EXECUTOR_BATCH_SIZE = int(os.getenv("TASK_EXECUTOR_BATCH_SIZE", 100))
+    TASK_EXECUTOR_POLL_INTERVAL = float(os.getenv("TASK_EXECUTOR_POLL_INTERVAL", 1))
+    TASK_EXECUTOR_LEASE_SECONDS = float(os.getenv("TASK_EXECUTOR_LEASE_SECONDS", 60))
+    TASK_EXECUTOR_MAX_ATTEMPTS = int(os.getenv("TASK_EXECUTOR_MAX_ATTEMPTS", 5))
+    TASK_EXECUTOR_RETRY_BASE = float(os.getenv("TASK_EXECUTOR_RETRY_BASE", 1))
+    TASK_EXECUTOR_RETRY_MAX = float(os.getenv("TASK_EXECUTOR_RETRY_MAX", 3600))
+    TASK_EXECUTOR_STATS_INTERVAL = float(os.getenv("TASK_EXECUTOR_STATS_INTERVAL", 60))
+
+    # Ограничение частоты запросов клиента корзиной токенов: скорость пополнения
+    # в токенах в секунду, емкость корзины, стоимость эндпоинтов, заголовок с
+    # ключом клиента (без него - IP-адрес) и хранилище корзин: memory (в памяти
+    # процесса) или shared (внешнее хранилище с клиентом RATE_LIMIT_CLIENT).
+    # Заголовок с ключом принимается только от доверенных прокси
+    # RATE_LIMIT_TRUSTED_PROXIES (адреса или сети через запятую), которые
+    # устанавливают его сами после проверки клиента
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
+    RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", 10))
+    RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", 50))
+    RATE_LIMIT_COSTS = get_rate_limit_costs()
+    RATE_LIMIT_KEY_HEADER = os.getenv("RATE_LIMIT_KEY_HEADER")
+    RATE_LIMIT_TRUSTED_PROXIES = [
+        proxy.strip()
+        for proxy in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "").split(",")
+        if proxy.strip()
+    ]
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_CLIENT = os.getenv("RATE_LIMIT_CLIENT", "app.cache:LocalSharedClient")
+    RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", 100000))
+
+    # Предел одновременно обрабатываемых запросов процесса: 0 - по размеру пула
+    # соединений основной базы (pool_size + max_overflow), -1 - без предела;
+    # время ожидания свободного места до отказа 503 и значение Retry-After.
+    # Эндпоинты ADMISSION_EXEMPT_ENDPOINTS (длинный опрос ленты изменений не
+    # держит соединение во время ожидания) в пределе не учитываются
+    ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", 0))
+    ADMISSION_EXEMPT_ENDPOINTS = [
+        endpoint.strip()
+        for endpoint in os.getenv(
+            "ADMISSION_EXEMPT_ENDPOINTS", "tasks.get_changes"
+        ).split(",")
+        if endpoint.strip()
+    ]
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 0.5))
+    ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", 1))
+
+    # Кодирование JSON через orjson, если пакет установлен
+    JSON_FAST_ENCODER = os.getenv("JSON_FAST_ENCODER", "true").lower() == "true"
+
+    # Сжатие ответов gzip/brotli (brotli - если установлен пакет brotli) для
+    # ответов не меньше COMPRESSION_MIN_SIZE байт
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+    COMPRESSION_BROTLI_LEVEL = int(os.getenv("COMPRESSION_BROTLI_LEVEL", 5))
+    COMPRESSION_MIMETYPES = (
+        "application/json",
+        "application/x-ndjson",
+        "text/plain",
+        "text/html",
+    )
+
+    # Строка подключения для ASGI-режима; по умолчанию DATABASE_URL с асинхронным
+    # драйвером (aiosqlite, aiomysql)
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
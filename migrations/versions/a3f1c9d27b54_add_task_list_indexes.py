@@ -0,0 +1,36 @@
+"""Add indexes for task list filtering and sorting.
+
+Revision ID: a3f1c9d27b54
+Revises: 315e0ea04103
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a3f1c9d27b54"
+down_revision = "315e0ea04103"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Индексы для фильтрации по диапазонам и keyset-пагинации при сортировке
+    # по полю: вторичные индексы содержат первичный ключ, поэтому порядок
+    # (поле, id) обслуживается без сортировки
+    with op.batch_alter_table("task", schema=None) as batch_op:
+        batch_op.create_index(batch_op.f("ix_task_title"), ["title"], unique=False)
+        batch_op.create_index(
+            batch_op.f("ix_task_created_at"), ["created_at"], unique=False
+        )
+        batch_op.create_index(
+            batch_op.f("ix_task_updated_at"), ["updated_at"], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("task", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_task_updated_at"))
+        batch_op.drop_index(batch_op.f("ix_task_created_at"))
+        batch_op.drop_index(batch_op.f("ix_task_title"))
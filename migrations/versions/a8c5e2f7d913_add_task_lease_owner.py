@@ -0,0 +1,26 @@
+"""Add task lease owner for executor result fencing.
+
+Revision ID: a8c5e2f7d913
+Revises: f3a9d2c6b814
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "a8c5e2f7d913"
+down_revision = "f3a9d2c6b814"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Колонка добавляется без пересоздания таблицы (batch-режим в SQLite
+    # потерял бы индекс по выражению и триггеры полнотекстового индекса)
+    op.add_column("task", sa.Column("lease_owner", sa.String(length=32)))
+
+
+def downgrade():
+    op.drop_column("task", "lease_owner")
@@ -0,0 +1,42 @@
+"""Limit the full-text update trigger to title and description changes.
+
+Revision ID: b4f6d1e8c257
+Revises: a8c5e2f7d913
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b4f6d1e8c257"
+down_revision = "a8c5e2f7d913"
+branch_labels = None
+depends_on = None
+
+# Тело триггера: замена записи задачи в полнотекстовой таблице
+UPDATE_TRIGGER_BODY = (
+    "BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END"
+)
+
+
+def upgrade():
+    # Изменения состояния, аренды и версии задачи не переиндексируют текст
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS task_fts_update")
+        op.execute(
+            "CREATE TRIGGER task_fts_update "
+            "AFTER UPDATE OF title, description ON task " + UPDATE_TRIGGER_BODY
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS task_fts_update")
+        op.execute(
+            "CREATE TRIGGER task_fts_update AFTER UPDATE ON task " + UPDATE_TRIGGER_BODY
+        )
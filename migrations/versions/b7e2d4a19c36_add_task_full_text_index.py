@@ -0,0 +1,60 @@
+"""Add full-text index over task title and description.
+
+Revision ID: b7e2d4a19c36
+Revises: a3f1c9d27b54
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b7e2d4a19c36"
+down_revision = "a3f1c9d27b54"
+branch_labels = None
+depends_on = None
+
+# Полнотекстовая таблица FTS5 для SQLite, синхронизируемая с task триггерами
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5("
+    "title, description, content='task', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_insert AFTER INSERT ON task BEGIN "
+    "INSERT INTO task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_delete AFTER DELETE ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_update "
+    "AFTER UPDATE OF title, description ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    # Индексация задач, созданных до миграции
+    "INSERT INTO task_fts(task_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "mysql":
+        op.create_index(
+            "ft_task_title_description",
+            "task",
+            ["title", "description"],
+            unique=False,
+            mysql_prefix="FULLTEXT",
+        )
+    elif dialect == "sqlite":
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "mysql":
+        op.drop_index("ft_task_title_description", table_name="task")
+    elif dialect == "sqlite":
+        for trigger in ("task_fts_insert", "task_fts_delete", "task_fts_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS task_fts")
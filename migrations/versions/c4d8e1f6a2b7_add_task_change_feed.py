@@ -0,0 +1,42 @@
+"""Add task tombstones and change time index for the change feed.
+
+Revision ID: c4d8e1f6a2b7
+Revises: b7e2d4a19c36
+Create Date: 2026-10-18 19:40:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c4d8e1f6a2b7"
+down_revision = "b7e2d4a19c36"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Записи об удаленных задачах; AUTOINCREMENT в SQLite исключает повторное
+    # использование id после очистки старых записей
+    op.create_table(
+        "task_tombstone",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sqlite_autoincrement=True,
+    )
+    # Индекс по времени последнего изменения задачи (функциональный индекс
+    # MySQL 8.0.13+ и индекс по выражению SQLite)
+    op.create_index(
+        "ix_task_changed_at",
+        "task",
+        [sa.func.coalesce(sa.column("updated_at"), sa.column("created_at"))],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_task_changed_at", table_name="task")
+    op.drop_table("task_tombstone")
@@ -0,0 +1,80 @@
+"""Add task execution state columns and claim index.
+
+Revision ID: d2a7f3b91e05
+Revises: c4d8e1f6a2b7
+Create Date: 2026-10-18 21:10:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "d2a7f3b91e05"
+down_revision = "c4d8e1f6a2b7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Колонки добавляются без пересоздания таблицы (batch-режим в SQLite
+    # потерял бы индекс по выражению и триггеры полнотекстового индекса)
+    op.add_column(
+        "task",
+        sa.Column(
+            "status", sa.String(length=16), nullable=False, server_default="pending"
+        ),
+    )
+    op.add_column(
+        "task", sa.Column("priority", sa.Integer(), nullable=False, server_default="0")
+    )
+    # SQLite не допускает добавление NOT NULL колонки без постоянного значения
+    # по умолчанию, поэтому оно задается на время заполнения
+    op.add_column(
+        "task",
+        sa.Column(
+            "scheduled_at",
+            sa.DateTime(),
+            nullable=False,
+            server_default="1970-01-01 00:00:00",
+        ),
+    )
+    op.add_column(
+        "task", sa.Column("attempts", sa.Integer(), nullable=False, server_default="0")
+    )
+    op.add_column("task", sa.Column("last_error", sa.Text(), nullable=True))
+
+    # Существующие задачи готовы к запуску с момента создания
+    task = sa.table(
+        "task", sa.column("scheduled_at", sa.DateTime), sa.column("created_at")
+    )
+    op.execute(
+        task.update().values(
+            scheduled_at=sa.func.coalesce(
+                task.c.created_at, sa.func.current_timestamp()
+            )
+        )
+    )
+    if op.get_bind().dialect.name != "sqlite":
+        op.alter_column(
+            "task",
+            "scheduled_at",
+            existing_type=sa.DateTime(),
+            existing_nullable=False,
+            server_default=None,
+        )
+
+    # Выборка готовых задач: равенство по состоянию и приоритету, диапазон
+    # и порядок по времени запуска
+    op.create_index(
+        "ix_task_claim", "task", ["status", "priority", "scheduled_at"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_task_claim", table_name="task")
+    op.drop_column("task", "last_error")
+    op.drop_column("task", "attempts")
+    op.drop_column("task", "scheduled_at")
+    op.drop_column("task", "priority")
+    op.drop_column("task", "status")
@@ -0,0 +1,58 @@
+"""Widen task ids to 64-bit integers.
+
+Revision ID: e6b1c8d4f370
+Revises: d2a7f3b91e05
+Create Date: 2026-10-18 23:40:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "e6b1c8d4f370"
+down_revision = "d2a7f3b91e05"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # В SQLite INTEGER уже 64-битный, а изменение типа первичного ключа
+    # потребовало бы пересоздания таблицы
+    if op.get_bind().dialect.name == "sqlite":
+        return
+    op.alter_column(
+        "task",
+        "id",
+        existing_type=sa.Integer(),
+        type_=sa.BigInteger(),
+        existing_nullable=False,
+        autoincrement=True,
+    )
+    op.alter_column(
+        "task_tombstone",
+        "task_id",
+        existing_type=sa.Integer(),
+        type_=sa.BigInteger(),
+        existing_nullable=False,
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        return
+    op.alter_column(
+        "task_tombstone",
+        "task_id",
+        existing_type=sa.BigInteger(),
+        type_=sa.Integer(),
+        existing_nullable=False,
+    )
+    op.alter_column(
+        "task",
+        "id",
+        existing_type=sa.BigInteger(),
+        type_=sa.Integer(),
+        existing_nullable=False,
+        autoincrement=True,
+    )
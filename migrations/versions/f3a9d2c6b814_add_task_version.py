@@ -0,0 +1,29 @@
+"""Add task version counter for ETag and If-Match.
+
+Revision ID: f3a9d2c6b814
+Revises: e6b1c8d4f370
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "f3a9d2c6b814"
+down_revision = "e6b1c8d4f370"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Колонка добавляется без пересоздания таблицы (batch-режим в SQLite
+    # потерял бы индекс по выражению и триггеры полнотекстового индекса)
+    op.add_column(
+        "task",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade():
+    op.drop_column("task", "version")
@@ -0,0 +1,81 @@
+import pytest
+
+from app import create_app
+from app.db import db
+from app.write_behind import task_write_behind
+from config import Config
+
+
+@pytest.fixture
+def config():
+    # Настройки приложения, общие для тестов модуля (например, пути к базам
+    # во временном каталоге); модуль переопределяет эту фикстуру
+    return {}
+
+
+@pytest.fixture
+def make_app(request, tmp_path, config):
+    # Создание приложения с отдельной базой SQLite для каждого теста; сегменты,
+    # реплики и ограничения частоты из окружения не используются. Настройки
+    # теста задаются маркерами @pytest.mark.config(...) модуля и теста
+    overrides = {}
+    for marker in reversed(list(request.node.iter_markers("config"))):
+        overrides.update(marker.kwargs)
+
+    def make(**values):
+        return create_app(
+            type(
+                "TestConfig",
+                (Config,),
+                {
+                    "TESTING": True,
+                    "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+                    "SQLALCHEMY_BINDS": {},
+                    "TASK_SHARD_URLS": [],
+                    "DATABASE_REPLICA_URLS": [],
+                    "TASK_CACHE_BACKEND": "lru",
+                    "TASK_WRITE_BEHIND": False,
+                    "RATE_LIMIT_ENABLED": False,
+                    "ADMISSION_MAX_CONCURRENCY": -1,
+                    "COMPRESSION_ENABLED": False,
+                    "PROFILING_ENABLED": False,
+                    "DOCS_ENABLED": False,
+                    "API_SPEC_PRELOAD": False,
+                    **config,
+                    **overrides,
+                    **values,
+                },
+            )
+        )
+
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        # Только основная база: метаданные дополнительных баз остаются в db
+        # после тестов с сегментами и репликами
+        db.create_all(bind_key=None)
+        yield app
+        task_write_behind.drain()  # Остановка фонового потока записи
+        db.session.remove()
+        db.drop_all(bind_key=None)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def create_task(client):
+    # Создание задачи через API; возвращает ее данные
+    def create(**data):
+        data.setdefault("title", "Task")
+        response = client.post("/tasks", json=data)
+        assert response.status_code == 201
+        return response.get_json()
+
+    return create
@@ -0,0 +1,89 @@
+import pytest
+
+from app.admission import admission_control
+
+pytestmark = pytest.mark.config(
+    RATE_LIMIT_ENABLED=True,
+    RATE_LIMIT_RATE=1,
+    RATE_LIMIT_BURST=3,
+    RATE_LIMIT_COSTS={"tasks.get_tasks": 3, "metrics": 0},
+)
+
+
+def test_requests_over_burst_get_429(client, create_task):
+    id = create_task()["id"]
+    before = admission_control.stats()
+    assert client.get(f"/tasks/{id}").status_code == 200
+    assert client.get(f"/tasks/{id}").status_code == 200
+
+    response = client.get(f"/tasks/{id}")
+    assert response.status_code == 429
+    assert response.get_json() == {"error": "Too many requests"}
+    assert response.headers["Retry-After"] == "1"
+    limited = admission_control.stats()["rate_limited_total"]
+    assert limited - before["rate_limited_total"] == 1
+
+
+def test_expensive_endpoint_uses_more_tokens(client):
+    assert client.get("/tasks").status_code == 200
+    response = client.get("/tasks")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"  # Корзина пуста, нужно 3 токена
+
+
+def test_metrics_are_not_limited(client):
+    for _ in range(5):
+        assert client.get("/metrics").status_code == 200
+    assert client.get("/tasks").status_code == 200
+
+
+@pytest.mark.config(
+    RATE_LIMIT_KEY_HEADER="X-Api-Key", RATE_LIMIT_TRUSTED_PROXIES=["127.0.0.1"]
+)
+def test_key_header_from_trusted_proxy(client):
+    assert client.get("/tasks", headers={"X-Api-Key": "a"}).status_code == 200
+    assert client.get("/tasks", headers={"X-Api-Key": "a"}).status_code == 429
+    assert client.get("/tasks", headers={"X-Api-Key": "b"}).status_code == 200
+
+    # Заголовок клиента не через прокси не учитывается: лимит по IP-адресу
+    direct = {"REMOTE_ADDR": "10.0.0.5"}
+    for key in ("c", "d"):
+        response = client.get("/tasks", headers={"X-Api-Key": key}, environ_base=direct)
+        assert response.status_code == (200 if key == "c" else 429)
+
+
+def test_key_header_requires_trusted_proxies(make_app):
+    with pytest.raises(ValueError, match="RATE_LIMIT_TRUSTED_PROXIES"):
+        make_app(RATE_LIMIT_KEY_HEADER="X-Api-Key")
+
+
+def test_costs_above_burst_are_rejected(make_app):
+    with pytest.raises(ValueError, match="tasks.get_tasks"):
+        make_app(RATE_LIMIT_COSTS={"tasks.get_tasks": 5})
+
+
+@pytest.mark.config(
+    RATE_LIMIT_ENABLED=False,
+    ADMISSION_MAX_CONCURRENCY=1,
+    ADMISSION_QUEUE_TIMEOUT=0.05,
+    ADMISSION_RETRY_AFTER=7,
+)
+def test_requests_are_shed_without_free_slots(client):
+    before = admission_control.stats()
+    assert admission_control.slots.acquire()  # Место занято другим запросом
+    try:
+        response = client.get("/tasks")
+        assert response.status_code == 503
+        assert response.get_json() == {"error": "Server is overloaded"}
+        assert response.headers["Retry-After"] == "7"
+        shed = admission_control.stats()["shed_total"]
+        assert shed - before["shed_total"] == 1
+
+        # Длинный опрос ленты изменений не занимает место
+        assert client.get("/tasks/changes").status_code == 200
+    finally:
+        admission_control.slots.release()
+
+    assert client.get("/tasks").status_code == 200
+    assert client.get("/tasks").status_code == 200  # Место освобождено
+    assert admission_control.stats()["in_flight"] == 0
@@ -0,0 +1,41 @@
+def test_bulk_create_reports_each_item(client):
+    response = client.post("/tasks/bulk", json=[{"title": "A"}, {}, {"title": "B"}])
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == [201, 400, 201]
+    assert [results[0]["task"]["title"], results[2]["task"]["title"]] == ["A", "B"]
+    assert "title" in results[1]["errors"]
+
+
+def test_bulk_update_bumps_versions(client, create_task):
+    first = create_task(title="A")
+    second = create_task(title="B")
+    response = client.put(
+        "/tasks/bulk",
+        json=[
+            {"id": first["id"], "title": "A2"},
+            {"id": second["id"], "description": "Описание"},
+            {"id": 999, "title": "Missing"},
+            {"id": first["id"], "title": "Duplicate"},
+        ],
+    )
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == [200, 200, 404, 400]
+    assert results[0]["task"]["title"] == "A2"
+    assert results[0]["task"]["version"] == first["version"] + 1
+    assert results[1]["task"]["description"] == "Описание"
+    assert results[1]["task"]["title"] == "B"
+    assert client.get(f"/tasks/{first['id']}").get_json()["title"] == "A2"
+
+
+def test_bulk_delete(client, create_task):
+    task = create_task()
+    response = client.delete("/tasks/bulk", json=[task["id"], 999])
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == [200, 404]
+    assert client.get(f"/tasks/{task['id']}").status_code == 404
+
+
+def test_bulk_rejects_non_array(client):
+    assert client.post("/tasks/bulk", json={"title": "A"}).status_code == 400
+    assert client.delete("/tasks/bulk", json=["1"]).status_code == 400
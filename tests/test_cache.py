@@ -0,0 +1,70 @@
+import time
+
+from app.cache import LocalSharedClient, LRUCache, SharedCache, task_cache
+from app.db import db
+from app.models import Task
+
+
+def test_lru_cache_evicts_oldest_entry():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # a становится самой новой записью
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_shared_cache_round_trip():
+    cache = SharedCache(LocalSharedClient(), ttl=60)
+    cache.set("a", {"id": 1})
+    assert cache.get("a") == {"id": 1}
+    cache.delete("a")
+    assert cache.get("a") is None
+
+
+def test_process_local_backends(app):
+    assert task_cache.is_process_local()  # lru в тестовой конфигурации
+    backend = task_cache.backend
+    try:
+        task_cache.backend = SharedCache(LocalSharedClient())
+        assert task_cache.is_process_local()
+        task_cache.backend = SharedCache(object())
+        assert not task_cache.is_process_local()
+    finally:
+        task_cache.backend = backend
+
+
+def test_get_task_is_served_from_cache(client, create_task):
+    task = create_task(title="Cached")
+    assert client.get(f"/tasks/{task['id']}").status_code == 200
+    # Изменение в обход API не видно, пока запись кэша не устарела
+    db.session.execute(
+        db.update(Task).where(Task.id == task["id"]).values(title="Changed")
+    )
+    db.session.commit()
+    assert client.get(f"/tasks/{task['id']}").get_json()["title"] == "Cached"
+
+
+def test_update_refreshes_cache(client, create_task):
+    task = create_task(title="Old")
+    client.get(f"/tasks/{task['id']}")
+    client.put(f"/tasks/{task['id']}", json={"title": "New"})
+    assert task_cache.get(task["id"])["title"] == "New"
+    assert client.get(f"/tasks/{task['id']}").get_json()["title"] == "New"
+
+
+def test_delete_invalidates_cache(client, create_task):
+    task = create_task()
+    client.get(f"/tasks/{task['id']}")
+    assert client.delete(f"/tasks/{task['id']}").status_code == 200
+    assert task_cache.get(task["id"]) is None
+    assert client.get(f"/tasks/{task['id']}").status_code == 404
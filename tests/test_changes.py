@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+pytestmark = pytest.mark.config(
+    TASK_CHANGES_SETTLE_SECONDS=0, TASK_CHANGES_POLL_INTERVAL=0.05
+)
+
+
+def fetch_all(client, token=None, limit=2):
+    # Чтение ленты постранично до конца; возвращает изменения и последний токен
+    items = []
+    while True:
+        params = {"limit": limit}
+        if token:
+            params["since"] = token
+        response = client.get("/tasks/changes", query_string=params)
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page["changes"]) <= limit
+        items += page["changes"]
+        token = page["next_token"]
+        if not page["has_more"]:
+            return items, token
+
+
+def test_feed_pages_in_change_order(client, create_task):
+    ids = [create_task(title=f"Task {i}")["id"] for i in range(5)]
+    client.put(f"/tasks/{ids[0]}", json={"title": "Updated"})
+
+    items, _ = fetch_all(client)
+    assert [item["id"] for item in items] == ids[1:] + ids[:1]
+    assert {item["op"] for item in items} == {"upsert"}
+    assert items[-1]["task"]["title"] == "Updated"
+
+
+def test_feed_continues_from_token(client, create_task):
+    first = create_task(title="First")
+    _, token = fetch_all(client)
+    second = create_task(title="Second")
+    client.put(f"/tasks/{first['id']}", json={"title": "First updated"})
+
+    items, _ = fetch_all(client, token)
+    assert [(item["id"], item["task"]["title"]) for item in items] == [
+        (second["id"], "Second"),
+        (first["id"], "First updated"),
+    ]
+
+
+def test_deleted_task_returns_tombstone(client, create_task):
+    kept = create_task(title="Kept")
+    deleted = create_task(title="Deleted")
+    _, token = fetch_all(client)
+    assert client.delete(f"/tasks/{deleted['id']}").status_code == 200
+
+    items, _ = fetch_all(client, token)
+    assert [(item["op"], item["id"]) for item in items] == [("delete", deleted["id"])]
+    assert "task" not in items[0]
+
+    # Полная синхронизация не содержит удаленную задачу, но содержит удаление
+    items, _ = fetch_all(client)
+    assert [item["id"] for item in items if item["op"] == "upsert"] == [kept["id"]]
+    assert [item["id"] for item in items if item["op"] == "delete"] == [deleted["id"]]
+
+
+def test_since_now_skips_existing_changes(client, create_task):
+    create_task(title="Old")
+    response = client.get("/tasks/changes", query_string={"since": "now"})
+    token = response.get_json()["next_token"]
+    new = create_task(title="New")
+
+    items, _ = fetch_all(client, token)
+    assert [item["id"] for item in items] == [new["id"]]
+
+
+def test_long_poll_returns_on_change(app, client):
+    token = client.get("/tasks/changes").get_json()["next_token"]
+
+    def create():
+        time.sleep(0.2)
+        app.test_client().post("/tasks", json={"title": "Later"})
+
+    thread = threading.Thread(target=create)
+    thread.start()
+    started = time.monotonic()
+    response = client.get("/tasks/changes", query_string={"since": token, "wait": 5})
+    elapsed = time.monotonic() - started
+    thread.join()
+
+    assert [item["task"]["title"] for item in response.get_json()["changes"]] == [
+        "Later"
+    ]
+    assert elapsed < 2
+
+
+def test_long_poll_times_out_without_changes(client):
+    started = time.monotonic()
+    response = client.get("/tasks/changes", query_string={"since": "now", "wait": 0.2})
+    assert response.status_code == 200
+    assert response.get_json()["changes"] == []
+    assert time.monotonic() - started >= 0.2
+
+
+@pytest.mark.parametrize("wait", ["nan", "inf", "-inf", "soon"])
+def test_invalid_wait_returns_400(client, wait):
+    response = client.get("/tasks/changes", query_string={"wait": wait})
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_invalid_token_returns_400(client):
+    response = client.get("/tasks/changes", query_string={"since": "garbage"})
+    assert response.status_code == 400
@@ -0,0 +1,79 @@
+def etag(task):
+    return f'"{task["id"]}-{task["version"]}"'
+
+
+def test_get_task_returns_strong_etag(client, create_task):
+    task = create_task()
+    response = client.get(f"/tasks/{task['id']}")
+    assert response.headers["ETag"] == etag(task)
+    assert response.last_modified is not None
+
+
+def test_get_task_not_modified(client, create_task):
+    task = create_task()
+    response = client.get(f"/tasks/{task['id']}", headers={"If-None-Match": etag(task)})
+    assert response.status_code == 304
+
+
+def test_list_etag_changes_with_page(client, create_task):
+    task = create_task()
+    first = client.get("/tasks")
+    assert first.headers["ETag"].startswith('W/"')
+    cached = client.get("/tasks", headers={"If-None-Match": first.headers["ETag"]})
+    assert cached.status_code == 304
+
+    client.put(f"/tasks/{task['id']}", json={"title": "Changed"})
+    second = client.get("/tasks", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+
+def test_update_with_matching_etag(client, create_task):
+    task = create_task()
+    response = client.put(
+        f"/tasks/{task['id']}", json={"title": "New"}, headers={"If-Match": etag(task)}
+    )
+    assert response.status_code == 200
+    updated = response.get_json()
+    assert updated["version"] == task["version"] + 1
+    assert response.headers["ETag"] == etag(updated)
+
+
+def test_update_with_stale_etag_fails(client, create_task):
+    task = create_task()
+    client.put(f"/tasks/{task['id']}", json={"title": "First"})
+    response = client.put(
+        f"/tasks/{task['id']}",
+        json={"title": "Second"},
+        headers={"If-Match": etag(task)},
+    )
+    assert response.status_code == 412
+    assert client.get(f"/tasks/{task['id']}").get_json()["title"] == "First"
+
+
+def test_update_with_weak_etag_fails(client, create_task):
+    task = create_task()
+    response = client.put(
+        f"/tasks/{task['id']}",
+        json={"title": "New"},
+        headers={"If-Match": "W/" + etag(task)},
+    )
+    assert response.status_code == 412
+
+
+def test_delete_with_stale_etag_fails(client, create_task):
+    task = create_task()
+    client.put(f"/tasks/{task['id']}", json={"title": "Changed"})
+    response = client.delete(f"/tasks/{task['id']}", headers={"If-Match": etag(task)})
+    assert response.status_code == 412
+    assert client.get(f"/tasks/{task['id']}").status_code == 200
+
+
+def test_missing_task_is_not_found(client):
+    assert client.get("/tasks/999").status_code == 404
+    assert client.put("/tasks/999", json={"title": "New"}).status_code == 404
+    response = client.put(
+        "/tasks/999", json={"title": "New"}, headers={"If-Match": '"999-1"'}
+    )
+    assert response.status_code == 404
+    assert client.delete("/tasks/999").status_code == 404
@@ -0,0 +1,162 @@
+import os
+import time
+from datetime import timedelta
+
+import pytest
+
+from app.cache import task_cache
+from app.db import db
+from app.executor import (
+    claim_tasks,
+    extend_leases,
+    reclaim_expired,
+    task_executor,
+    utcnow,
+)
+from app.models import Task
+
+CALLS = []  # id задач, переданных обработчикам
+
+
+def record(payload):
+    CALLS.append(payload["id"])
+
+
+def fail(payload):
+    raise RuntimeError(f"boom {payload['id']}")
+
+
+def crash(payload):
+    # Аварийное завершение дочернего процесса пула
+    if payload["title"] == "Crash":
+        os._exit(1)
+
+
+@pytest.fixture
+def executor(app):
+    # Исполнитель с пулом потоков и повтором без задержки
+    CALLS.clear()
+    task_executor.pool_kind = "thread"
+    task_executor.concurrency = 2
+    task_executor.poll_interval = 0.01
+    task_executor.retry_base = 0.001
+    task_executor.retry_max = 0.001
+    task_executor.max_attempts = 2
+    return task_executor
+
+
+def add_task(**values):
+    values.setdefault("title", "Task")
+    task = Task(**values)
+    db.session.add(task)
+    db.session.commit()
+    return task.id
+
+
+def test_claim_orders_by_priority_and_skips_future_tasks(app):
+    low = add_task(priority=1)
+    high = add_task(priority=5)
+    add_task(priority=9, scheduled_at=utcnow() + timedelta(hours=1))
+
+    claimed = claim_tasks(10, 60, "owner")
+    assert [payload["id"] for payload, _ in claimed] == [high, low]
+    assert all(payload["status"] == "running" for payload, _ in claimed)
+    assert all(payload["attempts"] == 1 for payload, _ in claimed)
+    assert claim_tasks(10, 60, "other") == []  # Задачи уже арендованы
+
+
+def test_claim_invalidates_cache(app, client):
+    id = add_task()
+    client.get(f"/tasks/{id}")
+    assert task_cache.get(id)["status"] == "pending"
+    claim_tasks(10, 60, "owner")
+    assert task_cache.get(id) is None
+    assert client.get(f"/tasks/{id}").get_json()["status"] == "running"
+
+
+def test_extend_leases_keeps_updated_at_and_version(app):
+    id = add_task()
+    claim_tasks(10, 60, "owner")
+    before = db.session.get(Task, id)
+    updated_at, version, expires = (
+        before.updated_at,
+        before.version,
+        before.scheduled_at,
+    )
+    db.session.remove()
+
+    extend_leases([id], 600, "owner")
+    task = db.session.get(Task, id)
+    extended = task.scheduled_at
+    assert extended > expires
+    assert (task.updated_at, task.version) == (updated_at, version)
+    db.session.remove()
+
+    extend_leases([id], 6000, "other")  # Чужая аренда не продлевается
+    assert db.session.get(Task, id).scheduled_at == extended
+
+
+def test_results_of_lost_lease_are_ignored(app):
+    id = add_task()
+    claim_tasks(10, 0.01, "old")
+    time.sleep(0.02)
+    assert reclaim_expired(5) == 1
+    claim_tasks(10, 60, "new")
+
+    task_executor.owner = "old"
+    task_executor._save_results([id], [], [], [])
+    db.session.remove()
+    assert db.session.get(Task, id).status == "running"
+
+    task_executor.owner = "new"
+    task_executor._save_results([id], [], [], [])
+    db.session.remove()
+    task = db.session.get(Task, id)
+    assert (task.status, task.lease_owner) == ("succeeded", None)
+
+
+def test_run_executes_tasks(executor):
+    ids = [add_task() for _ in range(3)]
+    executor.handler = f"{__name__}:record"
+    executor.run(burst=True)
+    assert sorted(CALLS) == ids
+    db.session.remove()
+    assert {db.session.get(Task, id).status for id in ids} == {"succeeded"}
+    assert executor.stats()["succeeded"] == 3
+
+
+def test_failed_task_is_retried_then_failed(executor, client):
+    id = add_task()
+    executor.handler = f"{__name__}:fail"
+    executor.run(burst=True)
+    db.session.remove()
+    task = db.session.get(Task, id)
+    assert (task.status, task.attempts) == ("failed", 2)
+    assert task.last_error == f"RuntimeError: boom {id}"
+    assert executor.stats()["retried"] == 1
+
+    # Повтор через API возвращает задачу в очередь
+    response = client.post(f"/tasks/{id}/retry")
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "pending"
+
+
+def test_broken_pool_charges_only_crashed_task(executor):
+    crashed = add_task(title="Crash")
+    ok = [add_task(title="Ok") for _ in range(3)]
+    before = executor.stats()
+    executor.pool_kind = "process"
+    executor.handler = f"{__name__}:crash"
+    executor.run(burst=True)
+    db.session.remove()
+
+    # Задачи, выполнявшиеся рядом с упавшей, возвращены без учета попытки
+    tasks = [db.session.get(Task, id) for id in ok]
+    assert [(task.status, task.attempts) for task in tasks] == [("succeeded", 1)] * 3
+    task = db.session.get(Task, crashed)
+    assert (task.status, task.attempts) == ("failed", 2)
+    assert task.last_error.startswith("BrokenProcessPool")
+    stats = executor.stats()
+    assert stats["succeeded"] - before["succeeded"] == 3
+    assert stats["failed"] - before["failed"] == 1
+    assert not executor._suspects
@@ -0,0 +1,112 @@
+import pytest
+
+from app.pagination import encode_cursor
+
+
+def ids(response):
+    assert response.status_code == 200
+    return [item["id"] for item in response.get_json()["items"]]
+
+
+def collect(client, url):
+    # id задач всех страниц списка, полученных по курсорам
+    result = []
+    cursor = None
+    while True:
+        body = client.get(url + (f"&cursor={cursor}" if cursor else "")).get_json()
+        result += [item["id"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return result
+
+
+def test_title_filters(client, create_task):
+    report = create_task(title="Report 100%")["id"]
+    create_task(title="Report draft")
+    create_task(title="Weekly report")
+    assert ids(client.get("/tasks?title_prefix=Report%20100%25")) == [report]
+    assert len(ids(client.get("/tasks?title_prefix=Report"))) == 2
+    assert len(ids(client.get("/tasks?title_contains=eport"))) == 3
+    assert ids(client.get("/tasks?title_prefix=Report_")) == []
+
+
+def test_status_and_date_filters(client, create_task):
+    first = create_task()["id"]
+    created_at = client.get(f"/tasks/{first}").get_json()["created_at"]
+    second = create_task()["id"]
+    assert ids(client.get("/tasks?status=pending")) == [first, second]
+    assert ids(client.get("/tasks?status=failed")) == []
+    response = client.get("/tasks", query_string={"created_before": created_at})
+    assert ids(response) == []
+    response = client.get("/tasks", query_string={"created_after": created_at})
+    assert ids(response) == [first, second]
+
+
+def test_sort_by_title_descending_across_pages(client, create_task):
+    titles = ["b", "a", "c", "a", "d"]
+    tasks = [create_task(title=title) for title in titles]
+    expected = [
+        task["id"]
+        for task in sorted(tasks, key=lambda task: (task["title"], task["id"]))
+    ][::-1]
+    assert collect(client, "/tasks?sort=title&order=desc&limit=2") == expected
+
+
+def test_sort_by_updated_at_with_nulls(client, create_task):
+    tasks = [create_task()["id"] for _ in range(4)]
+    client.put(f"/tasks/{tasks[2]}", json={"title": "First update"})
+    client.put(f"/tasks/{tasks[0]}", json={"title": "Second update"})
+    # Задачи без updated_at идут первыми при сортировке по возрастанию
+    expected = [tasks[1], tasks[3], tasks[2], tasks[0]]
+    assert collect(client, "/tasks?sort=updated_at&limit=1") == expected
+    assert collect(client, "/tasks?sort=updated_at&order=desc&limit=3") == (
+        expected[::-1]
+    )
+
+
+def test_sparse_fields(client, create_task):
+    create_task(title="Task", description="Описание")
+    items = client.get("/tasks?fields=title").get_json()["items"]
+    assert items == [{"title": "Task"}]
+    items = client.get("/tasks?fields=id,description").get_json()["items"]
+    assert set(items[0]) == {"id", "description"}
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "sort=priority",
+        "order=up",
+        "fields=id,secret",
+        "status=done",
+        "created_after=yesterday",
+    ],
+)
+def test_invalid_parameters(client, query):
+    response = client.get(f"/tasks?{query}")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize(
+    "sort, key",
+    [
+        ("title", ["a"]),
+        ("title", {"a": 1}),
+        ("title", 1),
+        ("created_at", ["2026-01-01"]),
+        ("updated_at", {"a": 1}),
+        ("updated_at", "yesterday"),
+    ],
+)
+def test_cursor_with_invalid_sort_value(client, create_task, sort, key):
+    create_task()
+    cursor = encode_cursor({"id": 1, "k": key, "s": sort})
+    response = client.get(f"/tasks?sort={sort}&cursor={cursor}")
+    assert response.status_code == 400
+
+
+def test_cursor_for_other_sort(client, create_task):
+    create_task()
+    cursor = encode_cursor({"id": 1, "k": "a", "s": "title"})
+    assert client.get(f"/tasks?cursor={cursor}").status_code == 400
@@ -0,0 +1,76 @@
+import json
+
+
+def collect_pages(client, url):
+    # Обход всех страниц списка по курсорам; возвращает id задач по страницам
+    pages = []
+    cursor = None
+    while True:
+        separator = "&" if "?" in url else "?"
+        page_url = url + (f"{separator}cursor={cursor}" if cursor else "")
+        response = client.get(page_url)
+        assert response.status_code == 200
+        body = response.get_json()
+        pages.append([item["id"] for item in body["items"]])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_pages_follow_cursor(client, create_task):
+    ids = [create_task(title=f"Task {index}")["id"] for index in range(5)]
+    pages = collect_pages(client, "/tasks?limit=2")
+    assert pages == [ids[:2], ids[2:4], ids[4:]]
+
+
+def test_last_full_page_has_no_cursor(client, create_task):
+    for _ in range(2):
+        create_task()
+    body = client.get("/tasks?limit=2").get_json()
+    assert body["limit"] == 2
+    assert body["next_cursor"] is None
+
+
+def test_cursor_skips_deleted_tasks(client, create_task):
+    ids = [create_task()["id"] for _ in range(4)]
+    cursor = client.get("/tasks?limit=2").get_json()["next_cursor"]
+    client.delete(f"/tasks/{ids[2]}")
+    body = client.get(f"/tasks?limit=2&cursor={cursor}").get_json()
+    assert [item["id"] for item in body["items"]] == [ids[3]]
+
+
+def test_limit_is_capped(app, client, create_task):
+    app.config["TASKS_MAX_PAGE_SIZE"] = 3
+    for _ in range(4):
+        create_task()
+    body = client.get("/tasks?limit=100").get_json()
+    assert body["limit"] == 3
+    assert len(body["items"]) == 3
+
+
+def test_invalid_limit_and_cursor(client):
+    for url in ("/tasks?limit=0", "/tasks?limit=abc", "/tasks?cursor=!!!"):
+        response = client.get(url)
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+
+
+def test_stream_returns_all_tasks_as_ndjson(app, client, create_task):
+    app.config["TASKS_STREAM_CHUNK_SIZE"] = 2
+    ids = [create_task()["id"] for _ in range(5)]
+    response = client.get("/tasks?stream=true")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert "ETag" not in response.headers
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ids
+
+
+def test_stream_by_accept_header_starts_after_cursor(client, create_task):
+    ids = [create_task()["id"] for _ in range(3)]
+    cursor = client.get("/tasks?limit=1").get_json()["next_cursor"]
+    response = client.get(
+        f"/tasks?cursor={cursor}", headers={"Accept": "application/x-ndjson"}
+    )
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ids[1:]
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from app.db import db
+from app.models import Task
+from app.replicas import read_replicas
+
+
+@pytest.fixture
+def config(tmp_path):
+    # Реплика в отдельном файле SQLite; репликация не настроена, поэтому по
+    # данным ответа видно, из какой базы выполнено чтение
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    return {"DATABASE_REPLICA_URLS": [url], "SQLALCHEMY_BINDS": {"replica_0": url}}
+
+
+@pytest.fixture(autouse=True)
+def replica(app):
+    engine = db.engines["replica_0"]
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(db.insert(Task), [{"title": "From replica"}])
+    return engine
+
+
+def titles(client):
+    # Названия задач из списка
+    return [item["title"] for item in client.get("/tasks").get_json()["items"]]
+
+
+def test_reads_use_replica(app, create_task):
+    create_task(title="From primary")
+    before = read_replicas.stats()
+
+    client = app.test_client()  # Клиент без записи
+    assert titles(client) == ["From replica"]
+    assert client.get("/tasks/1").get_json()["title"] == "From replica"
+    assert read_replicas.stats()["reads_total"] - before["reads_total"] == 2
+
+
+def test_stream_reads_replica(app, create_task):
+    create_task(title="From primary")
+    response = app.test_client().get("/tasks?stream=true")
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["title"] for line in lines] == ["From replica"]
+    assert read_replicas.active == [0]  # Реплика освобождена после выдачи
+
+
+def test_client_reads_primary_after_write(client, create_task):
+    response = client.post("/tasks", json={"title": "From primary"})
+    assert response.status_code == 201
+    assert "read_primary_until" in response.headers["Set-Cookie"]
+    before = read_replicas.stats()
+
+    assert titles(client) == ["From primary"]
+    stats = read_replicas.stats()
+    assert stats["primary_reads_total"] - before["primary_reads_total"] == 1
+    assert stats["reads_total"] == before["reads_total"]
+
+
+def test_failed_write_does_not_stick(client):
+    response = client.post("/tasks", json={})
+    assert response.status_code == 400
+    assert "Set-Cookie" not in response.headers
+    assert titles(client) == ["From replica"]
+
+
+def test_expired_cookie_reads_replica(client, create_task):
+    create_task(title="From primary")
+    client.set_cookie("read_primary_until", "1.0")
+    assert titles(client) == ["From replica"]
+
+
+@pytest.mark.config(DATABASE_REPLICA_RETRY_SECONDS=60)
+def test_failover_to_primary(app, replica, create_task):
+    create_task(title="From primary")
+    db.metadata.drop_all(replica)  # Запросы к реплике завершатся OperationalError
+    before = read_replicas.stats()
+
+    client = app.test_client()
+    assert titles(client) == ["From primary"]
+    stats = read_replicas.stats()
+    assert stats["failovers_total"] - before["failovers_total"] == 1
+    assert stats["healthy"] == 0
+
+    # Пока реплика исключена, чтение сразу идет в основную базу
+    assert titles(client) == ["From primary"]
+    assert read_replicas.stats()["failovers_total"] == stats["failovers_total"]
+
+
+def test_replicas_cannot_be_used_with_shards(make_app, tmp_path):
+    with pytest.raises(ValueError, match="cannot be used with task shards"):
+        make_app(
+            TASK_SHARD_URLS=[f"sqlite:///{tmp_path / 'shard.db'}"],
+            TASK_ID_WORKER_ID=1,
+        )
@@ -0,0 +1,75 @@
+from app.db import db
+from app.models import Task
+from app.search import search_statement
+
+
+def search(client, query, **params):
+    response = client.get("/tasks/search", query_string={"q": query, **params})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def titles(body):
+    return [item["title"] for item in body["items"]]
+
+
+def test_search_ranks_matches(client, create_task):
+    create_task(title="Buy milk", description="and bread")
+    create_task(title="Buy bread", description="bread, bread and more bread")
+    create_task(title="Walk the dog")
+    body = search(client, "bread")
+    assert titles(body) == ["Buy bread", "Buy milk"]
+    assert body["items"][0]["score"] > body["items"][1]["score"] > 0
+
+
+def test_search_requires_every_word(client, create_task):
+    create_task(title="Buy milk")
+    create_task(title="Buy bread")
+    assert titles(search(client, "buy milk")) == ["Buy milk"]
+
+
+def test_search_ignores_fts_operators(client, create_task):
+    create_task(title="Alpha OR beta")
+    assert titles(search(client, 'alpha" OR (beta*')) == ["Alpha OR beta"]
+
+
+def test_search_pages(client, create_task):
+    for index in range(3):
+        create_task(title=f"Report {index}")
+    first = search(client, "report", limit=2)
+    second = search(client, "report", limit=2, cursor=first["next_cursor"])
+    assert len(first["items"]) == 2
+    assert second["next_cursor"] is None
+    found = titles(first) + titles(second)
+    assert sorted(found) == ["Report 0", "Report 1", "Report 2"]
+
+
+def test_search_follows_title_updates(client, create_task):
+    task = create_task(title="Old name")
+    client.put(f"/tasks/{task['id']}", json={"title": "New name"})
+    assert titles(search(client, "old")) == []
+    assert titles(search(client, "new")) == ["New name"]
+    client.delete(f"/tasks/{task['id']}")
+    assert titles(search(client, "new")) == []
+
+
+def test_index_is_not_rewritten_on_status_changes(app):
+    trigger = db.session.execute(
+        db.text("SELECT sql FROM sqlite_master WHERE name = 'task_fts_update'")
+    ).scalar()
+    assert "AFTER UPDATE OF title, description ON task" in trigger
+
+
+def test_invalid_search_parameters(client):
+    for params in ({"q": ""}, {"q": "?!"}, {"q": "word", "cursor": "bad"}):
+        response = client.get("/tasks/search", query_string=params)
+        assert response.status_code == 400
+
+
+def test_like_fallback_matches_wildcards_literally(app):
+    for title in ("50% off", "500 off", "a_b", "axb"):
+        db.session.add(Task(title=title))
+    db.session.commit()
+    for query, expected in (("50%", ["50% off"]), ("a_b", ["a_b"])):
+        rows = db.session.execute(search_statement(query, "postgresql"))
+        assert [task.title for task, _ in rows] == expected
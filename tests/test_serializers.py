@@ -0,0 +1,60 @@
+import json
+from datetime import datetime, timezone
+
+from app.db import db
+from app.models import Task
+from app.schemas import TaskSchema
+from app.serializers import compile_dumper, dump_task, dump_tasks
+
+
+def encode(payload):
+    # Байтовое представление данных, как в теле ответа
+    return json.dumps(payload, sort_keys=False).encode()
+
+
+def make_task(**values):
+    task = Task(title="Task", **values)
+    db.session.add(task)
+    db.session.commit()
+    return task
+
+
+def test_dump_task_matches_schema_for_every_field(app):
+    task = make_task(
+        description="Описание",
+        priority=7,
+        scheduled_at=datetime(2026, 1, 2, 3, 4, 5, 678901),
+        last_error="RuntimeError: boom",
+    )
+    task.updated_at = datetime(2026, 2, 3, 4, 5, 6, tzinfo=timezone.utc)
+    db.session.commit()
+
+    expected = TaskSchema().dump(task)
+    assert set(expected) == set(TaskSchema().dump_fields)
+    assert encode(dump_task(task)) == encode(expected)
+
+
+def test_dump_task_matches_schema_for_nulls(app):
+    task = make_task()  # description, updated_at и last_error не заданы
+    expected = TaskSchema().dump(task)
+    assert expected["description"] is None
+    assert expected["updated_at"] is None
+    assert encode(dump_task(task)) == encode(expected)
+
+
+def test_dump_tasks_matches_schema_many(app):
+    tasks = [make_task(priority=priority) for priority in range(3)]
+    assert encode(dump_tasks(tasks)) == encode(TaskSchema(many=True).dump(tasks))
+
+
+def test_partial_dumper_matches_schema_only(app):
+    task = make_task(description="Описание")
+    only = ("id", "title", "updated_at")
+    dump = compile_dumper(TaskSchema, only)
+    assert encode(dump(task)) == encode(TaskSchema(only=only).dump(task))
+
+
+def test_response_body_matches_schema(app, client):
+    task = make_task(description="Описание")
+    expected = app.json.response(TaskSchema().dump(task)).get_data()
+    assert client.get(f"/tasks/{task.id}").get_data() == expected
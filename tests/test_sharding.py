@@ -0,0 +1,133 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app.db import db
+from app.models import Task
+from app.sharding import min_id_for, task_shards
+
+
+@pytest.fixture
+def config(tmp_path):
+    # Два сегмента в отдельных файлах SQLite
+    urls = [f"sqlite:///{tmp_path / f'shard_{shard}.db'}" for shard in range(2)]
+    return {
+        "TASK_SHARD_URLS": urls,
+        "SQLALCHEMY_BINDS": {
+            f"task_shard_{shard}": url for shard, url in enumerate(urls)
+        },
+        "TASK_ID_WORKER_ID": 1,
+    }
+
+
+@pytest.fixture(autouse=True)
+def shards(app):
+    task_shards.create_schema()
+
+
+def shard_ids(shard):
+    # id задач, хранящихся в сегменте
+    with task_shards.use(shard):
+        ids = db.session.execute(db.select(Task.id).order_by(Task.id)).scalars().all()
+    db.session.remove()
+    return ids
+
+
+def test_tasks_are_routed_by_id(create_task):
+    ids = [create_task(title=f"Task {i}")["id"] for i in range(20)]
+    assert ids == sorted(ids)  # id растут со временем создания
+
+    stored = [shard_ids(shard) for shard in range(2)]
+    assert all(stored)  # Задачи есть в обоих сегментах
+    assert sorted(stored[0] + stored[1]) == ids
+    for id in ids:
+        assert id in stored[task_shards.for_id(id)]
+    assert db.session.execute(db.select(db.func.count(Task.id))).scalar() == 0
+
+
+def test_crud_in_task_shard(client, create_task):
+    tasks = [create_task(title=f"Task {i}") for i in range(6)]
+    for task in tasks:
+        url = f"/tasks/{task['id']}"
+        assert client.get(url).get_json()["title"] == task["title"]
+        response = client.put(url, json={"title": "Updated"})
+        assert response.status_code == 200
+        assert client.get(url).get_json()["title"] == "Updated"
+        assert client.delete(url).status_code == 200
+        assert client.get(url).status_code == 404
+    assert shard_ids(0) + shard_ids(1) == []
+
+
+def test_bulk_across_shards(client):
+    response = client.post("/tasks/bulk", json=[{"title": f"T{i}"} for i in range(10)])
+    ids = [result["task"]["id"] for result in response.get_json()["results"]]
+    assert sorted(shard_ids(0) + shard_ids(1)) == sorted(ids)
+    assert shard_ids(0) and shard_ids(1)
+
+    response = client.put(
+        "/tasks/bulk", json=[{"id": id, "title": f"U{id}"} for id in ids]
+    )
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == [200] * 10
+    assert [result["task"]["title"] for result in results] == [f"U{id}" for id in ids]
+
+    response = client.delete("/tasks/bulk", json=ids + [1])
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == [200] * 10 + [404]
+    assert shard_ids(0) + shard_ids(1) == []
+
+
+@pytest.mark.parametrize(
+    "query, key, reverse",
+    [
+        ("", lambda task: task["id"], False),
+        ("sort=id&order=desc", lambda task: task["id"], True),
+        ("sort=title", lambda task: (task["title"], task["id"]), False),
+        ("sort=title&order=desc", lambda task: (task["title"], task["id"]), True),
+    ],
+)
+def test_pagination_merges_shards(client, create_task, query, key, reverse):
+    tasks = [create_task(title=f"Task {i * 5 % 9}") for i in range(9)]
+    expected = [task["id"] for task in sorted(tasks, key=key, reverse=reverse)]
+
+    ids = []
+    cursor = None
+    while True:
+        url = f"/tasks?{query}&limit=2" + (f"&cursor={cursor}" if cursor else "")
+        body = client.get(url).get_json()
+        assert len(body["items"]) <= 2
+        ids += [item["id"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == expected
+
+
+def test_stream_merges_shards(client, create_task):
+    ids = [create_task()["id"] for _ in range(7)]
+    response = client.get("/tasks?stream=true")
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ids
+
+
+def test_search_is_not_available(client):
+    assert client.get("/tasks/search", query_string={"q": "task"}).status_code == 501
+
+
+@pytest.mark.config(
+    TASK_SHARD_STRATEGY="range", TASK_SHARD_RANGES=["2025-01-01T00:00:00"]
+)
+def test_range_strategy_routes_by_creation_time(create_task):
+    boundary = min_id_for(datetime(2025, 1, 1))
+    assert task_shards.boundaries == [boundary]
+    assert task_shards.for_id(boundary - 1) == 0
+    assert task_shards.for_id(boundary) == 1
+
+    task = create_task()  # Новые задачи попадают в последний сегмент
+    assert shard_ids(1) == [task["id"]]
+
+
+def test_worker_id_is_required(make_app):
+    with pytest.raises(ValueError, match="TASK_ID_WORKER_ID is required"):
+        make_app(TASK_ID_WORKER_ID=None)
@@ -0,0 +1,25 @@
+import pytest
+
+
+@pytest.mark.parametrize(
+    "body",
+    [{}, {"title": 1}, {"title": "Task", "priority": 100}, [], None],
+)
+def test_create_with_invalid_body(client, body):
+    response = client.post("/tasks", json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_create_without_json_body(client):
+    response = client.post("/tasks", data="title", content_type="text/plain")
+    assert response.status_code == 400
+
+
+def test_update_with_invalid_body(client, create_task):
+    task = create_task()
+    for body in ({"title": 1}, {"status": "succeeded"}, []):
+        response = client.put(f"/tasks/{task['id']}", json=body)
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+    assert client.get(f"/tasks/{task['id']}").get_json()["title"] == task["title"]
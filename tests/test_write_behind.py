@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.models import Task
+from app.write_behind import task_write_behind
+
+pytestmark = pytest.mark.config(
+    TASK_WRITE_BEHIND=True,
+    TASK_WRITE_BEHIND_BATCH_SIZE=50,
+    TASK_WRITE_BEHIND_FLUSH_INTERVAL=0.2,
+)
+
+
+def test_flush_ack_returns_saved_task(client):
+    response = client.post("/tasks", json={"title": "Queued", "priority": 2})
+    assert response.status_code == 201
+    task = response.get_json()
+    assert task["title"] == "Queued"
+    assert client.get(f"/tasks/{task['id']}").get_json()["priority"] == 2
+
+
+def test_concurrent_creates_are_batched(app):
+    before = task_write_behind.stats()
+
+    def create(i):
+        return app.test_client().post("/tasks", json={"title": f"Task {i}"})
+
+    with ThreadPoolExecutor(10) as pool:
+        responses = list(pool.map(create, range(10)))
+    assert [r.status_code for r in responses] == [201] * 10
+    ids = {r.get_json()["id"] for r in responses}
+    assert len(ids) == 10
+    assert Task.query.count() == 10
+
+    stats = task_write_behind.stats()
+    assert stats["written"] - before["written"] == 10
+    # Все запросы пришли в пределах flush_interval и записаны меньшим числом вставок
+    assert stats["batches"] - before["batches"] < 10
+
+
+@pytest.mark.config(TASK_WRITE_BEHIND_ACK="enqueue")
+def test_enqueue_ack_returns_202(app, client):
+    response = client.post("/tasks", json={"title": "Later"})
+    assert response.status_code == 202
+    assert response.get_json() == {"message": "Task accepted"}
+
+    task_write_behind.drain()  # Запись оставшихся задач
+    assert [task.title for task in Task.query.all()] == ["Later"]
+
+
+@pytest.mark.config(TASK_WRITE_BEHIND_ACK="enqueue", TASK_WRITE_BEHIND_QUEUE_SIZE=1)
+def test_full_queue_returns_503(client, monkeypatch):
+    # Без фонового потока очередь не разбирается
+    monkeypatch.setattr(task_write_behind, "_ensure_worker", lambda: None)
+    before = task_write_behind.stats()
+
+    assert client.post("/tasks", json={"title": "First"}).status_code == 202
+    response = client.post("/tasks", json={"title": "Second"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.get_json() == {"error": "Task queue is full"}
+
+    stats = task_write_behind.stats()
+    assert stats["queued"] == 1
+    assert stats["rejected"] - before["rejected"] == 1
+
+
+def test_invalid_task_is_not_queued(client):
+    before = task_write_behind.stats()
+    assert client.post("/tasks", json={"priority": 1}).status_code == 400
+    assert task_write_behind.stats()["enqueued"] == before["enqueued"]